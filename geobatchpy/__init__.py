@@ -1,3 +1,4 @@
 __version__ = '0.2.2'
 
 from geobatchpy.client import Client
+from geobatchpy.transport import Transport
@@ -0,0 +1,814 @@
+"""Non-blocking clients of the Geoapify API for use with asyncio.
+
+AsyncClient, AsyncBatchClient, and AsyncBoundariesClient mirror the methods of their synchronous counterparts as
+coroutines. All of them share an AsyncTransport, a pooled HTTP transport based on aiohttp, which requires
+`pip install geobatchpy[aio]`. Requests are sent by the event loop itself, and at most `max_concurrency` of them are in
+flight at any time, no matter how many coroutines await results. Like the synchronous Transport, it applies an optional
+RateLimiter and a RetryPolicy, and optionally compresses large request bodies. Network errors are raised as the
+exceptions of requests, so that both transports fail alike.
+
+Work that grows with the size of the inputs or touches the disk - parsing, fingerprinting and deduplicating inputs,
+decoding results of batch jobs, and reading and writing journals, caches, and batch size statistics - runs on the
+default executor of the event loop. Batch jobs are monitored by a single coroutine, which keeps every outstanding job in
+one schedule ordered by the time of the next GET request.
+"""
+import asyncio
+import collections.abc
+import gzip
+import logging
+import time
+from collections import deque
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, Iterator, List, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from geobatchpy import codec
+from geobatchpy.batch import (
+    _STREAM_CHUNK_SIZE, BatchClient, BatchSubmissionError, _BatchJobState, _JobMonitor, _JobSubmitter, _PollResult,
+    _SpatialCacheLookup, _iter_batches, _map_inputs, _merge_partial_results, _number_of_items, _parse_poll_body,
+    deduplicate_inputs, expand_deduplicated_results, parse_geocodes, parse_geocoding_inputs,
+    simplify_batch_geocoding_results
+)
+from geobatchpy.boundaries import _consists_of_params, _part_of_params
+from geobatchpy.cache import ResponseCache, SpatialCache, is_error_response
+from geobatchpy.client import (
+    _geocode_params, _isoline_params, _place_details_params, _places_params, _reverse_geocode_params,
+    _route_matrix_body, stitch_route_matrix_tiles
+)
+from geobatchpy.codec import decode_response
+from geobatchpy.events import JobEvent
+from geobatchpy.journal import JobJournal
+from geobatchpy.matrix import RouteMatrix
+from geobatchpy.polling import PollScheduler, parse_retry_after
+from geobatchpy.ratelimit import GROUP_BATCH_POLL, GROUP_BATCH_POST, GROUP_SINGLE, RateLimiter, TokenBucket
+from geobatchpy.retry import RetryPolicy
+from geobatchpy.sizing import BatchSizer
+from geobatchpy.utils import (
+    API_BATCH, API_BOUNDARIES_CONSISTS_OF, API_BOUNDARIES_PART_OF, API_GEOCODE, API_ISOLINE, API_PLACE_DETAILS,
+    API_PLACES, API_REVERSE_GEOCODE, API_ROUTE_MATRIX, Json, get_api_key, get_api_url
+)
+
+
+class AsyncResponse:
+
+    def __init__(self, response: 'aiohttp.ClientResponse', content: bytes = None, request_size: int = None):
+        """Response of an AsyncTransport.
+
+        The body of a streamed response is read with `read_chunk`; close such a response when done to release the
+        connection. The body of any other response is available as `content`.
+
+        Arguments:
+            response: the aiohttp response.
+            content: the body, unless streamed.
+            request_size: size in bytes of the body sent with the request, None if there was none.
+        """
+        self.status_code = response.status
+        self.headers = response.headers
+        self.content = content
+        self.request_size = request_size
+        self._response = response
+
+    async def read_chunk(self, size: int) -> bytes:
+        """Reads up to `size` bytes of a streamed body. Returns an empty bytes object at the end."""
+        try:
+            return await self._response.content.read(size)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _as_requests_error(e) from e
+
+    def close(self) -> None:
+        """Releases the connection."""
+        self._response.release()
+
+
+class AsyncTransport:
+
+    def __init__(self, max_concurrency: int = 10, keep_alive: bool = True, timeout: float = None,
+                 rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None, compress_requests: bool = False,
+                 compress_min_size: int = 1024):
+        """Pooled asynchronous HTTP transport with a bounded number of concurrent requests.
+
+        Arguments:
+            max_concurrency: maximal number of open connections, and hence of requests in flight.
+            keep_alive: if False, connections are closed after every request.
+            timeout: optional timeout in seconds for connecting to and reading from the server.
+            rate_limiter: optional rate limits per endpoint group, shared by all requests of this transport.
+            retry_policy: retries of transient failures. Defaults to RetryPolicy(); use RetryPolicy(max_attempts=1)
+                to disable retries.
+            compress_requests: if True, JSON bodies of POST requests are sent gzip-compressed.
+            compress_min_size: smaller bodies in bytes are sent uncompressed.
+        """
+        if aiohttp is None:
+            raise ValueError('aiohttp is not installed - run \'pip install geobatchpy[aio]\'.')
+        self.max_concurrency = max_concurrency
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._rate_limiter = rate_limiter
+        self._retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self._compress_requests = compress_requests
+        self._compress_min_size = compress_min_size
+        self._session: Union['aiohttp.ClientSession', None] = None
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._rate_limiter
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self._retry_policy
+
+    @property
+    def compress_requests(self) -> bool:
+        return self._compress_requests
+
+    async def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                  group: str = GROUP_SINGLE) -> AsyncResponse:
+        """Sends a GET request, see `request`."""
+        response, _ = await self.request('GET', url=url, params=params, headers=headers, group=group)
+        return response
+
+    async def post(self, url: str, json: Any = None, headers: Dict[str, str] = None, group: str = GROUP_SINGLE,
+                   idempotent: bool = False) -> AsyncResponse:
+        """Sends a POST request with a JSON body, see `request`."""
+        response, _ = await self.request('POST', url=url, json=json, headers=headers, group=group,
+                                         idempotent=idempotent)
+        return response
+
+    async def request(self, method: str, url: str, params: Dict[str, Any] = None, json: Any = None,
+                      headers: Dict[str, str] = None, group: str = GROUP_SINGLE, stream: bool = False,
+                      idempotent: bool = None) -> Tuple[AsyncResponse, int]:
+        """Sends a request using a pooled connection, retrying transient failures.
+
+        Arguments:
+            method: HTTP method, e.g., 'GET' or 'POST'.
+            url: request URL.
+            params: optional query parameters. Parameters which are None are left out.
+            json: optional JSON serializable request body.
+            headers: optional request headers.
+            group: endpoint group of the request, see geobatchpy.ratelimit.
+            stream: if True, the body is not downloaded until read with `read_chunk`. Close the response when done
+                to release the connection.
+            idempotent: if True, the request is retried like a GET request. Otherwise only if the server certainly did
+                not process it. Defaults to True for GET requests only.
+
+        Returns:
+            The response and the number of retries it took.
+        """
+        idempotent = method == 'GET' if idempotent is None else idempotent
+        params = None if params is None else {key: val if isinstance(val, (str, int, float)) else str(val)
+                                              for key, val in params.items() if val is not None}
+        headers = dict() if headers is None else headers
+        send = partial(self._send, method=method, url=url, params=params, group=group, stream=stream,
+                       idempotent=idempotent)
+        if json is None:
+            return await send(data=None, headers=headers)
+        body = codec.dumps(json)
+        headers = {**headers, 'Content-Type': 'application/json'}
+        if not self._compress_requests or len(body) < self._compress_min_size:
+            return await send(data=body, headers=headers)
+
+        response, retries = await send(data=gzip.compress(body, compresslevel=6),
+                                       headers={**headers, 'Content-Encoding': 'gzip'})
+        if response.status_code != 415:
+            return response, retries
+        # The server rejected the request without processing it, so it is safe to send it again:
+        response.close()
+        self._logger.warning(f'Server does not accept compressed requests to {urlparse(url).path} - request '
+                             f'compression turned off.')
+        self._compress_requests = False
+        return await send(data=body, headers=headers)
+
+    async def _send(self, method: str, url: str, params: Union[Dict[str, Any], None], data: Union[bytes, None],
+                    headers: Dict[str, str], group: str, stream: bool,
+                    idempotent: bool) -> Tuple[AsyncResponse, int]:
+        policy = self._retry_policy
+        endpoint = urlparse(url).path
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(group)
+            response = None
+            try:
+                response = await self._fetch(method=method, url=url, params=params, data=data, headers=headers,
+                                             stream=stream)
+            except requests.exceptions.RequestException as e:
+                if not policy.should_retry_error(error=e, idempotent=idempotent):
+                    raise
+                delay = policy.backoff(attempt=attempt)
+                reason = repr(e)
+                failure = e
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if self._rate_limiter is not None:
+                    self._rate_limiter.report(group, response.status_code, retry_after=retry_after)
+                if not policy.should_retry_status(status_code=response.status_code, idempotent=idempotent):
+                    return response, attempt
+                delay = policy.backoff(attempt=attempt) if retry_after is None else retry_after
+                reason = f'status {response.status_code}'
+                failure = None
+
+            attempt += 1
+            if attempt >= policy.max_attempts or time.monotonic() - started + delay > policy.max_elapsed:
+                if failure is not None:
+                    raise failure
+                return response, attempt - 1
+            if response is not None:
+                response.close()
+            policy.record_retry(endpoint=endpoint)
+            self._logger.warning(f'Request to {endpoint} failed with {reason} - retry {attempt} in {delay:.1f} '
+                                 f'seconds.')
+            await asyncio.sleep(delay)
+
+    async def _fetch(self, method: str, url: str, params: Union[Dict[str, Any], None], data: Union[bytes, None],
+                     headers: Dict[str, str], stream: bool) -> AsyncResponse:
+        request_size = None if data is None else len(data)
+        try:
+            response = await self._get_session().request(method, url, params=params, data=data, headers=headers)
+            if stream:
+                return AsyncResponse(response, request_size=request_size)
+            try:
+                content = await response.read()
+            finally:
+                response.release()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _as_requests_error(e) from e
+        return AsyncResponse(response, content=content, request_size=request_size)
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        # Created on first use, since a session is bound to the running event loop:
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, force_close=not self._keep_alive)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self._timeout, sock_read=self._timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self) -> None:
+        """Closes all pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+def _as_requests_error(error: Exception) -> requests.exceptions.RequestException:
+    """Translates an aiohttp error into its counterpart of requests, which the RetryPolicy and callers expect."""
+    connect_timeout = getattr(aiohttp, 'ConnectionTimeoutError', None)  # aiohttp >= 3.10
+    if connect_timeout is not None and isinstance(error, connect_timeout):
+        return requests.exceptions.ConnectTimeout(error)
+    if isinstance(error, asyncio.TimeoutError):
+        return requests.exceptions.ReadTimeout(error)
+    if isinstance(error, aiohttp.ClientConnectionError):
+        return requests.exceptions.ConnectionError(error)
+    return requests.exceptions.RequestException(error)
+
+
+async def _run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Runs a function on the default executor of the running event loop and returns its result."""
+    return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args, **kwargs))
+
+
+async def _iterate_blocking(iterable: Iterable[Any]) -> AsyncIterator[Any]:
+    """Advances an iterator on the default executor, item by item."""
+    iterator = iter(iterable)
+    end = object()
+    while True:
+        item = await _run_blocking(next, iterator, end)
+        if item is end:
+            return
+        yield item
+
+
+def _replay_chunks(chunks: List[bytes], error: Union[Exception, None]) -> Iterator[bytes]:
+    """Yields chunks read before, and raises the error which stopped reading them, if any."""
+    yield from chunks
+    if error is not None:
+        raise error
+
+
+async def _cached_get(transport: AsyncTransport, url: str, api: str, params: Dict[str, Any],
+                      headers: Dict[str, str], cache: ResponseCache = None) -> Json:
+    """Coroutine version of geobatchpy.cache.cached_get. Cache lookups may hit the disk and run on the executor."""
+    if cache is None:
+        return decode_response(await transport.get(url=url, params=params, headers=headers))
+    key = cache.make_key(api=api, params=params)
+    value = await _run_blocking(cache.get, key)
+    if value is None:
+        response = await transport.get(url=url, params=params, headers=headers)
+        value = decode_response(response)
+        if response.status_code == 200:
+            await _run_blocking(cache.set, key, value)
+    return value
+
+
+class AsyncBoundariesClient:
+
+    def __init__(self, api_key: str = None, transport: AsyncTransport = None, cache: ResponseCache = None):
+        self._api_key = get_api_key(api_key=api_key)
+        self._transport = AsyncTransport() if transport is None else transport
+        self._cache = cache
+        self._headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+
+    async def _get(self, api: str, params: Dict[str, Any]) -> dict:
+        return await _cached_get(transport=self._transport, url=get_api_url(api=api, api_key=self._api_key),
+                                 api=api, params=params, headers=self._headers, cache=self._cache)
+
+    async def part_of(self, place_id: str = None, longitude: float = None, latitude: float = None,
+                      boundary: str = 'administrative', geometry: str = 'point', language: str = None) -> dict:
+        """Coroutine version of BoundariesClient.part_of."""
+        params = _part_of_params(place_id=place_id, longitude=longitude, latitude=latitude, boundary=boundary,
+                                 geometry=geometry, language=language)
+
+        return await self._get(api=API_BOUNDARIES_PART_OF, params=params)
+
+    async def consists_of(self, place_id: str, boundary: str = 'administrative', sub_level: int = 1,
+                          geometry: str = 'point', language: str = None) -> dict:
+        """Coroutine version of BoundariesClient.consists_of."""
+        params = _consists_of_params(place_id=place_id, boundary=boundary, sub_level=sub_level, geometry=geometry,
+                                     language=language)
+
+        return await self._get(api=API_BOUNDARIES_CONSISTS_OF, params=params)
+
+
+class AsyncBatchClient(_BatchJobState):
+
+    def __init__(self, api_key: str, transport: AsyncTransport = None, poll_scheduler: PollScheduler = None,
+                 reverse_geocode_cache: SpatialCache = None, batch_sizer: BatchSizer = None,
+                 listeners: Iterable[Callable[[JobEvent], None]] = None):
+        super().__init__(poll_scheduler=poll_scheduler, batch_sizer=batch_sizer, listeners=listeners)
+        self._api_key = api_key
+        self._transport = AsyncTransport() if transport is None else transport
+        self._reverse_geocode_cache = reverse_geocode_cache
+        self._headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+
+    async def geocode(self, locations: Iterable[Union[str, Dict]], batch_len: Union[int, str] = 1000,
+                      parameters: Dict[str, str] = None, simplify_output: bool = False,
+                      journal: Union[str, Path] = None, deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
+        """Coroutine version of BatchClient.geocode."""
+        inputs = await _run_blocking(parse_geocoding_inputs, locations=locations)
+
+        results = await self._batch_archetype(
+            api=API_GEOCODE, inputs=inputs, params=parameters, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
+
+        if simplify_output:
+            input_format = 'json' if parameters.get('format') is None else parameters['format']
+            return await _run_blocking(simplify_batch_geocoding_results, results=results, input_format=input_format)
+        else:
+            return results
+
+    async def reverse_geocode(self, geocodes: Iterable[Union[Tuple[float, float], Dict[str, float]]],
+                              batch_len: Union[int, str] = 1000, parameters: Dict[str, str] = None,
+                              simplify_output: bool = False, journal: Union[str, Path] = None,
+                              deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
+        """Coroutine version of BatchClient.reverse_geocode."""
+        inputs = await _run_blocking(parse_geocodes, geocodes=geocodes)
+
+        if self._reverse_geocode_cache is None:
+            results = await self._batch_archetype(
+                api=API_REVERSE_GEOCODE, inputs=inputs, params=parameters, batch_len=batch_len, journal=journal,
+                deduplicate=deduplicate, max_workers=max_workers)
+        else:
+            lookup = await _run_blocking(_SpatialCacheLookup, cache=self._reverse_geocode_cache, inputs=inputs,
+                                         params=parameters)
+            missing_results = await self._batch_archetype(
+                api=API_REVERSE_GEOCODE, inputs=lookup.missing_inputs, params=parameters, batch_len=batch_len,
+                journal=journal, max_workers=max_workers) if len(lookup.missing_inputs) > 0 else []
+            results = await _run_blocking(lookup.merge, missing_results=missing_results)
+
+        if simplify_output:
+            return [res['result']['results'][0] for res in results]
+        else:
+            return results
+
+    async def places(self, individual_parameters: Iterable[dict], parameters: dict = None,
+                     batch_len: Union[int, str] = 1000, journal: Union[str, Path] = None,
+                     deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
+        """Coroutine version of BatchClient.places."""
+        inputs = _map_inputs(lambda params: {'params': params}, individual_parameters)
+
+        return await self._batch_archetype(
+            api=API_PLACES, inputs=inputs, params=parameters, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
+
+    async def place_details(self, place_ids: Iterable[str] = None,
+                            geocodes: Iterable[Union[Tuple[float, float], Dict[str, float]]] = None,
+                            batch_len: Union[int, str] = 1000, features: List[str] = None, language: str = None,
+                            journal: Union[str, Path] = None, deduplicate: bool = False,
+                            max_workers: int = 1) -> List[dict]:
+        """Coroutine version of BatchClient.place_details."""
+        if place_ids is not None:
+            inputs = _map_inputs(lambda val: {'params': {'id': val}}, place_ids)
+        elif geocodes is not None:
+            inputs = await _run_blocking(parse_geocodes, geocodes=geocodes)
+        else:
+            raise ValueError('Either place_ids or geocodes must be provided.')
+
+        params = dict()
+        if features is not None:
+            params['features'] = ','.join(features)
+        if language is not None:
+            params['lang'] = language
+
+        return await self._batch_archetype(
+            api=API_PLACE_DETAILS, inputs=inputs, params=params, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
+
+    async def isoline(self, geocodes: Iterable[Union[Tuple[float, float], Dict[str, float]]], travel_range: int,
+                      travel_mode: str = 'drive', isoline_type: str = 'time', batch_len: Union[int, str] = 1000,
+                      output_format: str = 'geojson', journal: Union[str, Path] = None,
+                      deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
+        """Coroutine version of BatchClient.isoline."""
+        inputs = await _run_blocking(parse_geocodes, geocodes=geocodes)
+        params = {
+            'type': isoline_type,
+            'mode': travel_mode,
+            'range': travel_range,
+            'format': output_format
+        }
+
+        return await self._batch_archetype(
+            api=API_ISOLINE, inputs=inputs, params=params, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
+
+    async def post_batch_jobs_and_get_job_urls(self, api: str, inputs: Iterable[Any], parameters: dict = None,
+                                               batch_len: Union[int, str] = None, max_workers: int = 1,
+                                               requests_per_second: float = 10.,
+                                               journal: JobJournal = None) -> List[str]:
+        """Coroutine version of BatchClient.post_batch_jobs_and_get_job_urls.
+
+        Up to `max_workers` POST requests are in flight at a time. Batches of iterable inputs are sliced off on the
+        executor.
+        """
+        batch_len = await _run_blocking(self._submission_batch_len, api=api, inputs=inputs,
+                                        batch_len=batch_len, journal=journal)
+        submitter = await _run_blocking(_JobSubmitter, state=self, api=api, parameters=parameters,
+                                        journal=journal)
+        limiter = None if requests_per_second is None else TokenBucket(rate=requests_per_second)
+        slots = asyncio.Semaphore(max(1, max_workers))
+
+        async def post(i: int, start: int, stop: int,
+                       batch: Union[List[Any], None]) -> Tuple[AsyncResponse, int, float]:
+            async with slots:
+                if limiter is not None:
+                    await limiter.acquire_async()
+                started = time.monotonic()
+                response, retries = await self._post_batch_job(
+                    api=api, inputs=inputs[start:stop] if batch is None else batch, params=submitter.params)
+            await _run_blocking(submitter.record, i=i, start=start, stop=stop, response=response)
+            return response, retries, time.monotonic() - started
+
+        async def collect(i: int, input_range: Tuple[int, int], task: asyncio.Future) -> None:
+            try:
+                response, retries, duration = await task
+            except requests.exceptions.RequestException as e:
+                submitter.fail(i=i, input_range=input_range, error=e)
+                return
+            submitter.process(i=i, input_range=input_range, response=response, duration=duration,
+                              payload_bytes=response.request_size, retries=retries)
+
+        # Batches of iterable inputs are sliced off on the fly, and at most 2 * max_workers of them are held in memory:
+        pending: Deque[Tuple[int, Tuple[int, int], asyncio.Future]] = deque()
+        number_of_posts = 0
+        started = time.monotonic()
+        i = 0
+        try:
+            async for start, stop, batch in _iterate_blocking(_iter_batches(inputs=inputs, batch_len=batch_len)):
+                if submitter.add(i):
+                    pending.append((i, (start, stop), asyncio.ensure_future(post(i, start, stop, batch))))
+                    number_of_posts += 1
+                    while len(pending) >= 2 * max(1, max_workers):
+                        await collect(*pending.popleft())
+                i += 1
+            while len(pending) > 0:
+                await collect(*pending.popleft())
+        finally:
+            for _, _, remaining in pending:
+                remaining.cancel()
+
+        return await _run_blocking(submitter.finish, number_of_posts=number_of_posts,
+                                   duration=time.monotonic() - started)
+
+    async def _post_batch_job(self, api: str, inputs: List[Any], params: dict) -> Tuple[AsyncResponse, int]:
+        data = {
+            'api': api,
+            'params': params,
+            'inputs': inputs
+        }
+        return await self._transport.request('POST', get_api_url(api=API_BATCH, api_key=self._api_key), json=data,
+                                             headers=self._headers, group=GROUP_BATCH_POST)
+
+    async def monitor_batch_jobs_and_get_results(self, sleep_time: int, result_urls: List[str], api: str = None,
+                                                 batch_len: int = None, journal: JobJournal = None) -> List[dict]:
+        """Coroutine version of BatchClient.monitor_batch_jobs_and_get_results."""
+        result_responses = []
+        async for results in self.iter_results(sleep_time=sleep_time, result_urls=result_urls, api=api,
+                                               batch_len=batch_len, journal=journal):
+            result_responses.extend(results)
+
+        return result_responses
+
+    async def iter_results(self, sleep_time: int, result_urls: List[str], completion_order: bool = False,
+                           batch_len: int = None, api: str = None, max_in_flight: int = None,
+                           journal: JobJournal = None) -> AsyncIterator[Union[List[dict], Tuple[int, List[dict]]]]:
+        """Asynchronous iterator version of BatchClient.iter_results.
+
+        `max_in_flight` defaults to the concurrency of the transport.
+        """
+        if completion_order and batch_len is None:
+            raise ValueError('Argument \'batch_len\' is required to compute offsets in completion order.')
+
+        if len(result_urls) == 0:
+            return
+        if max_in_flight is None:
+            max_in_flight = self._transport.max_concurrency
+        monitor = await _run_blocking(_JobMonitor, state=self, result_urls=result_urls,
+                                      sleep_time=sleep_time, completion_order=completion_order, batch_len=batch_len,
+                                      api=api, journal=journal)
+        # Results of completed jobs may be read from the journal:
+        async for results in _iterate_blocking(monitor.pop_ready()):
+            yield results
+
+        in_flight: Dict[asyncio.Future, int] = dict()
+        try:
+            while monitor.has_scheduled() or len(in_flight) > 0:
+                now = time.monotonic()
+                for i in monitor.pop_due(now=now, limit=max_in_flight - len(in_flight)):
+                    in_flight[asyncio.ensure_future(self._poll(url=result_urls[i]))] = i
+
+                timeout = monitor.timeout(now=now) if len(in_flight) < max_in_flight else None
+                if len(in_flight) == 0:
+                    await asyncio.sleep(timeout)
+                    continue
+                done, _ = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for future in done:
+                    i = in_flight.pop(future)
+                    try:
+                        poll = future.result()
+                    except Exception as e:
+                        monitor.fail(i=i, error=e)
+                        raise
+                    await _run_blocking(monitor.process, i=i, poll=poll)
+                async for results in _iterate_blocking(monitor.pop_ready()):
+                    yield results
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if self._batch_sizer is not None:
+                await _run_blocking(self._batch_sizer.save)
+
+    async def _poll(self, url: str) -> _PollResult:
+        """Coroutine version of BatchClient._poll.
+
+        The body is read by the event loop, and only decoded on the executor, so that no thread waits for the network.
+        """
+        started = time.monotonic()
+        response, retries = await self._transport.request('GET', url, headers=self._headers, group=GROUP_BATCH_POLL,
+                                                          stream=True)
+        chunks = []
+        error = None
+        try:
+            while True:
+                chunk = await response.read_chunk(_STREAM_CHUNK_SIZE)
+                if len(chunk) == 0:
+                    break
+                chunks.append(chunk)
+        except requests.exceptions.RequestException as e:
+            error = e  # Reported by _parse_poll_body like a connection lost while streaming synchronously
+        finally:
+            response.close()
+        content, payload_bytes = await _run_blocking(_parse_poll_body, chunks=_replay_chunks(chunks, error=error),
+                                                     status_code=response.status_code)
+        return _PollResult(content=content, retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                           status_code=response.status_code, duration=time.monotonic() - started,
+                           payload_bytes=payload_bytes, retries=retries)
+
+    @staticmethod
+    def get_sleep_time(number_of_items: int) -> int:
+        return BatchClient.get_sleep_time(number_of_items=number_of_items)
+
+    async def _batch_archetype(self, api: str, inputs: List[Any], params: dict, batch_len: Union[int, str],
+                               journal: Union[str, Path] = None, deduplicate: bool = False,
+                               max_workers: int = 1) -> List[dict]:
+        if deduplicate:
+            if not isinstance(inputs, collections.abc.Sequence):
+                inputs = await _run_blocking(list, inputs)  # Results carry the params of the original inputs
+            unique_inputs, positions = await _run_blocking(deduplicate_inputs, inputs=inputs)
+            try:
+                results = await self._batch_archetype(
+                    api=api, inputs=unique_inputs, params=params, batch_len=batch_len, journal=journal,
+                    max_workers=max_workers)
+            except BatchSubmissionError as e:
+                if e.results is not None:
+                    e.results = await _run_blocking(expand_deduplicated_results, results=e.results,
+                                                    positions=positions, inputs=inputs)
+                raise
+            return await _run_blocking(expand_deduplicated_results, results=results, positions=positions,
+                                       inputs=inputs)
+
+        if journal is not None:
+            if not isinstance(inputs, collections.abc.Sequence):
+                inputs = await _run_blocking(list, inputs)  # Fingerprinting must not consume the inputs
+            fingerprint = await _run_blocking(JobJournal.fingerprint, api=api, params=params, batch_len=batch_len,
+                                              inputs=inputs)
+            job_journal = await _run_blocking(JobJournal, file_path=journal, fingerprint=fingerprint)
+            try:
+                return await self._batch_archetype_with_journal(
+                    api=api, inputs=inputs, params=params, batch_len=batch_len, journal=job_journal,
+                    max_workers=max_workers)
+            finally:
+                await _run_blocking(job_journal.close)
+        return await self._batch_archetype_with_journal(api=api, inputs=inputs, params=params, batch_len=batch_len,
+                                                        max_workers=max_workers)
+
+    async def _batch_archetype_with_journal(self, api: str, inputs: List[Any], params: dict,
+                                            batch_len: Union[int, str], journal: JobJournal = None,
+                                            max_workers: int = 1) -> List[dict]:
+        batch_len = await _run_blocking(self._resolve_batch_len, api=api, inputs=inputs, batch_len=batch_len,
+                                        journal=journal)
+        try:
+            result_urls = await self.post_batch_jobs_and_get_job_urls(
+                api=api, inputs=inputs, parameters=params, batch_len=batch_len, max_workers=max_workers,
+                journal=journal)
+        except BatchSubmissionError as e:
+            # Jobs which were created are paid for - collect their results before reporting the failed batches:
+            created_urls = [url for url in e.result_urls if url is not None]
+            sleep_time = self.get_sleep_time(number_of_items=_number_of_items(
+                inputs=inputs, number_of_batches=len(e.result_urls), batch_len=batch_len))
+            job_results = [results async for results in self.iter_results(
+                sleep_time=sleep_time, result_urls=created_urls, api=api, batch_len=batch_len, journal=journal)]
+            e.results = await _run_blocking(_merge_partial_results, failure=e, job_results=job_results)
+            raise
+
+        sleep_time = self.get_sleep_time(number_of_items=_number_of_items(
+            inputs=inputs, number_of_batches=len(result_urls), batch_len=batch_len))
+        return await self.monitor_batch_jobs_and_get_results(
+            sleep_time=sleep_time, result_urls=result_urls, api=api, batch_len=batch_len, journal=journal)
+
+
+class AsyncClient:
+
+    def __init__(self, api_key: str, transport: AsyncTransport = None, cache: ResponseCache = None,
+                 reverse_geocode_cache: SpatialCache = None, batch_sizer: BatchSizer = None,
+                 listeners: Iterable[Callable[[JobEvent], None]] = None):
+        """Coroutine version of Client.
+
+        Arguments:
+            api_key: Geoapify API key.
+            transport: optional transport, shared with `batch` and `boundaries`. Defaults to an AsyncTransport with
+                at most 10 concurrent requests.
+            cache: optional cache of responses of GET requests, shared with `boundaries`. See geobatchpy.cache.
+            reverse_geocode_cache: optional cache of reverse geocoding results keyed on spatial cells, shared with
+                `batch`. See geobatchpy.cache.
+            batch_sizer: optional chooser of batch sizes for `batch_len='auto'` of `batch`, see geobatchpy.sizing.
+            listeners: optional callables receiving events of batch jobs of `batch`, see geobatchpy.events.
+        """
+        self._api_key = get_api_key(api_key=api_key)
+        self._transport = AsyncTransport() if transport is None else transport
+        self._cache = cache
+        self._reverse_geocode_cache = reverse_geocode_cache
+        self.batch = AsyncBatchClient(api_key=api_key, transport=self._transport,
+                                      reverse_geocode_cache=reverse_geocode_cache, batch_sizer=batch_sizer,
+                                      listeners=listeners)
+        self.boundaries = AsyncBoundariesClient(api_key=api_key, transport=self._transport, cache=cache)
+        self._headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+        self._logger = logging.getLogger(__name__)
+
+    async def _get(self, api: str, params: Dict[str, Any]) -> dict:
+        return await _cached_get(transport=self._transport, url=get_api_url(api=api, api_key=self._api_key),
+                                 api=api, params=params, headers=self._headers, cache=self._cache)
+
+    async def places(self, categories: Union[str, List[str]], filter_by_region: str = None,
+                     filter_by_name: str = None, proximity_by: Tuple[float, float] = None,
+                     conditions: Union[str, List[str]] = None, limit: int = 20, offset: int = None,
+                     language: str = None) -> dict:
+        """Coroutine version of Client.places."""
+        params = _places_params(categories=categories, filter_by_region=filter_by_region,
+                                filter_by_name=filter_by_name, proximity_by=proximity_by, conditions=conditions,
+                                limit=limit, offset=offset, language=language)
+
+        return await self._get(api=API_PLACES, params=params)
+
+    async def place_details(self, place_id: str = None, longitude: float = None, latitude: float = None,
+                            features: List[str] = None, language: str = None) -> dict:
+        """Coroutine version of Client.place_details."""
+        params = _place_details_params(place_id=place_id, longitude=longitude, latitude=latitude, features=features,
+                                       language=language)
+
+        return await self._get(api=API_PLACE_DETAILS, params=params)
+
+    async def geocode(self, text: str = None, parameters: Dict[str, str] = None) -> dict:
+        """Coroutine version of Client.geocode."""
+        params = _geocode_params(text=text, parameters=parameters)
+
+        return await self._get(api=API_GEOCODE, params=params)
+
+    async def reverse_geocode(self, longitude: float, latitude: float) -> dict:
+        """Coroutine version of Client.reverse_geocode."""
+        params = _reverse_geocode_params(longitude=longitude, latitude=latitude)
+
+        cache = self._reverse_geocode_cache
+        if cache is None:
+            return await self._get(api=API_REVERSE_GEOCODE, params=params)
+        value = await _run_blocking(cache.get, api=API_REVERSE_GEOCODE, params=params)
+        if value is None:
+            value = await self._get(api=API_REVERSE_GEOCODE, params=params)
+            if not is_error_response(value):
+                await _run_blocking(cache.set, api=API_REVERSE_GEOCODE, params=params, value=value)
+        return value
+
+    async def isoline(self, longitude: float, latitude: float, travel_range: int,
+                      travel_mode: str = 'drive', isoline_type: str = 'time', output_format: str = 'geojson') -> dict:
+        """Coroutine version of Client.isoline."""
+        params = _isoline_params(longitude=longitude, latitude=latitude, travel_range=travel_range,
+                                 travel_mode=travel_mode, isoline_type=isoline_type, output_format=output_format)
+
+        return await self._get(api=API_ISOLINE, params=params)
+
+    async def route_matrix(self, source_geocodes: List[Tuple[float, float]],
+                           target_geocodes: List[Tuple[float, float]] = None,
+                           travel_mode: str = 'drive', tile_size: int = None, max_workers: int = 10,
+                           assume_symmetric: bool = False, compact: bool = False) -> Union[dict, RouteMatrix]:
+        """Coroutine version of Client.route_matrix.
+
+        Every tile is requested by a task of its own, so tiles count against the concurrency limit of the transport
+        like all other requests. At most `max_workers` tiles are requested at a time.
+        """
+        symmetric = assume_symmetric and target_geocodes is None
+        if target_geocodes is None:
+            target_geocodes = source_geocodes
+        if tile_size is None or (len(source_geocodes) <= tile_size and len(target_geocodes) <= tile_size):
+            result = await self._route_matrix_tile(source_geocodes=source_geocodes, target_geocodes=target_geocodes,
+                                                   travel_mode=travel_mode)
+            return RouteMatrix.from_json(result) if compact else result
+        if tile_size < 1:
+            raise ValueError(f'Argument \'tile_size\' must be positive, got {tile_size}.')
+
+        source_offsets = range(0, len(source_geocodes), tile_size)
+        target_offsets = range(0, len(target_geocodes), tile_size)
+        tiles = [(i, j) for i in source_offsets for j in target_offsets if not symmetric or i <= j]
+        self._logger.info(f'Requesting route matrix in {len(tiles)} tiles.')
+        matrix = RouteMatrix(number_of_sources=len(source_geocodes), number_of_targets=len(target_geocodes)) \
+            if compact else None
+        results = dict()
+        slots = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch(i: int, j: int) -> Tuple[int, int, dict]:
+            async with slots:
+                return i, j, await self._route_matrix_tile(source_geocodes=source_geocodes[i:i + tile_size],
+                                                           target_geocodes=target_geocodes[j:j + tile_size],
+                                                           travel_mode=travel_mode)
+
+        tasks = [asyncio.ensure_future(fetch(i, j)) for i, j in tiles]
+        try:
+            for next_tile in asyncio.as_completed(tasks):
+                i, j, result = await next_tile
+                if 'sources_to_targets' not in result:
+                    raise ValueError(f'Route matrix tile with source offset {i} and target offset {j} failed: '
+                                     f'{result}')
+                if matrix is None:
+                    results[(i, j)] = result
+                    continue
+                matrix.set_tile(result=result, source_offset=i, target_offset=j)
+                if symmetric and i < j:
+                    matrix.set_tile(result=result, source_offset=j, target_offset=i, transpose=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if matrix is not None:
+            return matrix
+        return await _run_blocking(stitch_route_matrix_tiles, tiles=results, source_offsets=source_offsets,
+                                   target_offsets=target_offsets, symmetric=symmetric)
+
+    async def _route_matrix_tile(self, source_geocodes: List[Tuple[float, float]],
+                                 target_geocodes: List[Tuple[float, float]], travel_mode: str) -> dict:
+        request_url = get_api_url(api=API_ROUTE_MATRIX, api_key=self._api_key)
+        data = _route_matrix_body(source_geocodes=source_geocodes, target_geocodes=target_geocodes,
+                                  travel_mode=travel_mode)
+        response = await self._transport.post(url=request_url, json=data, headers=self._headers, idempotent=True)
+        # Tiles of large matrices are several MB of JSON:
+        return await _run_blocking(decode_response, response)
+
+    async def close(self) -> None:
+        await self._transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
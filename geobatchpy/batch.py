@@ -5,33 +5,136 @@ records and ask to process each component. Processing is component-wise independ
 instead requesting for each component separately. Geoapify is able to distribute processing on its servers. You can
 use GET requests to ask if a job is completed. If it is, you can GET the results for a complete batch.
 """
+import collections.abc
+import hashlib
+import heapq
+import json
 import logging
-import math
+import numbers
 import time
-from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
-from typing import List, Any, Dict, Tuple, Union
+from array import array
+from collections import deque
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Any, Callable, Deque, Dict, Iterable, Iterator, NamedTuple, Tuple, Union
 
 import requests
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from geobatchpy.cache import SpatialCache
+from geobatchpy.codec import decode_response, parse_json_stream
+from geobatchpy.events import JOB_COMPLETED, JOB_FAILED, JOB_POLLED, JOB_SUBMITTED, JobEvent, make_event
+from geobatchpy.journal import JobJournal
+from geobatchpy.polling import PollScheduler, parse_retry_after
+from geobatchpy.ratelimit import GROUP_BATCH_POLL, GROUP_BATCH_POST, TokenBucket
+from geobatchpy.sizing import BatchSizer, default_file_path
+from geobatchpy.transport import Transport
 from geobatchpy.utils import (
     API_BATCH, API_GEOCODE, API_PLACES, API_PLACE_DETAILS, API_REVERSE_GEOCODE, API_ISOLINE,
     get_api_url
 )
 
+_STREAM_CHUNK_SIZE = 2 ** 20  # Bytes read at a time from results of completed batch jobs
 
-class BatchClient:
 
-    def __init__(self, api_key: str):
+class BatchSubmissionError(ValueError):
+
+    def __init__(self, result_urls: List[Union[str, None]], failed_ranges: List[Tuple[int, int]]):
+        """Raised if some of the batch jobs could not be created.
+
+        Arguments:
+            result_urls: one element per batch, the job URL or None if the job could not be created.
+            failed_ranges: (start, stop) input ranges of the batches that failed.
+
+        The high-level batch methods monitor the jobs which were created before raising this error, and set `results`
+        to one element per submitted input: the result, or None if the batch of the input failed.
+        """
+        self.result_urls = result_urls
+        self.failed_ranges = failed_ranges
+        self.results: Union[List[Union[dict, None]], None] = None
+        ranges = ', '.join(f'{start}:{stop}' for start, stop in failed_ranges)
+        super().__init__(f'Failed to create {len(failed_ranges)} of {len(result_urls)} batch jobs - check input '
+                         f'ranges {ranges}.')
+
+
+class _BatchJobState:
+
+    def __init__(self, poll_scheduler: Union[PollScheduler, None], batch_sizer: Union[BatchSizer, None],
+                 listeners: Union[Iterable[Callable[[JobEvent], None]], None]):
+        """Base class of the synchronous and the asynchronous batch client.
+
+        Holds what the bookkeeping of batch jobs in _JobSubmitter and _JobMonitor needs: the poll schedule, the batch
+        sizer, and the listeners of job events.
+        """
+        self._poll_scheduler = PollScheduler() if poll_scheduler is None else poll_scheduler
+        self._batch_sizer = batch_sizer
+        self._listeners: List[Callable[[JobEvent], None]] = [] if listeners is None else list(listeners)
+        self._logger = logging.getLogger(__name__)
+
+    def add_listener(self, listener: Callable[[JobEvent], None]) -> None:
+        """Registers a callable receiving events of all batch jobs, see geobatchpy.events."""
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[JobEvent], None]) -> None:
+        self._listeners = [val for val in self._listeners if val != listener]
+
+    def _emit(self, event: JobEvent) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:  # A broken listener must not abort the batch processing
+                self._logger.warning(f'Listener {listener!r} failed on event {event.name} - {e!r}.')
+
+    def _resolve_batch_len(self, api: str, inputs: Iterable[Any], batch_len: Union[int, str, None],
+                           journal: JobJournal = None) -> Union[int, None]:
+        """Replaces batch_len='auto' by the size chosen by the BatchSizer, or by the size stored in the journal."""
+        if not isinstance(batch_len, str):
+            return batch_len
+        if batch_len != 'auto':
+            raise ValueError(f'Argument \'batch_len={batch_len}\' not supported - use an int or \'auto\'.')
+        stored = None if journal is None else journal.get_meta('batch_len')
+        if stored is not None:
+            return int(stored)  # Resumed runs must split inputs like the interrupted run
+        if not isinstance(inputs, collections.abc.Sized):
+            raise ValueError('Argument \'batch_len=auto\' requires inputs of known length, e.g., a list.')
+        if self._batch_sizer is None:
+            self._batch_sizer = BatchSizer(file_path=default_file_path())
+        batch_len = self._batch_sizer.choose(api=api, number_of_items=len(inputs))
+        if journal is not None:
+            journal.set_meta('batch_len', str(batch_len))
+        return batch_len
+
+    def _submission_batch_len(self, api: str, inputs: Iterable[Any], batch_len: Union[int, str, None],
+                              journal: JobJournal = None) -> int:
+        """Resolves batch_len='auto' and bounds the batch size by the limits of the API."""
+        batch_len = self._resolve_batch_len(api=api, inputs=inputs, batch_len=batch_len, journal=journal)
+        if batch_len is None:
+            return 1000
+        return max(min(batch_len, 1000), 2)  # limit of 1000 dictated by API
+
+
+class BatchClient(_BatchJobState):
+
+    def __init__(self, api_key: str, transport: Transport = None, poll_scheduler: PollScheduler = None,
+                 reverse_geocode_cache: SpatialCache = None, batch_sizer: BatchSizer = None,
+                 listeners: Iterable[Callable[[JobEvent], None]] = None):
+        super().__init__(poll_scheduler=poll_scheduler, batch_sizer=batch_sizer, listeners=listeners)
         self._api_key = api_key
-        self._lock = Lock()
-        self._number_completed_jobs = 0
-        self._total_number_jobs = 0
+        self._transport = Transport() if transport is None else transport
+        self._reverse_geocode_cache = reverse_geocode_cache
         self._headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
-        self._logger = logging.getLogger(__name__)
 
-    def geocode(self, locations: List[Union[str, Dict]], batch_len: int = 1000, parameters: Dict[str, str] = None,
-                simplify_output: bool = False) -> List[dict]:
+    def geocode(self, locations: Iterable[Union[str, Dict]], batch_len: Union[int, str] = 1000,
+                parameters: Dict[str, str] = None, simplify_output: bool = False, journal: Union[str, Path] = None,
+                deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
         """Returns batch geocoding results as a list of dictionaries.
 
         Note: this whole process may take long time (hours), depending on the size of the input, the number of
@@ -45,17 +148,24 @@ class BatchClient:
         to parse such objects for efficient analytics.
 
         Arguments:
-            locations: locations in a supported format as validated in parse_geocoding_inputs.
-            batch_len: split addresses into chunks of maximal size batch_len for parallel processing.
+            locations: list or iterable, e.g., a generator, of locations in a format supported by
+                parse_geocoding_inputs.
+            batch_len: split addresses into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
             parameters: optional parameters as key value pairs that apply to all locations. See the Geoapify docs.
             simplify_output: if True, returns output in simplified format, including only top match per address.
+            journal: optional path to a job journal file. Re-running with the same journal resumes an interrupted run.
+            deduplicate: if True, submit identical inputs only once and copy their results to all occurrences.
+            max_workers: maximal number of concurrent POST requests creating batch jobs.
 
         Returns:
             List of structured, geocoded, and enriched address records.
         """
         inputs = parse_geocoding_inputs(locations=locations)
 
-        results = self._batch_archetype(api=API_GEOCODE, inputs=inputs, params=parameters, batch_len=batch_len)
+        results = self._batch_archetype(
+            api=API_GEOCODE, inputs=inputs, params=parameters, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
 
         if simplify_output:
             input_format = 'json' if parameters.get('format') is None else parameters['format']
@@ -63,8 +173,10 @@ class BatchClient:
         else:
             return results
 
-    def reverse_geocode(self, geocodes: List[Union[Tuple[float, float], Dict[str, float]]], batch_len: int = 1000,
-                        parameters: Dict[str, str] = None, simplify_output: bool = False) -> List[dict]:
+    def reverse_geocode(self, geocodes: Iterable[Union[Tuple[float, float], Dict[str, float]]],
+                        batch_len: Union[int, str] = 1000, parameters: Dict[str, str] = None,
+                        simplify_output: bool = False, journal: Union[str, Path] = None,
+                        deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
         """Returns batch reverse geocoding results as a list of dictionaries.
 
         Note: this whole process may take long time (hours), depending on the size of the input, the number of
@@ -77,25 +189,44 @@ class BatchClient:
         See https://geojson.org/ for the GeoJSON specification and check the third party package geopandas to learn how
         to parse such objects for efficient analytics.
 
+        If the client has a reverse geocoding cache, only locations of spatial cells without a cached result are
+        submitted, one per cell, which implies deduplication.
+
         Arguments:
-            geocodes: list of input locations as geocodes with a format supported by self.parse_geocodes.
-            batch_len: split addresses into chunks of maximal size batch_len for parallel processing.
+            geocodes: list or iterable of input locations as geocodes with a format supported by parse_geocodes.
+            batch_len: split addresses into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
             parameters: optional parameters as dictionary. See the geoapify.com API documentation.
             simplify_output: if True, the output will be provided in a slightly simplified format.
+            journal: optional path to a job journal file. Re-running with the same journal resumes an interrupted run.
+            deduplicate: if True, submit identical inputs only once and copy their results to all occurrences.
+            max_workers: maximal number of concurrent POST requests creating batch jobs.
 
         Returns:
             List of structured, reverse geocoded, and enriched address records.
         """
         inputs = parse_geocodes(geocodes=geocodes)
 
-        results = self._batch_archetype(api=API_REVERSE_GEOCODE, inputs=inputs, params=parameters, batch_len=batch_len)
+        if self._reverse_geocode_cache is None:
+            results = self._batch_archetype(
+                api=API_REVERSE_GEOCODE, inputs=inputs, params=parameters, batch_len=batch_len, journal=journal,
+                deduplicate=deduplicate, max_workers=max_workers)
+        else:
+            lookup = _SpatialCacheLookup(cache=self._reverse_geocode_cache, inputs=inputs, params=parameters)
+            self._logger.info(f'Submitting {len(lookup.missing_inputs)} out of {len(lookup.results)} inputs not '
+                              f'cached.')
+            missing_results = self._batch_archetype(
+                api=API_REVERSE_GEOCODE, inputs=lookup.missing_inputs, params=parameters, batch_len=batch_len,
+                journal=journal, max_workers=max_workers) if len(lookup.missing_inputs) > 0 else []
+            results = lookup.merge(missing_results=missing_results)
 
         if simplify_output:
             return [res['result']['results'][0] for res in results]
         else:
             return results
 
-    def places(self, individual_parameters: List[dict], parameters: dict = None, batch_len: int = 1000) -> List[dict]:
+    def places(self, individual_parameters: Iterable[dict], parameters: dict = None, batch_len: Union[int, str] = 1000,
+               journal: Union[str, Path] = None, deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
         """Returns batch places results as a list of dictionaries.
 
         Every Places call is defined by a set of parameters. See the Geoapify API docs to get an overview. In the
@@ -104,20 +235,27 @@ class BatchClient:
         applies to all calls of the batch.
 
         Arguments:
-            individual_parameters: one dictionary per Places call.
+            individual_parameters: list or iterable of dictionaries, one per Places call.
             parameters: one dictionary with common parameters for all calls.
-            batch_len: split calls into chunks of maximal size batch_len for parallel processing.
+            batch_len: split calls into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
+            journal: optional path to a job journal file. Re-running with the same journal resumes an interrupted run.
+            deduplicate: if True, submit identical inputs only once and copy their results to all occurrences.
+            max_workers: maximal number of concurrent POST requests creating batch jobs.
 
         Returns:
             List of structured Places responses.
         """
-        inputs = [{'params': params} for params in individual_parameters]
+        inputs = _map_inputs(lambda params: {'params': params}, individual_parameters)
 
-        return self._batch_archetype(api=API_PLACES, inputs=inputs, params=parameters, batch_len=batch_len)
+        return self._batch_archetype(
+            api=API_PLACES, inputs=inputs, params=parameters, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
 
-    def place_details(self, place_ids: List[str] = None,
-                      geocodes: List[Union[Tuple[float, float], Dict[str, float]]] = None,
-                      batch_len: int = 1000, features: List[str] = None, language: str = None) -> List[dict]:
+    def place_details(self, place_ids: Iterable[str] = None,
+                      geocodes: Iterable[Union[Tuple[float, float], Dict[str, float]]] = None,
+                      batch_len: Union[int, str] = 1000, features: List[str] = None, language: str = None,
+                      journal: Union[str, Path] = None, deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
         """Returns batch place details results as a list of dictionaries.
 
         Note: this whole process may take long time (hours), depending on the size of the input, the number of
@@ -129,17 +267,21 @@ class BatchClient:
         See the Geoapify.com API docs for a list of available features.
 
         Arguments:
-            place_ids: list of place_id values.
-            geocodes: list of input locations as geocodes with a format supported by self.parse_geocodes.
-            batch_len: split addresses into chunks of maximal size batch_len for parallel processing.
+            place_ids: list or iterable of place_id values.
+            geocodes: list or iterable of input locations as geocodes with a format supported by parse_geocodes.
+            batch_len: split addresses into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
             features: list of types of details. Defaults to just ["details"] if not specified.
             language: 2-character iso language code.
+            journal: optional path to a job journal file. Re-running with the same journal resumes an interrupted run.
+            deduplicate: if True, submit identical inputs only once and copy their results to all occurrences.
+            max_workers: maximal number of concurrent POST requests creating batch jobs.
 
         Returns:
             List of structured, reverse geocoded, and enriched address records.
         """
         if place_ids is not None:
-            inputs = [{'params': {'id': val}} for val in place_ids]
+            inputs = _map_inputs(lambda val: {'params': {'id': val}}, place_ids)
         elif geocodes is not None:
             inputs = parse_geocodes(geocodes=geocodes)
         else:
@@ -151,20 +293,27 @@ class BatchClient:
         if language is not None:
             params['lang'] = language
 
-        return self._batch_archetype(api=API_PLACE_DETAILS, inputs=inputs, params=params, batch_len=batch_len)
+        return self._batch_archetype(
+            api=API_PLACE_DETAILS, inputs=inputs, params=params, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
 
-    def isoline(self, geocodes: List[Union[Tuple[float, float], Dict[str, float]]], travel_range: int,
-                travel_mode: str = 'drive', isoline_type: str = 'time', batch_len: int = 1000,
-                output_format: str = 'geojson') -> List[dict]:
+    def isoline(self, geocodes: Iterable[Union[Tuple[float, float], Dict[str, float]]], travel_range: int,
+                travel_mode: str = 'drive', isoline_type: str = 'time', batch_len: Union[int, str] = 1000,
+                output_format: str = 'geojson', journal: Union[str, Path] = None,
+                deduplicate: bool = False, max_workers: int = 1) -> List[dict]:
         """Returns batch isoline results as a list of dictionaries.
 
         Args:
-            geocodes: list of input locations as geocodes with a format supported by self.parse_geocodes.
+            geocodes: list or iterable of input locations as geocodes with a format supported by parse_geocodes.
             travel_range: either travel time in seconds or travel distance in meters, depending on `isoline_type`.
             travel_mode: one of the many supported 'mode's - see the Geoapify API docs.
             isoline_type: either 'time' or 'distance'.
-            batch_len: split addresses into chunks of maximal size batch_len for parallel processing.
+            batch_len: split addresses into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
             output_format: one of 'geojson', 'topojson', 'geobuf'.
+            journal: optional path to a job journal file. Re-running with the same journal resumes an interrupted run.
+            deduplicate: if True, submit identical inputs only once and copy their results to all occurrences.
+            max_workers: maximal number of concurrent POST requests creating batch jobs.
 
         Returns:
             List of structured isoline records.
@@ -177,10 +326,13 @@ class BatchClient:
             'format': output_format
         }
 
-        return self._batch_archetype(api=API_ISOLINE, inputs=inputs, params=params, batch_len=batch_len)
+        return self._batch_archetype(
+            api=API_ISOLINE, inputs=inputs, params=params, batch_len=batch_len, journal=journal,
+            deduplicate=deduplicate, max_workers=max_workers)
 
-    def post_batch_jobs_and_get_job_urls(self, api: str, inputs: List[Any],
-                                         parameters: dict = None, batch_len: int = None) -> List[str]:
+    def post_batch_jobs_and_get_job_urls(self, api: str, inputs: Iterable[Any], parameters: dict = None,
+                                         batch_len: Union[int, str] = None, max_workers: int = 1,
+                                         requests_per_second: float = 10., journal: JobJournal = None) -> List[str]:
         """Triggers batch process on server and returns URLs to be used in GET requests for obtaining results.
 
         The returned URLs represent a batch each. There is a limit in batch size of 1000 which usually means we need
@@ -188,6 +340,16 @@ class BatchClient:
         help to further limit the size of batches. Several smaller batches may be processed quicker than a few large
         ones.
 
+        With `max_workers > 1`, batches are POSTed concurrently, never exceeding `requests_per_second` in total. A
+        failing batch does not stop the submission of the others. Instead, a BatchSubmissionError is raised at the
+        end, listing the input ranges of all failed batches together with the URLs of all successful ones.
+
+        With a `journal`, every created job is recorded as soon as the server confirms it, and batches with a job
+        already recorded in the journal are not submitted again.
+
+        `inputs` can be any iterable, e.g., a generator reading a large file. Batches are sliced off on the fly while
+        jobs are created, so only a few batches are held in memory at any time.
+
         Available api values:
         - geocoding: '/v1/geocode/search'
         - reverse geocoding: '/v1/geocode/reverse'
@@ -195,96 +357,194 @@ class BatchClient:
 
         Arguments:
             api: name of the batch enabled API - see above.
-            inputs: list of locations to be processed by batch jobs.
+            inputs: list or iterable of locations to be processed by batch jobs.
             parameters: optional parameters - see the Geoapify API docs.
-            batch_len: split addresses into chunks of maximal size batch_len for parallel processing.
+            batch_len: split addresses into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
+            max_workers: maximal number of concurrent POST requests.
+            requests_per_second: ceiling of POST requests per second across all workers; None for no limit.
+            journal: optional journal of batch jobs, see geobatchpy.journal.JobJournal.
 
         Returns:
-            List of batch job URLs.
+            List of batch job URLs, in the order of the inputs.
         """
-        if batch_len is None:
-            batch_len = 1000
-        else:
-            batch_len = max(min(batch_len, 1000), 2)  # limit of 1000 dictated by API
-
-        batches = []
-        for i in range(math.ceil(len(inputs) / batch_len)):
-            batches.append(inputs[i * batch_len:(i + 1) * batch_len])
-
-        result_urls = []
-        for i, batch in enumerate(batches):
-            params = {'format': 'json'}
-            if parameters is not None:
-                params = {**params, **parameters}
-            data = {
-                'api': api,
-                'params': params,
-                'inputs': batch
-            }
+        batch_len = self._submission_batch_len(api=api, inputs=inputs, batch_len=batch_len, journal=journal)
+        submitter = _JobSubmitter(state=self, api=api, parameters=parameters, journal=journal)
+        limiter = None if requests_per_second is None else TokenBucket(rate=requests_per_second)
+
+        def post(i: int, start: int, stop: int,
+                 batch: Union[List[Any], None]) -> Tuple[requests.Response, int, float]:
+            if limiter is not None:
+                limiter.acquire()
+            started = time.monotonic()
+            response, retries = self._post_batch_job(api=api, inputs=inputs[start:stop] if batch is None else batch,
+                                                     params=submitter.params)
+            submitter.record(i=i, start=start, stop=stop, response=response)
+            return response, retries, time.monotonic() - started
+
+        def collect(i: int, input_range: Tuple[int, int], future: Future) -> None:
             try:
-                response = requests.post(
-                    get_api_url(api=API_BATCH, api_key=self._api_key), json=data, headers=self._headers)
+                response, retries, duration = future.result()
             except requests.exceptions.RequestException as e:
-                raise SystemExit(e)
-            if response.status_code == 401:
-                raise ValueError(response.content)
-            elif response.status_code not in (200, 202):
-                raise ValueError(f'Service responded with {response.content} - failed to create the job for batch {i}' +
-                                 f' - check input range {i * batch_len}:{min((i + 1) * batch_len, len(inputs))}.')
-            url = response.json()['url']
-            result_urls.append(url)
-            time.sleep(0.1)
-
-        return result_urls
-
-    def monitor_batch_jobs_and_get_results(self, sleep_time: int, result_urls: List[str]) -> List[dict]:
+                submitter.fail(i=i, input_range=input_range, error=e)
+                return
+            try:
+                submitter.process(i=i, input_range=input_range, response=response, duration=duration,
+                                  payload_bytes=_request_size(response), retries=retries)
+            except ValueError:
+                for _, _, remaining in pending:
+                    remaining.cancel()
+                raise
+
+        # Batches of iterable inputs are sliced off on the fly, and at most 2 * max_workers of them are held in memory:
+        pending: Deque[Tuple[int, Tuple[int, int], Future]] = deque()
+        number_of_posts = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max(1, max_workers)) as executor:
+            for i, (start, stop, batch) in enumerate(_iter_batches(inputs=inputs, batch_len=batch_len)):
+                if not submitter.add(i):
+                    continue
+                pending.append((i, (start, stop), executor.submit(post, i, start, stop, batch)))
+                number_of_posts += 1
+                while len(pending) >= 2 * max(1, max_workers):
+                    collect(*pending.popleft())
+            while len(pending) > 0:
+                collect(*pending.popleft())
+
+        return submitter.finish(number_of_posts=number_of_posts, duration=time.monotonic() - started)
+
+    def _post_batch_job(self, api: str, inputs: List[Any], params: dict) -> Tuple[requests.Response, int]:
+        data = {
+            'api': api,
+            'params': params,
+            'inputs': inputs
+        }
+        return self._transport.request('POST', get_api_url(api=API_BATCH, api_key=self._api_key), json=data,
+                                       headers=self._headers, group=GROUP_BATCH_POST)
+
+    def monitor_batch_jobs_and_get_results(self, sleep_time: int, result_urls: List[str], api: str = None,
+                                           batch_len: int = None, journal: JobJournal = None) -> List[dict]:
         """Monitors completion of each batch processing job and returns/stores results.
 
         Previous POST requests started batch processing jobs on geopify.com servers. Here we monitor the status and
         return/store results when all jobs succeeded.
 
         Arguments:
-            sleep_time: time in seconds to sleep between every request for a single job.
+            sleep_time: maximal time in seconds to sleep between two requests for a single job.
             result_urls: list of batch job URLs that are to be monitored.
+            api: optional name of the batch enabled API, used to learn typical job durations.
+            batch_len: optional size of the batches, used to learn typical job durations.
+            journal: optional journal, used to skip downloading results of completed jobs and to store new ones.
 
         Returns:
             Batch job results as a list - one element per location.
         """
-        self._total_number_jobs = len(result_urls)
-        sleep_time = max(sleep_time, 3)
-
-        with ThreadPoolExecutor(min(10, len(result_urls))) as executor:
-            results = executor.map(lambda x: self._task(url=x, sleep_time=sleep_time), result_urls)
-
         result_responses = []
-        for result in results:
-            result_responses += result
+        for results in self.iter_results(sleep_time=sleep_time, result_urls=result_urls, api=api,
+                                         batch_len=batch_len, journal=journal):
+            result_responses.extend(results)
 
         return result_responses
 
-    def _task(self, url: str, sleep_time: int) -> List[dict]:
-        job_id = url.split('&apiKey')[0]
-        while True:
-            response = requests.get(url, headers=self._headers).json()
+    def iter_results(self, sleep_time: int, result_urls: List[str], completion_order: bool = False,
+                     batch_len: int = None, api: str = None, max_in_flight: int = 10,
+                     journal: JobJournal = None) -> Iterator[Union[List[dict], Tuple[int, List[dict]]]]:
+        """Monitors completion of each batch processing job and yields results of every job as soon as possible.
+
+        Unlike monitor_batch_jobs_and_get_results, results are not collected in memory but handed over job by job.
+        By default, jobs are yielded in the order of `result_urls`, which means a completed job is held back until all
+        previous jobs are completed. With `completion_order=True`, jobs are yielded in the order they complete,
+        together with the offset of their first element in the original inputs.
+
+        All outstanding jobs are kept in a single schedule, ordered by the time of their next GET request. Pending
+        jobs are polled following the adaptive schedule of the client's PollScheduler: first when a job is expected
+        to be done, then with exponentially growing delays, never longer than `sleep_time`. Nothing blocks while
+        waiting for the next poll; only the GET requests themselves run on up to `max_in_flight` worker threads.
+        Choose `max_in_flight` no larger than the `pool_maxsize` of the client's transport.
+
+        With a `journal`, results of completed jobs are stored as soon as they arrive, and jobs with results already
+        stored in the journal are not polled again.
+
+        A job which fails for good, e.g., because the API key is not accepted or the job expired, raises a ValueError.
+
+        Arguments:
+            sleep_time: maximal time in seconds to sleep between two requests for a single job.
+            result_urls: list of batch job URLs that are to be monitored.
+            completion_order: if True, yield (offset, results) tuples in order of completion.
+            batch_len: size of all but the last batch as used when posting the jobs. Required to compute the offsets
+                if `completion_order=True`.
+            api: optional name of the batch enabled API, used to learn typical job durations.
+            max_in_flight: maximal number of concurrent GET requests.
+            journal: optional journal of batch jobs, see geobatchpy.journal.JobJournal.
+
+        Returns:
+            Iterator over job results - one list of results per job, or (offset, results) tuples if
+            `completion_order=True`.
+        """
+        if completion_order and batch_len is None:
+            raise ValueError('Argument \'batch_len\' is required to compute offsets in completion order.')
+
+        if len(result_urls) == 0:
+            return
+        max_in_flight = max(1, min(max_in_flight, len(result_urls)))
+        monitor = _JobMonitor(state=self, result_urls=result_urls, sleep_time=sleep_time,
+                              completion_order=completion_order, batch_len=batch_len, api=api, journal=journal)
+        yield from monitor.pop_ready()
+
+        in_flight: Dict[Future, int] = dict()
+        with ThreadPoolExecutor(max_in_flight) as executor:
             try:
-                _ = response['results']
-                with self._lock:
-                    self._number_completed_jobs += 1
-                    self._logger.info(
-                        f'Job {job_id} done - {self._number_completed_jobs}/{self._total_number_jobs} completed.')
-                break
-            except KeyError:
-                if response['status'] == 'pending':
-                    self._logger.info(f'Job {job_id} still pending - waiting another {sleep_time} seconds.')
-                else:
-                    self._logger.warning(
-                        f'Unexpected response from server: {response} - waiting another {sleep_time} seconds.')
-                time.sleep(sleep_time)
-        return response['results']
+                while monitor.has_scheduled() or len(in_flight) > 0:
+                    now = time.monotonic()
+                    for i in monitor.pop_due(now=now, limit=max_in_flight - len(in_flight)):
+                        in_flight[executor.submit(self._poll, url=result_urls[i])] = i
+
+                    timeout = monitor.timeout(now=now) if len(in_flight) < max_in_flight else None
+                    if len(in_flight) == 0:
+                        time.sleep(timeout)
+                        continue
+                    done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        i = in_flight.pop(future)
+                        try:
+                            poll = future.result()
+                        except Exception as e:
+                            monitor.fail(i=i, error=e)
+                            raise
+                        monitor.process(i=i, poll=poll)
+                    yield from monitor.pop_ready()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                if self._batch_sizer is not None:
+                    self._batch_sizer.save()
+
+    def _poll(self, url: str) -> '_PollResult':
+        """Sends a single GET request for a batch job.
+
+        The body is streamed and results are decoded one at a time as they arrive, see
+        geobatchpy.codec.parse_json_stream.
+
+        Returns:
+            The decoded response, the delay requested by the server via the `Retry-After` header, if any, and
+            statistics of the request.
+        """
+        started = time.monotonic()
+        response, retries = self._transport.request('GET', url, headers=self._headers, group=GROUP_BATCH_POLL,
+                                                    stream=True)
+        try:
+            content, payload_bytes = _parse_poll_body(
+                chunks=response.iter_content(chunk_size=_STREAM_CHUNK_SIZE), status_code=response.status_code)
+        finally:
+            response.close()
+        return _PollResult(content=content, retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                           status_code=response.status_code, duration=time.monotonic() - started,
+                           payload_bytes=payload_bytes, retries=retries)
 
     @staticmethod
     def get_sleep_time(number_of_items: int) -> int:
-        """Choose an appropriate sleep time between GET requests for a batch job.
+        """Choose an appropriate upper bound of the sleep time between GET requests for a batch job.
 
         Arguments:
             number_of_items: original number of items/addresses/locations/etc.
@@ -294,38 +554,472 @@ class BatchClient:
         """
         return min(300, max(3, int(number_of_items ** 0.4)))
 
-    def _batch_archetype(self, api: str, inputs: List[Any], params: dict, batch_len: int) -> List[dict]:
+    def _batch_archetype(self, api: str, inputs: List[Any], params: dict, batch_len: Union[int, str],
+                         journal: Union[str, Path] = None, deduplicate: bool = False,
+                         max_workers: int = 1) -> List[dict]:
         """
 
         Args:
             api: one of the supported endpoints - see the Geoapify API docs.
             inputs: list of inputs, each element encoding a location.
             params: dictionary of attributes common across all inputs.
-            batch_len: split addresses into chunks of maximal size batch_len for parallel processing.
+            batch_len: split addresses into chunks of maximal size batch_len for parallel processing, or 'auto' to
+                choose the size with the shortest expected run time, see geobatchpy.sizing.
+            journal: optional path to a job journal file.
+            deduplicate: if True, submit identical inputs only once and copy their results to all occurrences.
+            max_workers: maximal number of concurrent POST requests creating batch jobs.
 
         Returns:
 
         """
-        result_urls = self.post_batch_jobs_and_get_job_urls(
-            api=api, inputs=inputs, parameters=params, batch_len=batch_len)
+        if deduplicate:
+            if not isinstance(inputs, collections.abc.Sequence):
+                inputs = list(inputs)  # Results carry the params of the original inputs
+            unique_inputs, positions = deduplicate_inputs(inputs=inputs)
+            self._logger.info(f'Submitting {len(unique_inputs)} unique out of {len(positions)} inputs.')
+            try:
+                results = self._batch_archetype(
+                    api=api, inputs=unique_inputs, params=params, batch_len=batch_len, journal=journal,
+                    max_workers=max_workers)
+            except BatchSubmissionError as e:
+                if e.results is not None:
+                    e.results = expand_deduplicated_results(results=e.results, positions=positions, inputs=inputs)
+                raise
+            return expand_deduplicated_results(results=results, positions=positions, inputs=inputs)
+
+        if journal is not None:
+            if not isinstance(inputs, collections.abc.Sequence):
+                inputs = list(inputs)  # Fingerprinting must not consume the inputs
+            fingerprint = JobJournal.fingerprint(api=api, params=params, batch_len=batch_len, inputs=inputs)
+            with JobJournal(file_path=journal, fingerprint=fingerprint) as job_journal:
+                return self._batch_archetype_with_journal(
+                    api=api, inputs=inputs, params=params, batch_len=batch_len, journal=job_journal,
+                    max_workers=max_workers)
+        return self._batch_archetype_with_journal(api=api, inputs=inputs, params=params, batch_len=batch_len,
+                                                  max_workers=max_workers)
+
+    def _batch_archetype_with_journal(self, api: str, inputs: List[Any], params: dict, batch_len: Union[int, str],
+                                      journal: JobJournal = None, max_workers: int = 1) -> List[dict]:
+        batch_len = self._resolve_batch_len(api=api, inputs=inputs, batch_len=batch_len, journal=journal)
+        try:
+            result_urls = self.post_batch_jobs_and_get_job_urls(
+                api=api, inputs=inputs, parameters=params, batch_len=batch_len, max_workers=max_workers,
+                journal=journal)
+        except BatchSubmissionError as e:
+            # Jobs which were created are paid for - collect their results before reporting the failed batches:
+            created_urls = [url for url in e.result_urls if url is not None]
+            sleep_time = self.get_sleep_time(number_of_items=_number_of_items(
+                inputs=inputs, number_of_batches=len(e.result_urls), batch_len=batch_len))
+            job_results = self.iter_results(sleep_time=sleep_time, result_urls=created_urls, api=api,
+                                            batch_len=batch_len, journal=journal)
+            e.results = _merge_partial_results(failure=e, job_results=job_results)
+            raise
+
+        sleep_time = self.get_sleep_time(number_of_items=_number_of_items(
+            inputs=inputs, number_of_batches=len(result_urls), batch_len=batch_len))
+        return self.monitor_batch_jobs_and_get_results(
+            sleep_time=sleep_time, result_urls=result_urls, api=api, batch_len=batch_len, journal=journal)
+
+
+class _SpatialCacheLookup:
+
+    def __init__(self, cache: SpatialCache, inputs: Iterable[dict], params: Union[dict, None]):
+        """Looks up reverse geocoding inputs in a spatial cache, shared by the synchronous and the asynchronous client.
+
+        `missing_inputs` holds one input per spatial cell without a cached result. Submit those and hand their results
+        over to `merge`.
+        """
+        self._cache = cache
+        self._inputs = inputs if isinstance(inputs, collections.abc.Sequence) else list(inputs)
+        self._params = dict() if params is None else params
+        self.results: List[Union[dict, None]] = []
+        self.missing_inputs: List[dict] = []
+        self._missing_keys: List[str] = []
+        self._missing_positions: List[List[int]] = []
+        missing: Dict[str, int] = dict()
+        for k, val in enumerate(self._inputs):
+            key = cache.make_key(api=API_BATCH + API_REVERSE_GEOCODE, params={**self._params, **val['params']})
+            m = missing.get(key)
+            if m is not None:
+                self._missing_positions[m].append(k)
+                self.results.append(None)
+                continue
+            cached = cache.cache.get(key)
+            if cached is None:
+                missing[key] = len(self.missing_inputs)
+                self.missing_inputs.append(val)
+                self._missing_keys.append(key)
+                self._missing_positions.append([k])
+                self.results.append(None)
+            else:
+                self.results.append({'params': val['params'], 'result': cached})
+
+    def merge(self, missing_results: List[dict]) -> List[dict]:
+        """Caches the results of the missing inputs and returns the results of all inputs."""
+        for key, positions, res in zip(self._missing_keys, self._missing_positions, missing_results):
+            if res.get('result') is not None:
+                self._cache.cache.set(key, res['result'])
+            for k in positions:
+                self.results[k] = {**res, 'params': self._inputs[k]['params']}
+        return self.results
+
+
+class _JobSubmitter:
+
+    def __init__(self, state: _BatchJobState, api: str, parameters: Union[dict, None],
+                 journal: Union[JobJournal, None]):
+        """Bookkeeping of batch job submission, shared by the synchronous and the asynchronous client.
+
+        The caller registers every batch with `add`, POSTs the batches not yet submitted, hands the responses over to
+        `record` and `process`, and gets the job URLs from `finish`.
+        """
+        self._state = state
+        self._api = api
+        self._journal = journal
+        self.params = {'format': 'json'} if parameters is None else {'format': 'json', **parameters}
+        self._submitted_urls = dict() if journal is None else journal.submitted_urls()
+        self._result_urls: List[Union[str, None]] = []
+        self._failed_ranges: List[Tuple[int, int]] = []
+
+    def add(self, i: int) -> bool:
+        """Registers the next batch and tells if it still needs to be submitted."""
+        self._result_urls.append(self._submitted_urls.get(i))
+        return i not in self._submitted_urls
+
+    def record(self, i: int, start: int, stop: int, response: requests.Response) -> None:
+        """Records a created job in the journal, if any."""
+        if self._journal is not None and response.status_code in (200, 202):
+            self._journal.record_submission(job=i, start=start, stop=stop, url=decode_response(response)['url'])
+
+    def process(self, i: int, input_range: Tuple[int, int], response: requests.Response, duration: float,
+                payload_bytes: Union[int, None], retries: int) -> None:
+        """Stores the URL of a created job or the input range of a failed batch.
+
+        Raises:
+            ValueError: if the API key is not accepted.
+        """
+        state = self._state
+        event = dict(api=self._api, duration=duration, status_code=response.status_code,
+                     payload_bytes=payload_bytes, number_of_items=input_range[1] - input_range[0], retries=retries)
+        if response.status_code == 401:
+            state._emit(make_event(JOB_FAILED, job=i, error='unauthorized', **event))
+            raise ValueError(response.content)
+        elif response.status_code not in (200, 202):
+            state._logger.error(f'Service responded with {response.content} - failed to create the job for '
+                                f'batch {i} - check input range {input_range[0]}:{input_range[1]}.')
+            self._failed_ranges.append(input_range)
+            state._emit(make_event(JOB_FAILED, job=i, error=f'status {response.status_code}', **event))
+            return
+        self._result_urls[i] = decode_response(response)['url']
+        state._emit(make_event(JOB_SUBMITTED, job=i, url=self._result_urls[i].split('&apiKey')[0], **event))
+
+    def fail(self, i: int, input_range: Tuple[int, int], error: Exception) -> None:
+        """Stores the input range of a batch whose request failed for good."""
+        self._state._logger.error(f'Failed to create the job for batch {i} - {error}.')
+        self._failed_ranges.append(input_range)
+        self._state._emit(make_event(JOB_FAILED, job=i, api=self._api,
+                                     number_of_items=input_range[1] - input_range[0], error=repr(error)))
+
+    def finish(self, number_of_posts: int, duration: float) -> List[str]:
+        """Returns the job URLs in the order of the inputs.
+
+        Raises:
+            BatchSubmissionError: if some of the jobs could not be created.
+        """
+        batch_sizer = self._state._batch_sizer
+        if batch_sizer is not None and number_of_posts > 0:
+            batch_sizer.record_submission(api=self._api, duration=duration / number_of_posts)
+            batch_sizer.save()
+        if len(self._failed_ranges) > 0:
+            raise BatchSubmissionError(result_urls=self._result_urls, failed_ranges=self._failed_ranges)
+        return self._result_urls
 
-        sleep_time = self.get_sleep_time(number_of_items=len(inputs))
-        return self.monitor_batch_jobs_and_get_results(sleep_time=sleep_time, result_urls=result_urls)
 
+class _PollResult(NamedTuple):
+    content: dict
+    retry_after: Union[float, None]
+    status_code: int
+    duration: float
+    payload_bytes: int
+    retries: int
 
-def parse_geocoding_inputs(locations: List[Union[str, dict]]) -> List[dict]:
+
+class _JobMonitor:
+
+    def __init__(self, state: _BatchJobState, result_urls: List[str], sleep_time: int, completion_order: bool,
+                 batch_len: Union[int, None], api: Union[str, None], journal: Union[JobJournal, None]):
+        """Bookkeeping of outstanding batch jobs, shared by the synchronous and the asynchronous monitor.
+
+        All jobs without results are kept in a single heap, ordered by the time of their next GET request. The caller
+        sends the requests of due jobs, hands the responses over to `process`, and takes results from `pop_ready`.
+        """
+        self._state = state
+        self._api = api
+        self._result_urls = result_urls
+        self._sleep_time = sleep_time
+        self._completion_order = completion_order
+        self._batch_len = batch_len
+        self._journal = journal
+        self._key = state._poll_scheduler.key(api=api, batch_len=batch_len)
+        self._started = time.monotonic()
+
+        journaled = set() if journal is None else set(journal.completed_urls())
+        self._journaled = deque(i for i, url in enumerate(result_urls) if url in journaled)  # loaded lazily
+        # Jobs are polled first when they are expected to be done, but no later than after `sleep_time`:
+        expected = state._poll_scheduler.expected_duration(key=self._key)
+        first_poll = self._started if expected is None else self._started + min(expected, sleep_time)
+        self._schedule = [(first_poll, i) for i, url in enumerate(result_urls) if url not in journaled]
+        self._attempts = [0] * len(result_urls)
+        self._completed: Dict[int, List[dict]] = dict()
+        self._ready: Deque[Tuple[int, List[dict]]] = deque()
+        self._next_index = 0
+        self._number_completed = len(self._journaled)
+        if not completion_order:
+            self._completed.update((i, None) for i in self._journaled)
+            self._journaled.clear()
+
+    def has_scheduled(self) -> bool:
+        return len(self._schedule) > 0
+
+    def pop_due(self, now: float, limit: int) -> List[int]:
+        """Removes and returns up to `limit` indices of jobs which are due for a GET request."""
+        due = []
+        while len(self._schedule) > 0 and self._schedule[0][0] <= now and len(due) < limit:
+            due.append(heapq.heappop(self._schedule)[1])
+        return due
+
+    def timeout(self, now: float) -> Union[float, None]:
+        """Returns the time in seconds until the next job is due or None if no job is scheduled."""
+        return max(0., self._schedule[0][0] - now) if len(self._schedule) > 0 else None
+
+    def process(self, i: int, poll: _PollResult) -> None:
+        """Reschedules a pending job or stores the results of a completed job."""
+        state = self._state
+        content = poll.content
+        job_id = self._result_urls[i].split('&apiKey')[0]
+        elapsed = time.monotonic() - self._started
+        state._emit(make_event(JOB_POLLED, job=i, api=self._api, url=job_id, duration=poll.duration,
+                               status_code=poll.status_code, payload_bytes=poll.payload_bytes,
+                               attempt=self._attempts[i] + 1, retries=poll.retries))
+        error = _poll_error(status_code=poll.status_code, content=content)
+        if error is not None:
+            state._emit(make_event(JOB_FAILED, job=i, api=self._api, url=job_id, status_code=poll.status_code,
+                                   attempt=self._attempts[i] + 1, retries=poll.retries, error=error))
+            raise ValueError(f'Job {job_id} failed with {error} - {content}.')
+        if 'results' not in content:
+            delay = state._poll_scheduler.next_delay(
+                key=self._key, attempt=self._attempts[i], elapsed=elapsed, retry_after=poll.retry_after,
+                max_delay=self._sleep_time)
+            if content.get('status') == 'pending':
+                state._logger.info(f'Job {job_id} still pending - waiting another {delay:.1f} seconds.')
+            else:
+                state._logger.warning(
+                    f'Unexpected response from server: {content} - waiting another {delay:.1f} seconds.')
+            self._attempts[i] += 1
+            heapq.heappush(self._schedule, (time.monotonic() + delay, i))
+            return
+
+        state._poll_scheduler.record_completion(key=self._key, duration=elapsed)
+        if state._batch_sizer is not None and self._api is not None and self._batch_len is not None:
+            state._batch_sizer.record_turnaround(api=self._api, batch_len=self._batch_len, duration=elapsed)
+        if self._journal is not None:
+            self._journal.record_results(url=self._result_urls[i], results=content['results'])
+        self._number_completed += 1
+        state._logger.info(f'Job {job_id} done - {self._number_completed}/{len(self._result_urls)} completed.')
+        state._emit(make_event(JOB_COMPLETED, job=i, api=self._api, url=job_id, duration=elapsed,
+                               status_code=poll.status_code, payload_bytes=poll.payload_bytes,
+                               number_of_items=len(content['results']), attempt=self._attempts[i] + 1))
+        if self._completion_order:
+            self._ready.append((i * self._batch_len, content['results']))
+        else:
+            self._completed[i] = content['results']
+
+    def fail(self, i: int, error: Exception) -> None:
+        """Reports a GET request for a job which failed for good."""
+        self._state._emit(make_event(JOB_FAILED, job=i, api=self._api, url=self._result_urls[i].split('&apiKey')[0],
+                                     attempt=self._attempts[i] + 1, error=repr(error)))
+
+    def pop_ready(self) -> Iterator[Union[List[dict], Tuple[int, List[dict]]]]:
+        """Yields results which are ready to be handed over, loading results stored in the journal lazily."""
+        if self._completion_order:
+            while len(self._journaled) > 0:
+                i = self._journaled.popleft()
+                yield i * self._batch_len, self._journal.get_results(url=self._result_urls[i])
+            while len(self._ready) > 0:
+                yield self._ready.popleft()
+            return
+        while self._next_index in self._completed:
+            results = self._completed.pop(self._next_index)
+            if results is None:
+                results = self._journal.get_results(url=self._result_urls[self._next_index])
+            self._next_index += 1
+            yield results
+
+
+def _poll_error(status_code: int, content: dict) -> Union[str, None]:
+    """Returns why a GET request for a batch job failed for good, or None if the job is to be polled again.
+
+    Client errors, e.g., 401 if the API key is not accepted or 404 if the job expired, are final, and so are error
+    responses with a `statusCode` in the body. Only rate limited requests (429) and server errors (5xx) are retried.
+    """
+    if status_code == 429 or status_code >= 500:
+        return None
+    if status_code >= 400:
+        return f'status {status_code}'
+    body_status = content.get('statusCode')
+    if isinstance(body_status, int) and body_status >= 400:
+        return f'status {body_status}'
+    return None
+
+
+def _parse_poll_body(chunks: Iterable[bytes], status_code: int) -> Tuple[dict, int]:
+    """Decodes the streamed body of a GET request for a batch job and counts its size in bytes.
+
+    Bodies which are cut off, and bodies which are not valid JSON, e.g., an HTML error page, of responses with status
+    429 or 5xx are reported as a status, so that the job is polled again later.
+
+    Raises:
+        ValueError: if the body of a response with any other status is not valid JSON.
+    """
+    payload_bytes = 0
+
+    def counted() -> Iterator[bytes]:
+        nonlocal payload_bytes
+        for chunk in chunks:
+            payload_bytes += len(chunk)
+            yield chunk
+
+    try:
+        content = parse_json_stream(counted())
+    except ValueError as e:
+        if status_code != 429 and status_code < 500:
+            raise ValueError(f'Invalid JSON response with status {status_code}.') from e
+        content = {'status': f'invalid JSON response with status {status_code}'}
+    except requests.exceptions.RequestException as e:
+        content = {'status': f'incomplete response with status {status_code} - {e}'}
+    return content, payload_bytes
+
+
+def _iter_batches(inputs: Iterable[Any], batch_len: int) -> Iterator[Tuple[int, int, Union[List[Any], None]]]:
+    """Yields (start, stop, batch) per batch. The batch is None for sequences, which are sliced only when needed."""
+    if isinstance(inputs, collections.abc.Sequence):
+        for start in range(0, len(inputs), batch_len):
+            yield start, min(start + batch_len, len(inputs)), None
+        return
+    iterator = iter(inputs)
+    start = 0
+    while True:
+        batch = list(islice(iterator, batch_len))
+        if len(batch) == 0:
+            return
+        yield start, start + len(batch), batch
+        start += len(batch)
+
+
+def _number_of_items(inputs: Iterable[Any], number_of_batches: int, batch_len: Union[int, None]) -> int:
+    """Number of inputs, estimated from the number of batches if inputs are consumed by submission."""
+    if isinstance(inputs, collections.abc.Sized):
+        return len(inputs)
+    return number_of_batches * (1000 if batch_len is None else max(min(batch_len, 1000), 2))
+
+
+def _merge_partial_results(failure: BatchSubmissionError,
+                           job_results: Iterable[List[dict]]) -> List[Union[dict, None]]:
+    """Returns one element per submitted input, the result of the created job or None if the batch failed.
+
+    `job_results` yields the results of the created jobs in the order of the inputs.
+    """
+    failed_ranges = iter(sorted(failure.failed_ranges))
+    job_results = iter(job_results)
+    results = []
+    for url in failure.result_urls:
+        if url is None:
+            start, stop = next(failed_ranges)
+            results.extend([None] * (stop - start))
+        else:
+            results.extend(next(job_results))
+    return results
+
+
+def _request_size(response: requests.Response) -> Union[int, None]:
+    """Returns the size in bytes of the body sent with the request of a response, None if not known."""
+    body = getattr(getattr(response, 'request', None), 'body', None)
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    return len(body) if isinstance(body, (bytes, bytearray)) else None
+
+
+def _map_inputs(func: Callable[[Any], dict], values: Iterable[Any]) -> Iterable[dict]:
+    """Applies `func` to all values, lazily unless values are a sequence."""
+    if isinstance(values, collections.abc.Sequence):
+        return [func(val) for val in values]
+    return map(func, values)
+
+
+def deduplicate_inputs(inputs: List[dict]) -> Tuple[List[dict], List[int]]:
+    """Removes duplicates from batch inputs.
+
+    Two inputs are considered identical if their `params` are equal after normalization: the order of attributes is
+    ignored, values are compared as strings, and leading and trailing whitespace is ignored.
+
+    Arguments:
+        inputs: parsed inputs, each a dictionary with a `params` attribute.
+
+    Returns:
+        The unique inputs in order of first occurrence, and for every original input the position of its unique
+        counterpart.
+    """
+    unique_inputs = []
+    positions = []
+    seen: Dict[bytes, int] = dict()
+    for val in inputs:
+        normalized = {key: str(item).strip() for key, item in val['params'].items()}
+        digest = hashlib.blake2b(json.dumps(normalized, sort_keys=True).encode(), digest_size=16).digest()
+        position = seen.get(digest)
+        if position is None:
+            position = len(unique_inputs)
+            seen[digest] = position
+            unique_inputs.append(val)
+        positions.append(position)
+    return unique_inputs, positions
+
+
+def expand_deduplicated_results(results: List[Union[dict, None]], positions: List[int],
+                                inputs: Iterable[dict]) -> List[Union[dict, None]]:
+    """Maps the results of deduplicated inputs back to the original inputs.
+
+    Every original input gets its own copy of the result of its unique counterpart, with the `params` it was submitted
+    with. Missing results, i.e., None, stay None.
+
+    Arguments:
+        results: results of the unique inputs as returned by deduplicate_inputs.
+        positions: for every original input the position of its unique counterpart.
+        inputs: the original inputs.
+
+    Returns:
+        One result per original input.
+    """
+    return [None if results[k] is None else {**results[k], 'params': val['params']}
+            for k, val in zip(positions, inputs)]
+
+
+def parse_geocoding_inputs(locations: Iterable[Union[str, dict]]) -> Iterable[dict]:
     """Validate and parse the input for the batch geocoding API.
 
     Supported formats:
     - List of free text search strings.
     - List of dictionaries with structured location definition. See the Geoapify API docs for forward geocoding.
 
+    Iterables other than sequences, like generators, are parsed lazily, element by element.
+
     Arguments:
         locations: original input.
 
     Returns:
         Parsed locations.
     """
+    if not isinstance(locations, collections.abc.Sequence):
+        return _map_inputs(_parse_geocoding_input, locations)
     if all(isinstance(val, str) for val in locations):
         # Then this is a list of free text search strings:
         return [{'params': {'text': val}} for val in locations]
@@ -336,12 +1030,28 @@ def parse_geocoding_inputs(locations: List[Union[str, dict]]) -> List[dict]:
         raise ValueError('Format of \'locations\' not supported.')
 
 
-def parse_geocodes(geocodes: List[Union[Tuple[float, float], Dict[str, float]]]) -> List[dict]:
+def _parse_geocoding_input(val: Union[str, dict]) -> dict:
+    if isinstance(val, str):
+        return {'params': {'text': val}}
+    elif isinstance(val, dict):
+        return {'params': val}
+    raise ValueError(f'Format of location {val!r} not supported.')
+
+
+def parse_geocodes(geocodes: Union[Iterable[Union[Tuple[float, float], Dict[str, float]]], 'np.ndarray',
+                                   'pd.DataFrame']) -> Iterable[dict]:
     """Validate and parse lists of geocoordinates.
 
     Supported formats:
-    - List of (longitude, latitude) tuples as floats.
+    - List of (longitude, latitude) tuples of real numbers, e.g., floats, integers, or NumPy floats.
     - List of dictionaries, with each containing attributes 'lon' and 'lat'.
+    - NumPy array of shape (N, 2) with longitudes in the first and latitudes in the second column.
+    - pandas DataFrame with columns 'lon' and 'lat'.
+
+    Coordinates of all but the dictionary format are validated to be finite and within [-180, 180] and [-90, 90],
+    respectively. Lists and other sequences are parsed into a list of inputs. Coordinates of NumPy arrays and data
+    frames are kept in two arrays of floats instead, a GeocodeInputs sequence, which builds the inputs of a batch only
+    when the batch is submitted. Iterables other than sequences, like generators, are parsed lazily, element by element.
 
     Arguments:
         geocodes: original input.
@@ -349,13 +1059,74 @@ def parse_geocodes(geocodes: List[Union[Tuple[float, float], Dict[str, float]]])
     Returns:
         parsed geocodes.
     """
-    if all(len(val) == 2 and isinstance(val[0], float) and isinstance(val[1], float) for val in geocodes):
-        # Interpreted as (longitude, latitude) tuples:
-        return [{'params': {'lon': val[0], 'lat': val[1]}} for val in geocodes]
-    elif all(isinstance(val, dict) for val in geocodes):
+    if hasattr(geocodes, 'columns'):
+        if 'lon' not in geocodes.columns or 'lat' not in geocodes.columns:
+            raise ValueError('Data frame of \'geocodes\' requires columns \'lon\' and \'lat\'.')
+        return GeocodeInputs(longitudes=geocodes['lon'].to_numpy(dtype=float),
+                             latitudes=geocodes['lat'].to_numpy(dtype=float))
+    if np is not None and isinstance(geocodes, np.ndarray):
+        if geocodes.ndim != 2 or geocodes.shape[1] != 2:
+            raise ValueError(f'Array of \'geocodes\' must be of shape (N, 2), got {geocodes.shape}.')
+        geocodes = geocodes.astype(float, copy=False)
+        return GeocodeInputs(longitudes=geocodes[:, 0], latitudes=geocodes[:, 1])
+    if not isinstance(geocodes, collections.abc.Sequence):
+        return _map_inputs(_parse_geocode, geocodes)
+    if all(isinstance(val, dict) for val in geocodes):
         return [{'params': val} for val in geocodes]
-    else:
-        raise ValueError('Format of \'geocodes\' not supported.')
+    if all(len(val) == 2 and isinstance(val[0], numbers.Real) and isinstance(val[1], numbers.Real)
+           for val in geocodes):
+        # Interpreted as (longitude, latitude) tuples:
+        return [_parse_geocode(val) for val in geocodes]
+    raise ValueError('Format of \'geocodes\' not supported.')
+
+
+def _parse_geocode(val: Union[Tuple[float, float], Dict[str, float]]) -> dict:
+    if isinstance(val, dict):
+        return {'params': val}
+    if len(val) == 2 and isinstance(val[0], numbers.Real) and isinstance(val[1], numbers.Real):
+        if abs(val[0]) <= 180. and abs(val[1]) <= 90.:  # False for NaN
+            return {'params': {'lon': float(val[0]), 'lat': float(val[1])}}
+        raise ValueError(f'Invalid geocode ({val[0]}, {val[1]}).')
+    raise ValueError(f'Format of geocode {val!r} not supported.')
+
+
+class GeocodeInputs(collections.abc.Sequence):
+
+    def __init__(self, longitudes: Union[array, 'np.ndarray'], latitudes: Union[array, 'np.ndarray']):
+        """Lazy sequence of batch inputs backed by arrays of longitudes and latitudes.
+
+        Indexing with a slice builds the `{'params': {'lon': ..., 'lat': ...}}` inputs of that slice only.
+
+        Arguments:
+            longitudes: 1-dimensional array of floats.
+            latitudes: 1-dimensional array of floats, of the same length as `longitudes`.
+        """
+        if len(longitudes) != len(latitudes):
+            raise ValueError('Longitudes and latitudes must be of the same length.')
+        if np is not None and isinstance(longitudes, np.ndarray):
+            valid = np.isfinite(longitudes) & np.isfinite(latitudes) & (np.abs(longitudes) <= 180.) \
+                & (np.abs(latitudes) <= 90.)
+            invalid = np.flatnonzero(~valid)
+            first_invalid = int(invalid[0]) if len(invalid) > 0 else None
+        else:
+            first_invalid = next((k for k, (lon, lat) in enumerate(zip(longitudes, latitudes))
+                                  if not (abs(lon) <= 180. and abs(lat) <= 90.)), None)  # False for NaN
+        if first_invalid is not None:
+            raise ValueError(f'Invalid geocode at position {first_invalid}: ({longitudes[first_invalid]}, '
+                             f'{latitudes[first_invalid]}).')
+        self._longitudes = longitudes
+        self._latitudes = latitudes
+
+    def __len__(self):
+        return len(self._longitudes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[dict, List[dict]]:
+        if isinstance(index, slice):
+            longitudes, latitudes = self._longitudes[index], self._latitudes[index]
+            if np is not None and isinstance(longitudes, np.ndarray):
+                longitudes, latitudes = longitudes.tolist(), latitudes.tolist()
+            return [{'params': {'lon': lon, 'lat': lat}} for lon, lat in zip(longitudes, latitudes)]
+        return {'params': {'lon': float(self._longitudes[index]), 'lat': float(self._latitudes[index])}}
 
 
 def simplify_batch_geocoding_results(results: List[dict], input_format: str) -> List[dict]:
@@ -1,16 +1,23 @@
 import logging
+from typing import Any, Dict, Union
 
-import requests
-
+from geobatchpy.cache import ResponseCache, cached_get
+from geobatchpy.transport import Transport
 from geobatchpy.utils import get_api_key, get_api_url, API_BOUNDARIES_PART_OF, API_BOUNDARIES_CONSISTS_OF
 
 
 class BoundariesClient:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, transport: Transport = None, cache: ResponseCache = None):
         self._api_key = get_api_key(api_key=api_key)
+        self._transport = Transport() if transport is None else transport
+        self._cache = cache
         self._headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
         self._logger = logging.getLogger(__name__)
 
+    def _get(self, api: str, params: Dict[str, Any]) -> dict:
+        return cached_get(transport=self._transport, url=get_api_url(api=api, api_key=self._api_key), api=api,
+                          params=params, headers=self._headers, cache=self._cache)
+
     def part_of(self, place_id: str = None, longitude: float = None, latitude: float = None,
                 boundary: str = 'administrative', geometry: str = 'point', language: str = None) -> dict:
         """Returns GeoJSON of boundaries the provided location belongs to.
@@ -27,20 +34,10 @@ class BoundariesClient:
         Returns:
             GeoJSON of a boundary in the selected accuracy.
         """
-        request_url = get_api_url(api=API_BOUNDARIES_PART_OF, api_key=self._api_key)
-
-        params = {'boundary': boundary, 'geometry': geometry}
-        if place_id is not None:
-            params['id'] = place_id
-        elif latitude is not None and longitude is not None:
-            params['lat'] = str(latitude)
-            params['lon'] = str(longitude)
-        else:
-            raise ValueError('Either place_id or latitude and longitude must be provided.')
-        if language is not None:
-            params['lang'] = language
+        params = _part_of_params(place_id=place_id, longitude=longitude, latitude=latitude, boundary=boundary,
+                                 geometry=geometry, language=language)
 
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+        return self._get(api=API_BOUNDARIES_PART_OF, params=params)
 
     def consists_of(self, place_id: str, boundary: str = 'administrative', sub_level: int = 1,
                     geometry: str = 'point', language: str = None) -> dict:
@@ -57,10 +54,30 @@ class BoundariesClient:
         Returns:
             GeoJSON of boundaries the provided location consists of.
         """
-        request_url = get_api_url(api=API_BOUNDARIES_CONSISTS_OF, api_key=self._api_key)
+        params = _consists_of_params(place_id=place_id, boundary=boundary, sub_level=sub_level, geometry=geometry,
+                                     language=language)
+
+        return self._get(api=API_BOUNDARIES_CONSISTS_OF, params=params)
+
+
+def _part_of_params(place_id: Union[str, None], longitude: Union[float, None], latitude: Union[float, None],
+                    boundary: str, geometry: str, language: Union[str, None]) -> Dict[str, Any]:
+    params = {'boundary': boundary, 'geometry': geometry}
+    if place_id is not None:
+        params['id'] = place_id
+    elif latitude is not None and longitude is not None:
+        params['lat'] = str(latitude)
+        params['lon'] = str(longitude)
+    else:
+        raise ValueError('Either place_id or latitude and longitude must be provided.')
+    if language is not None:
+        params['lang'] = language
+    return params
 
-        params = {'id': place_id, 'boundary': boundary, 'sublevel': sub_level, 'geometry': geometry}
-        if language is not None:
-            params['lang'] = language
 
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+def _consists_of_params(place_id: str, boundary: str, sub_level: int, geometry: str,
+                        language: Union[str, None]) -> Dict[str, Any]:
+    params = {'id': place_id, 'boundary': boundary, 'sublevel': sub_level, 'geometry': geometry}
+    if language is not None:
+        params['lang'] = language
+    return params
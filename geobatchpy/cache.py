@@ -0,0 +1,330 @@
+"""Caches of API responses.
+
+Single-call endpoints are often called with the same arguments again and again. A ResponseCache answers such repeated
+calls locally. Responses are keyed on the API endpoint plus the normalized query parameters, and only successful
+responses of idempotent GET requests are cached.
+
+Reverse geocoding inputs like GPS points rarely repeat exactly but cluster within meters of each other. A SpatialCache
+keys results on a spatial cell instead of exact coordinates, so that nearby locations share one result.
+"""
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Union
+
+import requests
+
+from geobatchpy import codec
+from geobatchpy.transport import Transport
+from geobatchpy.utils import Json
+
+_GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+_ACCESS_FLUSH_SIZE = 1000
+
+
+class ResponseCache(ABC):
+
+    def __init__(self):
+        """Base class of all response caches, counting hits and misses.
+
+        Subclasses implement `_get` and `_set`.
+        """
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = Lock()
+
+    @staticmethod
+    def make_key(api: str, params: Dict[str, Any]) -> str:
+        """Returns the cache key of a request, ignoring parameters which are None and the order of parameters."""
+        normalized = {key: str(val) for key, val in params.items() if val is not None}
+        return json.dumps([api, normalized], sort_keys=True, ensure_ascii=False)
+
+    def get(self, key: str) -> Union[Json, None]:
+        """Returns the cached response or None if not available."""
+        value = self._get(key)
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Json) -> None:
+        """Caches a response."""
+        self._set(key, value)
+
+    def get_or_fetch(self, api: str, params: Dict[str, Any], fetch: Callable[[], requests.Response]) -> Json:
+        """Returns the cached response if available, otherwise fetches, caches, and returns it.
+
+        Cached responses are shared between callers and must not be modified.
+
+        Arguments:
+            api: the API endpoint.
+            params: query parameters of the request.
+            fetch: sends the request if the response is not cached.
+
+        Returns:
+            The decoded response.
+        """
+        key = self.make_key(api=api, params=params)
+        value = self.get(key)
+        if value is None:
+            response = fetch()
+            value = codec.decode_response(response)
+            if response.status_code == 200:
+                self.set(key, value)
+        return value
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes all cached responses."""
+
+    @abstractmethod
+    def _get(self, key: str) -> Union[Json, None]:
+        """Returns the cached response or None if not available, without counting hits and misses."""
+
+    @abstractmethod
+    def _set(self, key: str, value: Json) -> None:
+        """Caches a response."""
+
+
+def cached_get(transport: Transport, url: str, api: str, params: Dict[str, Any], headers: Dict[str, str],
+               cache: ResponseCache = None) -> Json:
+    """Sends a GET request to a single-call endpoint and returns the decoded response, using the cache if any.
+
+    Arguments:
+        transport: transport sending the request.
+        url: request URL.
+        api: the API endpoint, part of the cache key.
+        params: query parameters of the request.
+        headers: request headers.
+        cache: optional response cache.
+
+    Returns:
+        The decoded response.
+    """
+    def fetch() -> requests.Response:
+        return transport.get(url=url, params=params, headers=headers)
+
+    if cache is None:
+        return codec.decode_response(fetch())
+    return cache.get_or_fetch(api=api, params=params, fetch=fetch)
+
+
+class LRUCache(ResponseCache):
+
+    def __init__(self, maxsize: int = 10000, ttl: float = None):
+        """In-memory cache evicting the least recently used responses.
+
+        Arguments:
+            maxsize: maximal number of cached responses.
+            ttl: optional time to live in seconds of a cached response.
+        """
+        super().__init__()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def _get(self, key: str) -> Union[Json, None]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            created, value = item
+            if self._ttl is not None and time.monotonic() - created > self._ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Json) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+
+class DiskCache(ResponseCache):
+
+    def __init__(self, file_path: Union[str, Path], maxsize: int = None, ttl: float = None):
+        """On-disk cache in a SQLite file, which survives restarts.
+
+        Access times of cache hits decide which responses are evicted. They are written in batches, at the latest
+        when a response is cached or the cache is closed.
+
+        Arguments:
+            file_path: path to the SQLite file.
+            maxsize: optional maximal number of cached responses; the least recently used are evicted.
+            ttl: optional time to live in seconds of a cached response.
+        """
+        super().__init__()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = Lock()
+        self._accessed: Dict[str, float] = dict()  # Access times not written yet
+        self._connection = sqlite3.connect(str(Path(file_path)), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, '
+                                     'created REAL, accessed REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            self._size = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+            self._accessed.clear()
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock, self._connection:
+            self._flush_accessed()
+        self._connection.close()
+
+    def _get(self, key: str) -> Union[Json, None]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT value, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if self._ttl is not None and now - row[1] > self._ttl:
+                with self._connection:
+                    self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._accessed.pop(key, None)
+                self._size -= 1
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= _ACCESS_FLUSH_SIZE:
+                with self._connection:
+                    self._flush_accessed()
+        return codec.loads(row[0])
+
+    def _set(self, key: str, value: Json) -> None:
+        value = codec.dumps(value)
+        now = time.time()
+        with self._lock, self._connection:
+            self._flush_accessed()
+            inserted = self._connection.execute('INSERT OR IGNORE INTO responses VALUES (?, ?, ?, ?)',
+                                                (key, value, now, now)).rowcount
+            if inserted == 0:
+                self._connection.execute('UPDATE responses SET value = ?, created = ?, accessed = ? WHERE key = ?',
+                                         (value, now, now, key))
+            self._size += inserted
+            if self._maxsize is not None and self._size > self._maxsize:
+                # Only the least recently used surplus is deleted, found via the index on access times:
+                self._connection.execute('DELETE FROM responses WHERE key IN '
+                                         '(SELECT key FROM responses ORDER BY accessed LIMIT ?)',
+                                         (self._size - self._maxsize,))
+                self._size = self._maxsize
+
+    def _flush_accessed(self) -> None:
+        """Writes the access times of recent cache hits. Call within a transaction."""
+        if len(self._accessed) > 0:
+            self._connection.executemany('UPDATE responses SET accessed = ? WHERE key = ?',
+                                         [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+
+class SpatialCache:
+
+    def __init__(self, cache: ResponseCache = None, precision: int = 4, geohash_length: int = None):
+        """Cache of results keyed on the spatial cell of a location.
+
+        By default, cells are defined by rounding longitude and latitude to `precision` decimal places; 4 decimal
+        places are about 11 meters at the equator. Alternatively, cells are geohashes of `geohash_length` characters;
+        8 characters are at most 38 x 19 meters.
+
+        Arguments:
+            cache: storage of results, which also counts hits and misses. Defaults to an LRUCache.
+            precision: number of decimal places of longitude and latitude.
+            geohash_length: optional length of geohash cells, which replaces rounding to `precision`.
+        """
+        self.cache = LRUCache() if cache is None else cache
+        self._precision = precision
+        self._geohash_length = geohash_length
+
+    def cell(self, longitude: float, latitude: float) -> str:
+        """Returns the identifier of the spatial cell of a location."""
+        if self._geohash_length is not None:
+            return geohash(longitude=longitude, latitude=latitude, length=self._geohash_length)
+        # Adding 0. turns -0. into 0.:
+        return f'{round(longitude, self._precision) + 0.:.{self._precision}f},' \
+               f'{round(latitude, self._precision) + 0.:.{self._precision}f}'
+
+    def make_key(self, api: str, params: Dict[str, Any]) -> str:
+        """Returns the cache key of a request, replacing the 'lon' and 'lat' parameters by their spatial cell."""
+        other_params = {key: val for key, val in params.items() if key not in ('lon', 'lat')}
+        other_params['cell'] = self.cell(longitude=float(params['lon']), latitude=float(params['lat']))
+        return ResponseCache.make_key(api=api, params=other_params)
+
+    def get(self, api: str, params: Dict[str, Any]) -> Union[Json, None]:
+        """Returns the cached result of the spatial cell or None if not available."""
+        return self.cache.get(self.make_key(api=api, params=params))
+
+    def set(self, api: str, params: Dict[str, Any], value: Json) -> None:
+        """Caches the result of a spatial cell."""
+        self.cache.set(self.make_key(api=api, params=params), value)
+
+    def get_or_fetch(self, api: str, params: Dict[str, Any], fetch: Callable[[], Json]) -> Json:
+        """Returns the cached result of the spatial cell if available, otherwise fetches, caches, and returns it.
+
+        Error responses of the API are not cached.
+        """
+        value = self.get(api=api, params=params)
+        if value is None:
+            value = fetch()
+            if not is_error_response(value):
+                self.set(api=api, params=params, value=value)
+        return value
+
+
+def is_error_response(value: Json) -> bool:
+    """Tells if a decoded response is an error response of the API, which must not be cached."""
+    return isinstance(value, dict) and isinstance(value.get('statusCode'), int) and value['statusCode'] >= 400
+
+
+def geohash(longitude: float, latitude: float, length: int = 8) -> str:
+    """Encodes a location as a geohash.
+
+    Arguments:
+        longitude: longitude in degrees.
+        latitude: latitude in degrees.
+        length: number of characters; every character adds 5 bits of precision.
+
+    Returns:
+        The geohash.
+    """
+    lon_range, lat_range = [-180., 180.], [-90., 90.]
+    chars = []
+    char, bits, even = 0, 0, True
+    while len(chars) < length:
+        value_range, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (value_range[0] + value_range[1]) / 2
+        char <<= 1
+        if value >= mid:
+            char |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[char])
+            char, bits = 0, 0
+    return ''.join(chars)
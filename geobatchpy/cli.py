@@ -1,11 +1,19 @@
+import json
 import logging
+from collections.abc import Sized
 from datetime import datetime
+from pathlib import Path
 from uuid import uuid4
 
 import click
 
 from geobatchpy import Client, __version__
-from geobatchpy.utils import read_data_from_json_file, write_data_to_json_file, get_api_key
+from geobatchpy.batch import BatchSubmissionError
+from geobatchpy.columnar import GeocodingResultsWriter
+from geobatchpy.utils import (
+    get_api_key, is_ndjson_file, read_data_from_json_file, read_data_from_ndjson_file, write_data_to_json_file,
+    write_data_to_ndjson_file
+)
 
 logging.basicConfig(
     level=logging.INFO, datefmt='%H:%M:%S',
@@ -39,7 +47,11 @@ def version():
 @click.argument('path_data_in', type=click.Path(exists=True))
 @click.argument('path_data_out', type=click.Path())
 @click.option('-k', '--api-key', default=None)
-def submit(path_data_in, path_data_out, api_key):
+@click.option('--api', default=None, help='Name of the Geoapify API, required for NDJSON inputs.')
+@click.option('--params', default=None, help='Optional parameters as a JSON dictionary, for NDJSON inputs.')
+@click.option('--batch-len', type=int, default=None, help='Maximal size of a single batch, for NDJSON inputs.')
+@click.option('--id', 'input_id', default=None, help='Any name for reference, for NDJSON inputs.')
+def submit(path_data_in, path_data_out, api_key, api, params, batch_len, input_id):
     """Post batch jobs and store result urls.
 
     \b
@@ -56,27 +68,65 @@ def submit(path_data_in, path_data_out, api_key):
     - batch_len: int, maximal size of a single batch. Data will be distributed across multiple jobs if needed.
     - id: str, any name for reference. This will be stored as the data_input_id in the outputs.
 
+    \b
+    Alternatively, `path_data_in` is a newline delimited JSON file with suffix .ndjson or .jsonl, holding one input
+    per line. Inputs are then read line by line while jobs are created, and the other attributes are set by the
+    corresponding options.
+
+    \b
+    JSON and NDJSON files with suffix .gz or .zst, e.g., inputs.json.gz or inputs.jsonl.zst, are compressed with gzip
+    or Zstandard. Zstandard requires zstandard.
+
+    \b
+    If some of the jobs cannot be created, the URLs of all created jobs are stored nevertheless, together with the
+    input ranges of the failed batches as `failed_ranges`, and the command exits with an error.
+
     \b
     Arguments:
         path_data_in: path to the JSON file read as input.
         path_data_out: destination of the JSON output file.
         api_key: if not set, will be read from the GEOAPIFY_KEY environment variable.
     """
-    data_in = read_data_from_json_file(file_path=path_data_in)
+    if is_ndjson_file(file_path=path_data_in):
+        if api is None:
+            raise click.UsageError('Option \'--api\' is required for NDJSON inputs.')
+        data_in = {'api': api, 'inputs': read_data_from_ndjson_file(file_path=path_data_in),
+                   'params': None if params is None else json.loads(params), 'batch_len': batch_len, 'id': input_id}
+    else:
+        data_in = read_data_from_json_file(file_path=path_data_in)
+    inputs = data_in['inputs']
+    number_of_items = len(inputs) if isinstance(inputs, Sized) else 0
+
+    def count(values):
+        nonlocal number_of_items
+        for val in values:
+            number_of_items += 1
+            yield val
+
     client = Client(api_key=get_api_key(api_key=api_key))
-    result_urls = client.batch.post_batch_jobs_and_get_job_urls(
-        api=data_in['api'], inputs=data_in['inputs'], parameters=data_in.get('params'),
-        batch_len=data_in.get('batch_len'))
+    failure = None
+    try:
+        result_urls = client.batch.post_batch_jobs_and_get_job_urls(
+            api=data_in['api'], inputs=inputs if isinstance(inputs, Sized) else count(inputs),
+            parameters=data_in.get('params'), batch_len=data_in.get('batch_len'))
+    except BatchSubmissionError as e:
+        failure = e
+        result_urls = [url for url in e.result_urls if url is not None]
 
     data_out = {
         'id': str(uuid4()),
         'api': data_in['api'],
         'result_urls': [url.split('&apiKey=')[0] for url in result_urls],
-        'sleep_time': client.batch.get_sleep_time(number_of_items=len(data_in['inputs'])),
+        'sleep_time': client.batch.get_sleep_time(number_of_items=number_of_items),
         'data_input_id': data_in.get('id'),
         'dt_created': str(datetime.now())
     }
+    if failure is not None:
+        data_out['failed_ranges'] = [[start, stop] for start, stop in failure.failed_ranges]
     write_data_to_json_file(data=data_out, file_path=path_data_out)
+    if failure is not None:
+        raise click.ClickException(f'{failure} URLs of the {len(result_urls)} created jobs are stored in '
+                                   f'{path_data_out}.')
 
 
 @main.command()
@@ -98,6 +148,18 @@ def receive(path_data_in, path_data_out, api_key):
     Optional:
     - id: str, any name for reference. This will be stored as the data_input_id in the outputs.
 
+    \b
+    Geocoding results are written in a columnar format if `path_data_out` ends with .parquet or .arrow, one row
+    group per batch job, as soon as a job completes. This requires pyarrow.
+
+    \b
+    If `path_data_out` ends with .ndjson or .jsonl, results are written as newline delimited JSON instead, one result
+    per line, as soon as a job completes.
+
+    \b
+    JSON and NDJSON files with suffix .gz or .zst, e.g., results.json.gz or results.jsonl.zst, are compressed with
+    gzip or Zstandard. Zstandard requires zstandard.
+
     \b
     Arguments:
         path_data_in: path to the JSON file read as input.
@@ -107,8 +169,22 @@ def receive(path_data_in, path_data_out, api_key):
     api_key = get_api_key(api_key=api_key)
     data_in = read_data_from_json_file(file_path=path_data_in)
     client = Client(api_key=api_key)
-    results = client.batch.monitor_batch_jobs_and_get_results(
-        result_urls=[url + f'&apiKey={api_key}' for url in data_in['result_urls']], sleep_time=data_in['sleep_time'])
+    result_urls = [url + f'&apiKey={api_key}' for url in data_in['result_urls']]
+    if Path(path_data_out).suffix in ('.parquet', '.arrow'):
+        with GeocodingResultsWriter(file_path=path_data_out) as writer:
+            writer.write_all(client.batch.iter_results(sleep_time=data_in['sleep_time'], result_urls=result_urls,
+                                                       api=data_in.get('api')))
+        return
+    if is_ndjson_file(file_path=path_data_out):
+        write_data_to_ndjson_file(
+            data=(res for results in client.batch.iter_results(sleep_time=data_in['sleep_time'],
+                                                               result_urls=result_urls, api=data_in.get('api'))
+                  for res in results),
+            file_path=path_data_out)
+        return
+
+    results = client.batch.monitor_batch_jobs_and_get_results(result_urls=result_urls,
+                                                              sleep_time=data_in['sleep_time'])
 
     data_out = {
         'id': str(uuid4()),
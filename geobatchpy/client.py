@@ -2,27 +2,64 @@
 
 """
 import logging
-from typing import Dict, List, Tuple, Union
-
-import requests
+import operator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
 
 from geobatchpy.batch import BatchClient
 from geobatchpy.boundaries import BoundariesClient
+from geobatchpy.cache import ResponseCache, SpatialCache, cached_get
+from geobatchpy.codec import decode_response
+from geobatchpy.events import JobEvent
+from geobatchpy.matrix import RouteMatrix
+from geobatchpy.ratelimit import TokenBucket
+from geobatchpy.sizing import BatchSizer
+from geobatchpy.transport import Transport
 from geobatchpy.utils import (
     get_api_key, get_api_url, API_GEOCODE, API_REVERSE_GEOCODE, API_PLACES, API_PLACE_DETAILS, API_ISOLINE,
     API_ROUTE_MATRIX
 )
 
 
+class BulkResults(NamedTuple):
+    """Outcome of Client.bulk: one result per call, None if the call failed, and the errors by index of the call."""
+    results: List[Any]
+    errors: Dict[int, Exception]
+
+
 class Client:
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, transport: Transport = None, cache: ResponseCache = None,
+                 reverse_geocode_cache: SpatialCache = None, batch_sizer: BatchSizer = None,
+                 listeners: Iterable[Callable[[JobEvent], None]] = None):
+        """Client of the Geoapify API.
+
+        Arguments:
+            api_key: Geoapify API key.
+            transport: optional pooled HTTP transport, shared with `batch` and `boundaries`. A transport with default
+                settings is created if not provided.
+            cache: optional cache of responses of GET requests, shared with `boundaries`. See geobatchpy.cache.
+            reverse_geocode_cache: optional cache of reverse geocoding results keyed on spatial cells, shared with
+                `batch`. See geobatchpy.cache.
+            batch_sizer: optional chooser of batch sizes for `batch_len='auto'` of `batch`. Defaults to one keeping
+                its observations in the user's cache directory, see geobatchpy.sizing.
+            listeners: optional callables receiving events of batch jobs of `batch`, see geobatchpy.events.
+        """
         self._api_key = get_api_key(api_key=api_key)
-        self.batch = BatchClient(api_key=api_key)
-        self.boundaries = BoundariesClient(api_key=api_key)
+        self._transport = Transport() if transport is None else transport
+        self._cache = cache
+        self._reverse_geocode_cache = reverse_geocode_cache
+        self.batch = BatchClient(api_key=api_key, transport=self._transport,
+                                 reverse_geocode_cache=reverse_geocode_cache, batch_sizer=batch_sizer,
+                                 listeners=listeners)
+        self.boundaries = BoundariesClient(api_key=api_key, transport=self._transport, cache=cache)
         self._headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
         self._logger = logging.getLogger(__name__)
 
+    def _get(self, api: str, params: Dict[str, Any]) -> dict:
+        return cached_get(transport=self._transport, url=get_api_url(api=api, api_key=self._api_key), api=api,
+                          params=params, headers=self._headers, cache=self._cache)
+
     def places(self, categories: Union[str, List[str]], filter_by_region: str = None,
                filter_by_name: str = None, proximity_by: Tuple[float, float] = None,
                conditions: Union[str, List[str]] = None, limit: int = 20, offset: int = None,
@@ -44,29 +81,11 @@ class Client:
         Returns:
             List of places encoded in JSON like dictionaries.
         """
-        request_url = get_api_url(api=API_PLACES, api_key=self._api_key)
-        params = dict()
-        if isinstance(categories, str):
-            params['categories'] = categories
-        else:
-            params['categories'] = ','.join(categories)
-        if filter_by_region is not None:
-            params['filter'] = filter_by_region
-        if filter_by_name is not None:
-            params['name'] = filter_by_name
-        if proximity_by is not None:
-            params['bias'] = f'proximity:{proximity_by[0]},{proximity_by[1]}'
-        if isinstance(conditions, str):
-            params['conditions'] = conditions
-        elif conditions is not None:
-            params['conditions'] = ','.join(conditions)
-
-        params['limit'] = limit
-        params['offset'] = offset
-        if language is not None:
-            params['lang'] = language
-
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+        params = _places_params(categories=categories, filter_by_region=filter_by_region,
+                                filter_by_name=filter_by_name, proximity_by=proximity_by, conditions=conditions,
+                                limit=limit, offset=offset, language=language)
+
+        return self._get(api=API_PLACES, params=params)
 
     def place_details(self, place_id: str = None, longitude: float = None, latitude: float = None,
                       features: List[str] = None, language: str = None) -> dict:
@@ -85,21 +104,10 @@ class Client:
         Returns:
             Structured location details.
         """
-        request_url = get_api_url(api=API_PLACE_DETAILS, api_key=self._api_key)
-        params = dict()
-        if place_id is not None:
-            params['id'] = place_id
-        elif latitude is not None and longitude is not None:
-            params['lat'] = str(latitude)
-            params['lon'] = str(longitude)
-        else:
-            raise ValueError('Either place_id or latitude and longitude must be provided.')
-        if features is not None:
-            params['features'] = ','.join(features)
-        if language is not None:
-            params['lang'] = language
-
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+        params = _place_details_params(place_id=place_id, longitude=longitude, latitude=latitude, features=features,
+                                       language=language)
+
+        return self._get(api=API_PLACE_DETAILS, params=params)
 
     def geocode(self, text: str = None, parameters: Dict[str, str] = None) -> dict:
         """Returns geocoding results as a dictionary.
@@ -114,17 +122,15 @@ class Client:
         Returns:
             Structured, geocoded, and enriched address record.
         """
-        request_url = get_api_url(api=API_GEOCODE, api_key=self._api_key)
+        params = _geocode_params(text=text, parameters=parameters)
 
-        params = {'text': text} if text is not None else dict()
-        if parameters is not None:
-            params = {**params, **parameters}
-
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+        return self._get(api=API_GEOCODE, params=params)
 
     def reverse_geocode(self, longitude: float, latitude: float) -> dict:
         """Returns reverse geocoding results as a dictionary.
 
+        With a reverse geocoding cache, nearby locations within the same spatial cell share one result.
+
         Arguments:
             latitude: float representing latitude.
             longitude: float representing longitude.
@@ -132,10 +138,12 @@ class Client:
         Returns:
             Structured, reverse geocoded, and enriched address record.
         """
-        request_url = get_api_url(api=API_REVERSE_GEOCODE, api_key=self._api_key)
-        params = {'lat': str(latitude), 'lon': str(longitude)}
+        params = _reverse_geocode_params(longitude=longitude, latitude=latitude)
 
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+        if self._reverse_geocode_cache is not None:
+            return self._reverse_geocode_cache.get_or_fetch(
+                api=API_REVERSE_GEOCODE, params=params, fetch=lambda: self._get(api=API_REVERSE_GEOCODE, params=params))
+        return self._get(api=API_REVERSE_GEOCODE, params=params)
 
     def isoline(self, longitude: float, latitude: float, travel_range: int,
                 travel_mode: str = 'drive', isoline_type: str = 'time', output_format: str = 'geojson') -> dict:
@@ -152,32 +160,235 @@ class Client:
         Returns:
             Structured isoline details.
         """
-        request_url = get_api_url(api=API_ISOLINE, api_key=self._api_key)
-        params = {'lon': str(longitude), 'lat': str(latitude), 'range': travel_range, 'mode': travel_mode,
-                  'type': isoline_type, 'format': output_format}
-        return requests.get(url=request_url, params=params, headers=self._headers).json()
+        params = _isoline_params(longitude=longitude, latitude=latitude, travel_range=travel_range,
+                                 travel_mode=travel_mode, isoline_type=isoline_type, output_format=output_format)
+        return self._get(api=API_ISOLINE, params=params)
 
     def route_matrix(self, source_geocodes: List[Tuple[float, float]],
                      target_geocodes: List[Tuple[float, float]] = None,
-                     travel_mode: str = 'drive', ) -> dict:
-        """Returns route matrix results as a dictionary.
+                     travel_mode: str = 'drive', tile_size: int = None, max_workers: int = 10,
+                     assume_symmetric: bool = False, compact: bool = False) -> Union[dict, RouteMatrix]:
+        """Returns route matrix results as a dictionary or as a compact RouteMatrix.
 
         `target_geocodes = None` translates to `target_geocodes = source_geocodes`.
 
+        Matrices exceeding the size limit of the API are requested in tiles of at most `tile_size` sources times
+        `tile_size` targets. Tiles are sent concurrently using the client's transport and stitched into one result of
+        the same format as an untiled request.
+
         Args:
             source_geocodes: list of (lon, lat) tuples of source locations.
             target_geocodes: list of (lon, lat) tuples of target locations or None.
             travel_mode: one of 'drive', 'truck', 'walk', 'bicycle'.
+            tile_size: optional maximal number of sources and of targets per request.
+            max_workers: maximal number of tiles requested concurrently.
+            assume_symmetric: if True and `target_geocodes = None`, only tiles on and above the diagonal are requested
+                and the others are mirrored. Travel times and distances are not symmetric in general, e.g., due to
+                one-way streets, so use this only where approximate results are acceptable.
+            compact: if True, returns a RouteMatrix, which stores distances and travel times in typed arrays. Tiles
+                are copied into the arrays as they arrive, so the dictionaries of at most `max_workers` tiles are
+                held in memory at any time.
 
         Returns:
-
+            Sources, targets, and the matrix of distances and travel times in `sources_to_targets`.
         """
-        request_url = get_api_url(api=API_ROUTE_MATRIX, api_key=self._api_key)
+        symmetric = assume_symmetric and target_geocodes is None
         if target_geocodes is None:
             target_geocodes = source_geocodes
-        data = {
-            'mode': travel_mode,
-            'sources': [{'location': geocode} for geocode in source_geocodes],
-            'targets': [{'location': geocode} for geocode in target_geocodes]
-        }
-        return requests.post(url=request_url, json=data, headers=self._headers).json()
+        if tile_size is None or (len(source_geocodes) <= tile_size and len(target_geocodes) <= tile_size):
+            result = self._route_matrix_tile(source_geocodes=source_geocodes, target_geocodes=target_geocodes,
+                                             travel_mode=travel_mode)
+            return RouteMatrix.from_json(result) if compact else result
+        if tile_size < 1:
+            raise ValueError(f'Argument \'tile_size\' must be positive, got {tile_size}.')
+
+        source_offsets = range(0, len(source_geocodes), tile_size)
+        target_offsets = range(0, len(target_geocodes), tile_size)
+        tiles = [(i, j) for i in source_offsets for j in target_offsets if not symmetric or i <= j]
+        self._logger.info(f'Requesting route matrix in {len(tiles)} tiles.')
+        matrix = RouteMatrix(number_of_sources=len(source_geocodes), number_of_targets=len(target_geocodes)) \
+            if compact else None
+        results = dict()
+        with ThreadPoolExecutor(max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self._route_matrix_tile, source_geocodes=source_geocodes[i:i + tile_size],
+                                target_geocodes=target_geocodes[j:j + tile_size], travel_mode=travel_mode): (i, j)
+                for i, j in tiles
+            }
+            for future in as_completed(futures):
+                (i, j), result = futures[future], future.result()
+                if 'sources_to_targets' not in result:
+                    raise ValueError(f'Route matrix tile with source offset {i} and target offset {j} failed: '
+                                     f'{result}')
+                if matrix is None:
+                    results[(i, j)] = result
+                    continue
+                matrix.set_tile(result=result, source_offset=i, target_offset=j)
+                if symmetric and i < j:
+                    matrix.set_tile(result=result, source_offset=j, target_offset=i, transpose=True)
+
+        if matrix is not None:
+            return matrix
+        return stitch_route_matrix_tiles(tiles=results, source_offsets=source_offsets, target_offsets=target_offsets,
+                                         symmetric=symmetric)
+
+    def _route_matrix_tile(self, source_geocodes: List[Tuple[float, float]],
+                           target_geocodes: List[Tuple[float, float]], travel_mode: str) -> dict:
+        request_url = get_api_url(api=API_ROUTE_MATRIX, api_key=self._api_key)
+        data = _route_matrix_body(source_geocodes=source_geocodes, target_geocodes=target_geocodes,
+                                  travel_mode=travel_mode)
+        response = self._transport.post(url=request_url, json=data, headers=self._headers, idempotent=True)
+        return decode_response(response)
+
+    def bulk(self, method: Union[str, Callable], list_of_kwargs: List[Dict[str, Any]], max_workers: int = 10,
+             requests_per_second: float = None) -> BulkResults:
+        """Runs many calls of a single-call endpoint concurrently.
+
+        Use this for endpoints without a batch version, like `route_matrix`, `isoline`, or the boundaries endpoints.
+        Calls share the client's pooled transport; choose `max_workers` no larger than its `pool_maxsize`. A failing
+        call does not stop the others. Exceptions, as well as error responses of the API, are collected per call.
+
+        Example: `client.bulk('boundaries.part_of', [{'longitude': 7.01, 'latitude': 51.45}, ...])`.
+
+        Arguments:
+            method: name of a method of this client, like 'isoline' or 'boundaries.part_of', or any callable.
+            list_of_kwargs: keyword arguments of `method`, one dictionary per call.
+            max_workers: maximal number of concurrent calls.
+            requests_per_second: optional ceiling of calls per second across all workers.
+
+        Returns:
+            Results in the order of `list_of_kwargs` together with the errors by index.
+        """
+        func = operator.attrgetter(method)(self) if isinstance(method, str) else method
+        limiter = None if requests_per_second is None else TokenBucket(rate=requests_per_second)
+
+        def call(kwargs: Dict[str, Any]) -> Any:
+            if limiter is not None:
+                limiter.acquire()
+            return func(**kwargs)
+
+        results = [None] * len(list_of_kwargs)
+        errors = dict()
+        with ThreadPoolExecutor(max(1, max_workers)) as executor:
+            futures = [executor.submit(call, kwargs) for kwargs in list_of_kwargs]
+            for i, future in enumerate(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self._logger.warning(f'Call {i} of {len(futures)} failed - {e!r}.')
+                    errors[i] = e
+                    continue
+                if isinstance(result, dict) and isinstance(result.get('statusCode'), int) \
+                        and result['statusCode'] >= 400:
+                    self._logger.warning(f'Call {i} of {len(futures)} failed - {result}.')
+                    errors[i] = ValueError(result)
+                    continue
+                results[i] = result
+
+        return BulkResults(results=results, errors=errors)
+
+
+def stitch_route_matrix_tiles(tiles: Dict[Tuple[int, int], dict], source_offsets: Sequence[int],
+                              target_offsets: Sequence[int], symmetric: bool = False) -> dict:
+    """Stitches route matrix results of tiles into one result.
+
+    Arguments:
+        tiles: route matrix results by offset of their first source and first target.
+        source_offsets: offsets of all source tiles in ascending order.
+        target_offsets: offsets of all target tiles in ascending order.
+        symmetric: if True, tiles below the diagonal may be missing and are mirrored from above the diagonal.
+
+    Returns:
+        Route matrix result of all sources and targets.
+    """
+    first = tiles[(source_offsets[0], target_offsets[0])]
+    stitched = {key: val for key, val in first.items() if key not in ('sources', 'targets', 'sources_to_targets')}
+    stitched['sources'] = []
+    stitched['targets'] = [target for j in target_offsets for target in tiles[(source_offsets[0], j)]['targets']]
+
+    rows = []
+    for i in source_offsets:
+        sources = tiles[(i, i) if symmetric else (i, target_offsets[0])]['sources']
+        stitched['sources'].extend(sources)
+        for r in range(len(sources)):
+            row = []
+            for j in target_offsets:
+                if symmetric and i > j:
+                    cells = [line[r] for line in tiles[(j, i)]['sources_to_targets']]
+                else:
+                    cells = tiles[(i, j)]['sources_to_targets'][r]
+                row.extend(cell if cell is None else {**cell, 'source_index': i + r, 'target_index': j + c}
+                           for c, cell in enumerate(cells))
+            rows.append(row)
+    stitched['sources_to_targets'] = rows
+    return stitched
+
+
+def _places_params(categories: Union[str, List[str]], filter_by_region: Union[str, None],
+                   filter_by_name: Union[str, None], proximity_by: Union[Tuple[float, float], None],
+                   conditions: Union[str, List[str], None], limit: int, offset: Union[int, None],
+                   language: Union[str, None]) -> Dict[str, Any]:
+    params = dict()
+    if isinstance(categories, str):
+        params['categories'] = categories
+    else:
+        params['categories'] = ','.join(categories)
+    if filter_by_region is not None:
+        params['filter'] = filter_by_region
+    if filter_by_name is not None:
+        params['name'] = filter_by_name
+    if proximity_by is not None:
+        params['bias'] = f'proximity:{proximity_by[0]},{proximity_by[1]}'
+    if isinstance(conditions, str):
+        params['conditions'] = conditions
+    elif conditions is not None:
+        params['conditions'] = ','.join(conditions)
+
+    params['limit'] = limit
+    params['offset'] = offset
+    if language is not None:
+        params['lang'] = language
+    return params
+
+
+def _place_details_params(place_id: Union[str, None], longitude: Union[float, None], latitude: Union[float, None],
+                          features: Union[List[str], None], language: Union[str, None]) -> Dict[str, Any]:
+    params = dict()
+    if place_id is not None:
+        params['id'] = place_id
+    elif latitude is not None and longitude is not None:
+        params['lat'] = str(latitude)
+        params['lon'] = str(longitude)
+    else:
+        raise ValueError('Either place_id or latitude and longitude must be provided.')
+    if features is not None:
+        params['features'] = ','.join(features)
+    if language is not None:
+        params['lang'] = language
+    return params
+
+
+def _geocode_params(text: Union[str, None], parameters: Union[Dict[str, str], None]) -> Dict[str, Any]:
+    params = {'text': text} if text is not None else dict()
+    if parameters is not None:
+        params = {**params, **parameters}
+    return params
+
+
+def _reverse_geocode_params(longitude: float, latitude: float) -> Dict[str, Any]:
+    return {'lat': str(latitude), 'lon': str(longitude)}
+
+
+def _isoline_params(longitude: float, latitude: float, travel_range: int, travel_mode: str, isoline_type: str,
+                    output_format: str) -> Dict[str, Any]:
+    return {'lon': str(longitude), 'lat': str(latitude), 'range': travel_range, 'mode': travel_mode,
+            'type': isoline_type, 'format': output_format}
+
+
+def _route_matrix_body(source_geocodes: List[Tuple[float, float]], target_geocodes: List[Tuple[float, float]],
+                       travel_mode: str) -> dict:
+    return {
+        'mode': travel_mode,
+        'sources': [{'location': geocode} for geocode in source_geocodes],
+        'targets': [{'location': geocode} for geocode in target_geocodes]
+    }
@@ -0,0 +1,261 @@
+"""JSON encoding and decoding.
+
+All response bodies and JSON files of geobatchpy go through one codec. The default codec uses orjson if installed,
+e.g., `pip install geobatchpy[json]`, which decodes and encodes large batch results several times faster than the
+standard library, and falls back to the json module otherwise. Responses are decoded from their raw bytes, without
+decoding them to a str first. Use `set_codec` to plug in another implementation.
+
+Results of completed batch jobs can be hundreds of MB per response. `parse_json_stream` decodes such a body chunk by
+chunk and the items of its `results` array one at a time, so the raw body is never held in memory as a whole. Smaller
+bodies are decoded as a whole, which is faster.
+"""
+import json
+import re
+from typing import Any, Iterable, Union
+
+import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """Codec based on the json module of the standard library."""
+    name = 'json'
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Decodes a JSON document, either UTF-8 encoded bytes or a str."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: int = None) -> bytes:
+        """Encodes an object as UTF-8 JSON, compact unless `indent` is given."""
+        separators = (',', ':') if indent is None else None
+        return json.dumps(obj, indent=indent, separators=separators, ensure_ascii=False,
+                          default=_default).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec based on orjson. Indented output always uses two spaces."""
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ValueError('orjson is not installed - run \'pip install geobatchpy[json]\'.')
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any, indent: int = None) -> bytes:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent is not None:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+_codec: JsonCodec = JsonCodec() if orjson is None else OrjsonCodec()
+
+
+def get_codec() -> JsonCodec:
+    """Returns the codec in use."""
+    return _codec
+
+
+def set_codec(codec: JsonCodec = None) -> None:
+    """Replaces the codec in use, or restores the default if None.
+
+    Arguments:
+        codec: any object with methods `loads(data)` and `dumps(obj, indent=None)` like JsonCodec.
+    """
+    global _codec
+    _codec = (JsonCodec() if orjson is None else OrjsonCodec()) if codec is None else codec
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decodes a JSON document with the codec in use."""
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, indent: int = None) -> bytes:
+    """Encodes an object as UTF-8 JSON with the codec in use."""
+    return _codec.dumps(obj, indent=indent)
+
+
+def decode_response(response: requests.Response) -> Any:
+    """Decodes the JSON body of a response from its raw bytes.
+
+    Raises:
+        ValueError: if the body is not valid JSON.
+    """
+    return _codec.loads(response.content)
+
+
+def parse_json_stream(chunks: Iterable[bytes], array_key: str = 'results', buffer_size: int = 2 ** 24) -> dict:
+    """Incrementally decodes a JSON object from chunks of UTF-8 encoded bytes.
+
+    Bodies of up to `buffer_size` bytes are decoded as a whole with the codec in use. Of larger bodies, the items of
+    the array member `array_key` are decoded one at a time as their bytes arrive, and the bytes of items already
+    decoded are dropped. All other members are decoded as a whole and should be small. A scanner of brackets and
+    strings finds the end of every item in the buffer, and the bytes of the item are decoded with the codec in use.
+
+    Arguments:
+        chunks: the body in chunks, e.g., `response.iter_content(chunk_size)` of a streamed response.
+        array_key: name of the array member to decode item by item.
+        buffer_size: maximal size in bytes of a body decoded as a whole.
+
+    Returns:
+        The decoded object.
+
+    Raises:
+        ValueError: if the body is not a valid JSON object.
+    """
+    buffer = _StreamBuffer(chunks)
+    if buffer.read_all(limit=buffer_size):
+        obj = _codec.loads(buffer.data)
+        if not isinstance(obj, dict):
+            raise ValueError(f'Expecting a JSON object, got {type(obj).__name__}.')
+        return obj
+    buffer.expect('{')
+    obj = dict()
+    if buffer.peek() == '}':
+        buffer.pos += 1
+    else:
+        while True:
+            key = buffer.decode_value()
+            if not isinstance(key, str):
+                raise ValueError(f'Expecting a member name, got {key!r}.')
+            buffer.expect(':')
+            if key == array_key and buffer.peek() == '[':
+                buffer.pos += 1
+                obj[key] = _parse_items(buffer)
+            else:
+                obj[key] = buffer.decode_value()
+            if buffer.peek() == '}':
+                buffer.pos += 1
+                break
+            buffer.expect(',')
+    if buffer.peek() != '':
+        raise ValueError('Extra data after the JSON object.')
+    return obj
+
+
+def _parse_items(buffer: '_StreamBuffer') -> list:
+    items = []
+    if buffer.peek() == ']':
+        buffer.pos += 1
+        return items
+    while True:
+        items.append(buffer.decode_value())
+        buffer.discard()
+        if buffer.peek() == ']':
+            buffer.pos += 1
+            return items
+        buffer.expect(',')
+
+
+# Complete strings, opening and closing brackets, and the opening quote of an incomplete string:
+_TOKEN = re.compile(rb'("[^"\\]*(?:\\.[^"\\]*)*")|([\[{])|([\]}])|(")', re.DOTALL)
+_STRING, _OPEN, _CLOSE, _INCOMPLETE_STRING = 1, 2, 3, 4
+_SCALAR_END = re.compile(rb'[,\]}\s]')
+
+
+class _StreamBuffer:
+
+    def __init__(self, chunks: Iterable[bytes]):
+        """Chunked UTF-8 body, read on demand. `pos` is the position of the first unconsumed byte."""
+        self._chunks = iter(chunks)
+        self._eof = False
+        self.data = bytearray()
+        self.pos = 0
+
+    def discard(self) -> None:
+        """Drops consumed bytes once they make up most of the buffer."""
+        if self.pos > len(self.data) // 2:
+            del self.data[:self.pos]
+            self.pos = 0
+
+    def read_more(self) -> bool:
+        """Reads at least as many bytes as are unconsumed, or up to the end. Returns False if already at the end."""
+        if self._eof:
+            return False
+        self.discard()
+        target = 2 * (len(self.data) - self.pos) + 1
+        while len(self.data) < target:
+            try:
+                self.data += next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                break
+        return True
+
+    def read_all(self, limit: int) -> bool:
+        """Reads up to the end unless the body exceeds `limit` bytes. Returns True if the whole body was read."""
+        while len(self.data) <= limit:
+            try:
+                self.data += next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                return len(self.data) <= limit
+        return False
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, or an empty str at the end of the body."""
+        while True:
+            data = self.data
+            while self.pos < len(data) and data[self.pos] in b' \t\n\r':
+                self.pos += 1
+            if self.pos < len(data) or not self.read_more():
+                return chr(data[self.pos]) if self.pos < len(data) else ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'Expecting {char!r}, got {found!r}.' if found else f'Expecting {char!r}, got the end.')
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """Decodes the next value with the codec in use, reading more bytes until it is complete."""
+        self.peek()
+        while True:
+            end = _value_end(self.data, self.pos)
+            if end >= 0:
+                break
+            if not self.read_more():
+                # A number or literal ends with the body; anything else is incomplete and fails to decode:
+                end = len(self.data)
+                break
+        value = _codec.loads(self.data[self.pos:end])
+        self.pos = end
+        return value
+
+
+def _value_end(data: bytearray, pos: int) -> int:
+    """Returns the position after the JSON value starting at `pos`, or -1 if the buffer ends before it does.
+
+    Only brackets and strings are scanned. The value itself is validated when decoded.
+    """
+    if data[pos:pos + 1] not in (b'[', b'{', b'"'):
+        match = _SCALAR_END.search(data, pos)
+        return -1 if match is None else match.start()
+    depth = 0
+    for match in _TOKEN.finditer(data, pos):
+        token = match.lastindex
+        if token == _OPEN:
+            depth += 1
+        elif token == _CLOSE:
+            depth -= 1
+        elif token == _INCOMPLETE_STRING:
+            return -1
+        if depth == 0:
+            return match.end()
+    return -1
+
+
+def _default(obj: Any) -> Any:
+    # NumPy scalars and arrays, e.g., coordinates of parse_geocodes inputs
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
@@ -0,0 +1,151 @@
+"""Columnar output of batch geocoding results.
+
+Batch geocoding results are deeply nested JSON, which is slow to flatten into a table. GeocodingResultsWriter writes
+the most relevant fields of the top match per location with a fixed schema to a Parquet or Arrow IPC file, one row
+group or record batch per batch job, so results can be written as soon as a job completes. Requires pyarrow, e.g.,
+`pip install geobatchpy[arrow]`.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+_FLOAT_FIELDS = ('lat', 'lon', 'confidence', 'importance')
+_STRING_FIELDS = ('query', 'formatted', 'match_type', 'result_type', 'country', 'country_code', 'state', 'city',
+                  'postcode', 'street', 'housenumber', 'place_id')
+# Column order of the schema:
+GEOCODING_FIELDS = ('index', 'query', 'lat', 'lon', 'formatted', 'confidence', 'importance', 'match_type',
+                    'result_type', 'country', 'country_code', 'state', 'city', 'postcode', 'street', 'housenumber',
+                    'place_id')
+
+
+def geocoding_schema() -> 'pa.Schema':
+    """Returns the Arrow schema of geocoding results.
+
+    `index` is the position of the location in the inputs; `confidence`, `importance`, and `match_type` are taken from
+    the `rank` of the top match.
+    """
+    _check_pyarrow()
+    types = {'index': pa.int64(), **{name: pa.float64() for name in _FLOAT_FIELDS},
+             **{name: pa.string() for name in _STRING_FIELDS}}
+    return pa.schema([(name, types[name]) for name in GEOCODING_FIELDS])
+
+
+def geocoding_results_to_record_batch(results: List[dict], offset: int = 0) -> 'pa.RecordBatch':
+    """Converts batch geocoding results in JSON or GeoJSON format into an Arrow record batch.
+
+    Arguments:
+        results: results of a batch job as returned by BatchClient.geocode or BatchClient.iter_results.
+        offset: position of the first location in the inputs.
+
+    Returns:
+        One row per location with the top match, or missing values if there is no match.
+    """
+    schema = geocoding_schema()
+    columns: Dict[str, List[Any]] = {name: [] for name in GEOCODING_FIELDS}
+    for k, res in enumerate(results):
+        row = _geocoding_row(res)
+        columns['index'].append(offset + k)
+        for name in GEOCODING_FIELDS[1:]:
+            columns[name].append(row.get(name))
+    return pa.record_batch([pa.array(columns[field.name], type=field.type) for field in schema], schema=schema)
+
+
+class GeocodingResultsWriter:
+
+    def __init__(self, file_path: Union[str, Path], file_format: str = None, compression: str = 'snappy'):
+        """Incremental writer of batch geocoding results to a Parquet or Arrow IPC file.
+
+        Every call of `write` adds one row group (Parquet) or record batch (Arrow). Use it as a context manager or
+        call `close` to finish the file.
+
+        Arguments:
+            file_path: destination path.
+            file_format: either 'parquet' or 'arrow'. Defaults to 'arrow' for the suffixes .arrow, .feather, and .ipc
+                and to 'parquet' otherwise.
+            compression: compression codec of Parquet files.
+        """
+        _check_pyarrow()
+        file_path = Path(file_path)
+        if file_format is None:
+            file_format = 'arrow' if file_path.suffix in ('.arrow', '.feather', '.ipc') else 'parquet'
+        if file_format not in ('parquet', 'arrow'):
+            raise ValueError(f'Argument \'file_format={file_format}\' not supported - use one of \'parquet\', '
+                             f'\'arrow\'.')
+        self._schema = geocoding_schema()
+        self._next_offset = 0
+        self.number_of_rows = 0
+        if file_format == 'parquet':
+            self._writer = pq.ParquetWriter(str(file_path), schema=self._schema, compression=compression)
+        else:
+            self._writer = pa.ipc.new_file(str(file_path), schema=self._schema)
+
+    def write(self, results: List[dict], offset: int = None) -> None:
+        """Writes the results of one batch job.
+
+        Arguments:
+            results: results of the batch job.
+            offset: position of the first location in the inputs. Defaults to right after the previous write, which
+                is correct if results are written in the order of the inputs.
+        """
+        if len(results) == 0:
+            return
+        offset = self._next_offset if offset is None else offset
+        batch = geocoding_results_to_record_batch(results=results, offset=offset)
+        if isinstance(self._writer, pq.ParquetWriter):
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(results))
+        else:
+            self._writer.write_batch(batch)
+        self._next_offset = offset + len(results)
+        self.number_of_rows += len(results)
+
+    def write_all(self, results: Iterable[Union[List[dict], tuple]]) -> None:
+        """Writes results as yielded by BatchClient.iter_results, either in input or in completion order."""
+        for val in results:
+            if isinstance(val, tuple):
+                self.write(results=val[1], offset=val[0])
+            else:
+                self.write(results=val)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _geocoding_row(res: dict) -> Dict[str, Any]:
+    result = res.get('result') or dict()
+    if len(result.get('results') or []) > 0:
+        match = result['results'][0]
+    elif len(result.get('features') or []) > 0:
+        match = result['features'][0].get('properties') or dict()
+    else:
+        match = dict()
+    query = result.get('query')
+    text = query.get('text') if isinstance(query, dict) else None
+    if text is None:
+        text = (res.get('params') or dict()).get('text')
+    rank = match.get('rank') or dict()
+
+    row = {name: match.get(name) for name in _STRING_FIELDS + _FLOAT_FIELDS}
+    row.update(query=text, confidence=rank.get('confidence'), importance=rank.get('importance'),
+               match_type=rank.get('match_type'))
+    for name in _FLOAT_FIELDS:
+        row[name] = None if row[name] is None else float(row[name])
+    for name in _STRING_FIELDS:
+        row[name] = None if row[name] is None else str(row[name])
+    return row
+
+
+def _check_pyarrow() -> None:
+    if pa is None:
+        raise ValueError('pyarrow is not installed - run \'pip install geobatchpy[arrow]\'.')
@@ -0,0 +1,182 @@
+"""Events and metrics of batch jobs.
+
+A BatchClient reports the life cycle of every batch job to its listeners, callables taking a JobEvent:
+
+- `job_submitted`: the server created the job.
+- `job_polled`: a GET request for the job returned, whether still pending or completed.
+- `job_completed`: results of the job arrived.
+- `job_failed`: the job could not be created, or a GET request for it failed for good.
+
+Events carry timings, payload sizes, and the number of retries of the underlying request. Listeners are called
+synchronously and should return quickly; exceptions raised by a listener are logged and ignored. With an
+AsyncBatchClient, `job_polled` and `job_completed` events are reported from a thread of the event loop's executor.
+
+A PrometheusExporter aggregates events into metrics in the Prometheus text format, e.g., to be scraped from a file by
+the textfile collector of the node exporter:
+
+    exporter = PrometheusExporter()
+    client.batch.add_listener(exporter)
+    ...
+    exporter.write('geobatchpy.prom')
+"""
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union
+
+JOB_SUBMITTED = 'job_submitted'
+JOB_POLLED = 'job_polled'
+JOB_COMPLETED = 'job_completed'
+JOB_FAILED = 'job_failed'
+
+
+class JobEvent(NamedTuple):
+    """Event in the life cycle of a batch job.
+
+    Attributes:
+        name: one of 'job_submitted', 'job_polled', 'job_completed', 'job_failed'.
+        job: index of the job in the run.
+        api: name of the batch enabled API, None if not known.
+        url: job URL without API key, None if the job could not be created.
+        timestamp: Unix time of the event.
+        duration: seconds the request took for 'job_submitted' and 'job_polled', the time since monitoring
+            started for 'job_completed', None otherwise.
+        status_code: HTTP status code of the response, None if there is no response.
+        payload_bytes: size of the request body for 'job_submitted', of the response body for 'job_polled' and
+            'job_completed', None if not known.
+        number_of_items: number of inputs of the job for 'job_submitted', number of results for 'job_completed'.
+        attempt: number of GET requests for the job so far, starting at 1.
+        retries: number of retries of the request by the transport, see geobatchpy.retry.
+        error: description of the failure for 'job_failed'.
+    """
+    name: str
+    job: int
+    api: Union[str, None] = None
+    url: Union[str, None] = None
+    timestamp: float = 0.
+    duration: Union[float, None] = None
+    status_code: Union[int, None] = None
+    payload_bytes: Union[int, None] = None
+    number_of_items: Union[int, None] = None
+    attempt: Union[int, None] = None
+    retries: int = 0
+    error: Union[str, None] = None
+
+
+def make_event(name: str, job: int, **kwargs) -> JobEvent:
+    """Creates an event with the current time as its timestamp."""
+    return JobEvent(name=name, job=job, timestamp=time.time(), **kwargs)
+
+
+_COUNTERS = (
+    ('jobs_submitted_total', 'Number of created batch jobs.'),
+    ('jobs_completed_total', 'Number of batch jobs with results.'),
+    ('jobs_failed_total', 'Number of batch jobs which could not be created or monitored.'),
+    ('job_polls_total', 'Number of GET requests for batch jobs.'),
+    ('items_completed_total', 'Number of results of completed batch jobs.'),
+    ('request_retries_total', 'Number of retries of requests for batch jobs.'),
+    ('payload_bytes_total', 'Size of request and response bodies of batch jobs in bytes.'),
+)
+_COUNTED_EVENTS = {JOB_SUBMITTED: 'jobs_submitted_total', JOB_COMPLETED: 'jobs_completed_total',
+                   JOB_FAILED: 'jobs_failed_total', JOB_POLLED: 'job_polls_total'}
+
+
+class PrometheusExporter:
+
+    def __init__(self, namespace: str = 'geobatchpy',
+                 buckets: Iterable[float] = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)):
+        """Listener aggregating job events into Prometheus metrics.
+
+        Counters and the histogram of turnaround times are labeled by API; request durations are summarized by API
+        and request type, `submit` or `poll`.
+
+        Arguments:
+            namespace: prefix of all metric names.
+            buckets: upper bounds in seconds of the buckets of the turnaround time histogram.
+        """
+        self._namespace = namespace
+        self._buckets = sorted(buckets)
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = Counter()
+        self._turnarounds: Dict[str, List[float]] = dict()  # Per API: bucket counts, then sum
+        self._requests: Dict[Tuple[str, str], List[float]] = dict()  # Per API and request: count and sum
+        self._lock = Lock()
+
+    def __call__(self, event: JobEvent) -> None:
+        api = '' if event.api is None else event.api
+        with self._lock:
+            self._counters[_COUNTED_EVENTS[event.name], (('api', api),)] += 1
+            if event.retries > 0:
+                self._counters['request_retries_total', (('api', api),)] += event.retries
+            if event.payload_bytes is not None and event.name != JOB_COMPLETED:  # Counted with the poll already
+                direction = 'sent' if event.name == JOB_SUBMITTED else 'received'
+                self._counters['payload_bytes_total', (('api', api), ('direction', direction))] += event.payload_bytes
+            if event.name == JOB_COMPLETED:
+                if event.number_of_items is not None:
+                    self._counters['items_completed_total', (('api', api),)] += event.number_of_items
+                if event.duration is not None:
+                    self._observe_turnaround(api=api, duration=event.duration)
+            if event.duration is not None and event.name in (JOB_SUBMITTED, JOB_POLLED):
+                request = 'submit' if event.name == JOB_SUBMITTED else 'poll'
+                summary = self._requests.setdefault((api, request), [0, 0.])
+                summary[0] += 1
+                summary[1] += event.duration
+
+    def _observe_turnaround(self, api: str, duration: float) -> None:
+        histogram = self._turnarounds.setdefault(api, [0] * (len(self._buckets) + 1) + [0.])
+        for k, bound in enumerate(self._buckets):
+            if duration <= bound:
+                histogram[k] += 1
+        histogram[len(self._buckets)] += 1  # +Inf
+        histogram[-1] += duration
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        prefix = self._namespace + '_'
+        lines = []
+        with self._lock:
+            for name, description in _COUNTERS:
+                lines.extend([f'# HELP {prefix}{name} {description}', f'# TYPE {prefix}{name} counter'])
+                lines.extend(f'{prefix}{name}{_labels(labels)} {_number(value)}'
+                             for (metric, labels), value in sorted(self._counters.items()) if metric == name)
+
+            name = prefix + 'job_turnaround_seconds'
+            lines.extend([f'# HELP {name} Seconds from the start of monitoring to the results of batch jobs.',
+                          f'# TYPE {name} histogram'])
+            for api, histogram in sorted(self._turnarounds.items()):
+                for bound, count in zip(self._buckets + ['+Inf'], histogram):
+                    lines.append(f'{name}_bucket{_labels((("api", api), ("le", _number(bound))))} {count}')
+                lines.append(f'{name}_sum{_labels((("api", api),))} {_number(histogram[-1])}')
+                lines.append(f'{name}_count{_labels((("api", api),))} {histogram[len(self._buckets)]}')
+
+            name = prefix + 'request_duration_seconds'
+            lines.extend([f'# HELP {name} Seconds per request creating or polling batch jobs.',
+                          f'# TYPE {name} summary'])
+            for (api, request), (count, total) in sorted(self._requests.items()):
+                labels = _labels((('api', api), ('request', request)))
+                lines.extend([f'{name}_sum{labels} {_number(total)}', f'{name}_count{labels} {count}'])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file_path: Union[str, Path]) -> None:
+        """Atomically writes all metrics to a file, e.g., for the textfile collector of the node exporter."""
+        file_path = Path(file_path)
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, file_path)
+
+
+def _labels(labels: Iterable[Tuple[str, str]]) -> str:
+    escaped = (f'{key}="{_escape(value)}"' for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: Union[int, float, str]) -> str:
+    if isinstance(value, str):
+        return value
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
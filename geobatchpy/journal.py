@@ -0,0 +1,118 @@
+"""Durable journal of batch jobs.
+
+Batch processing of large inputs can take hours. A JobJournal records every submitted job and every downloaded result
+in a local SQLite file as soon as they arrive. If the process dies, a restarted run with the same journal skips
+submitting jobs that already exist and downloading results that are already stored, and only polls the jobs that are
+still unfinished.
+"""
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Union
+
+from geobatchpy import codec
+
+
+class JobJournal:
+
+    def __init__(self, file_path: Union[str, Path], fingerprint: str = None):
+        """Opens or creates a journal.
+
+        Arguments:
+            file_path: path to the SQLite file.
+            fingerprint: optional identifier of the run, see JobJournal.fingerprint. Opening an existing journal with a
+                different fingerprint raises a ValueError, which protects against resuming the wrong run.
+        """
+        self._file_path = Path(file_path)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(str(self._file_path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS jobs (url TEXT PRIMARY KEY, job INTEGER, '
+                                     'start INTEGER, stop INTEGER, results TEXT)')
+            if fingerprint is not None:
+                row = self._connection.execute('SELECT value FROM meta WHERE key = ?', ('fingerprint',)).fetchone()
+                if row is None:
+                    self._connection.execute('INSERT INTO meta VALUES (?, ?)', ('fingerprint', fingerprint))
+                elif row[0] != fingerprint:
+                    raise ValueError(f'Journal \'{file_path}\' belongs to a different run.')
+
+    @staticmethod
+    def fingerprint(api: str, params: Union[dict, None], batch_len: Union[int, None], inputs: List[Any]) -> str:
+        """Identifies a run by its API, parameters, batch size, and inputs.
+
+        Returns:
+            Hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([api, params, batch_len], sort_keys=True, default=str).encode())
+        for val in inputs:
+            digest.update(json.dumps(val, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get_meta(self, key: str) -> Union[str, None]:
+        """Returns a stored attribute of the run or None if not stored."""
+        with self._lock:
+            row = self._connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Stores an attribute of the run, e.g., a batch size chosen automatically."""
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def record_submission(self, job: int, start: int, stop: int, url: str) -> None:
+        """Records a submitted batch job.
+
+        Arguments:
+            job: index of the batch.
+            start: index of the first input of the batch.
+            stop: index after the last input of the batch.
+            url: batch job URL.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR IGNORE INTO jobs (url) VALUES (?)', (url,))
+            self._connection.execute('UPDATE jobs SET job = ?, start = ?, stop = ? WHERE url = ?',
+                                     (job, start, stop, url))
+
+    def submitted_urls(self) -> Dict[int, str]:
+        """Returns the URLs of all submitted batch jobs by index of the batch."""
+        with self._lock:
+            return dict(self._connection.execute('SELECT job, url FROM jobs WHERE job IS NOT NULL').fetchall())
+
+    def record_results(self, url: str, results: List[dict]) -> None:
+        """Stores the results of a completed batch job.
+
+        Arguments:
+            url: batch job URL.
+            results: results of the batch job.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR IGNORE INTO jobs (url) VALUES (?)', (url,))
+            self._connection.execute('UPDATE jobs SET results = ? WHERE url = ?', (codec.dumps(results), url))
+
+    def completed_urls(self) -> List[str]:
+        """Returns the URLs of all batch jobs with stored results."""
+        with self._lock:
+            return [row[0] for row in self._connection.execute('SELECT url FROM jobs WHERE results IS NOT NULL')]
+
+    def get_results(self, url: str) -> Union[List[dict], None]:
+        """Returns the stored results of a batch job or None if not completed yet.
+
+        Arguments:
+            url: batch job URL.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT results FROM jobs WHERE url = ?', (url,)).fetchone()
+        return None if row is None or row[0] is None else codec.loads(row[0])
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,392 @@
+"""Compact route matrices.
+
+In JSON, a route matrix result holds one dictionary per pair of source and target, which adds up to gigabytes of
+memory for matrices with millions of cells. A RouteMatrix stores distances and travel times in two contiguous arrays of
+8-byte floats instead: NumPy arrays if NumPy is installed, `array('d')` otherwise. Missing values, e.g., of targets
+which cannot be reached, are NaN. The JSON form is built lazily and only on request.
+
+An IncrementalRouteMatrix grows a route matrix as locations are added and only requests the pairs of sources and
+targets which are missing. Adding k locations to a matrix of N locations costs O(N * k) instead of O((N + k) ** 2)
+cells. It is saved as a small JSON header with the locations and the shape, plus a binary file next to it holding the
+distances and travel times as little-endian 8-byte floats.
+"""
+import math
+import numbers
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple, Union
+
+from geobatchpy import codec
+
+if TYPE_CHECKING:
+    from geobatchpy.client import Client
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_RESERVED_KEYS = ('sources', 'targets', 'sources_to_targets')
+
+
+class RouteMatrix:
+
+    def __init__(self, number_of_sources: int, number_of_targets: int, use_numpy: bool = None):
+        """Route matrix with all distances and travel times missing, to be filled with `set_tile`.
+
+        Use `RouteMatrix.from_json` to convert a complete route matrix result.
+
+        Arguments:
+            number_of_sources: number of rows.
+            number_of_targets: number of columns.
+            use_numpy: store values in NumPy arrays. Defaults to True if NumPy is installed.
+        """
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise ValueError('NumPy is not installed.')
+        self._use_numpy = use_numpy
+        self._shape = (number_of_sources, number_of_targets)
+        self.sources: List[Union[dict, None]] = [None] * number_of_sources
+        self.targets: List[Union[dict, None]] = [None] * number_of_targets
+        self.attributes: Dict[str, Any] = dict()
+        self._distance = self._nan_storage()
+        self._time = self._nan_storage()
+
+    @classmethod
+    def from_json(cls, result: dict, use_numpy: bool = None) -> 'RouteMatrix':
+        """Converts a route matrix result of the Geoapify API.
+
+        Arguments:
+            result: a result of Client.route_matrix.
+            use_numpy: store values in NumPy arrays. Defaults to True if NumPy is installed.
+
+        Returns:
+            The compact route matrix.
+        """
+        if 'sources_to_targets' not in result:
+            raise ValueError(f'Not a route matrix result: {result}')
+        matrix = cls(number_of_sources=len(result['sources']), number_of_targets=len(result['targets']),
+                     use_numpy=use_numpy)
+        matrix.set_tile(result=result)
+        return matrix
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Number of sources and number of targets."""
+        return self._shape
+
+    @property
+    def distance(self):
+        """Distances as a 2-dimensional NumPy array or as an `array('d')` in row-major order."""
+        return self._distance
+
+    @property
+    def time(self):
+        """Travel times as a 2-dimensional NumPy array or as an `array('d')` in row-major order."""
+        return self._time
+
+    @property
+    def nbytes(self) -> int:
+        """Memory in bytes occupied by distances and travel times."""
+        return 2 * self._shape[0] * self._shape[1] * 8
+
+    def set_tile(self, result: dict, source_offset: int = 0, target_offset: int = 0, transpose: bool = False) -> None:
+        """Copies a route matrix result of a subset of sources and targets into this matrix.
+
+        Arguments:
+            result: route matrix result of a tile.
+            source_offset: index of the first source of the tile in this matrix.
+            target_offset: index of the first target of the tile in this matrix.
+            transpose: if True, sources of the tile are targets of this matrix and vice versa.
+        """
+        self.attributes.update((key, val) for key, val in result.items() if key not in _RESERVED_KEYS)
+        sources, targets = result['sources'], result['targets']
+        if transpose:
+            sources, targets = targets, sources
+        self.sources[source_offset:source_offset + len(sources)] = sources
+        self.targets[target_offset:target_offset + len(targets)] = targets
+
+        lines = result['sources_to_targets']
+        rows = [[line[r] for line in lines] for r in range(len(sources))] if transpose else lines
+        for r, row in enumerate(rows):
+            self._set_row_slice(self._distance, source_offset + r, target_offset, [_value(c, 'distance') for c in row])
+            self._set_row_slice(self._time, source_offset + r, target_offset, [_value(c, 'time') for c in row])
+
+    def set_matrix(self, matrix: 'RouteMatrix', source_offset: int = 0, target_offset: int = 0) -> None:
+        """Copies another route matrix into this matrix.
+
+        Arguments:
+            matrix: route matrix of a subset of sources and targets.
+            source_offset: index of the first source of `matrix` in this matrix.
+            target_offset: index of the first target of `matrix` in this matrix.
+        """
+        self.attributes.update(matrix.attributes)
+        self.sources[source_offset:source_offset + len(matrix.sources)] = matrix.sources
+        self.targets[target_offset:target_offset + len(matrix.targets)] = matrix.targets
+        for r in range(matrix.shape[0]):
+            self._set_row_slice(self._distance, source_offset + r, target_offset, matrix._row(matrix._distance, r))
+            self._set_row_slice(self._time, source_offset + r, target_offset, matrix._row(matrix._time, r))
+
+    def resize(self, number_of_sources: int, number_of_targets: int) -> 'RouteMatrix':
+        """Returns a copy with more sources and targets, which are missing all values."""
+        if number_of_sources < self._shape[0] or number_of_targets < self._shape[1]:
+            raise ValueError(f'Cannot shrink a route matrix of shape {self._shape}.')
+        matrix = RouteMatrix(number_of_sources=number_of_sources, number_of_targets=number_of_targets,
+                             use_numpy=self._use_numpy)
+        matrix.set_matrix(self)
+        return matrix
+
+    def __getitem__(self, key) -> Union[Tuple[float, float], 'RouteMatrix']:
+        """Returns (distance, time) of a single cell or a sub-matrix.
+
+        Examples: `matrix[2, 5]` returns a tuple, `matrix[:10]`, `matrix[:, 3:8]`, and `matrix[4]` return a
+        RouteMatrix. Integer indices of a sub-matrix are kept as a row or column of length 1.
+        """
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        if isinstance(rows, numbers.Integral) and isinstance(cols, numbers.Integral):
+            i, j = _index(rows, self._shape[0]), _index(cols, self._shape[1])
+            if self._use_numpy:
+                return float(self._distance[i, j]), float(self._time[i, j])
+            return self._distance[i * self._shape[1] + j], self._time[i * self._shape[1] + j]
+
+        rows, cols = _as_slice(rows, self._shape[0]), _as_slice(cols, self._shape[1])
+        row_range, col_range = range(self._shape[0])[rows], range(self._shape[1])[cols]
+        sub = RouteMatrix(number_of_sources=len(row_range), number_of_targets=len(col_range),
+                          use_numpy=self._use_numpy)
+        sub.sources = [self.sources[i] for i in row_range]
+        sub.targets = [self.targets[j] for j in col_range]
+        sub.attributes = dict(self.attributes)
+        if self._use_numpy:
+            sub._distance = self._distance[rows, cols].copy()
+            sub._time = self._time[rows, cols].copy()
+        else:
+            sub._distance, sub._time = array('d'), array('d')
+            for i in row_range:
+                offset = i * self._shape[1]
+                if col_range.step == 1:
+                    sub._distance.extend(self._distance[offset + col_range.start:offset + col_range.stop])
+                    sub._time.extend(self._time[offset + col_range.start:offset + col_range.stop])
+                else:
+                    sub._distance.extend(self._distance[offset + j] for j in col_range)
+                    sub._time.extend(self._time[offset + j] for j in col_range)
+        return sub
+
+    def iter_rows(self) -> Iterator[List[dict]]:
+        """Yields the rows of `sources_to_targets` in the JSON form, one at a time."""
+        for i in range(self._shape[0]):
+            row = []
+            for j in range(self._shape[1]):
+                distance, time = self[i, j]
+                row.append({'distance': None if math.isnan(distance) else distance,
+                            'time': None if math.isnan(time) else time, 'source_index': i, 'target_index': j})
+            yield row
+
+    def to_dict(self) -> dict:
+        """Returns the route matrix in the JSON form of the Geoapify API.
+
+        Missing values are None. Values are floats, even if the API returned integers.
+        """
+        return {**self.attributes, 'sources': list(self.sources), 'targets': list(self.targets),
+                'sources_to_targets': list(self.iter_rows())}
+
+    def __repr__(self):
+        return f'RouteMatrix(shape={self._shape}, numpy={self._use_numpy})'
+
+    def _nan_storage(self):
+        if self._use_numpy:
+            return np.full(self._shape, np.nan)
+        return array('d', [math.nan]) * (self._shape[0] * self._shape[1])
+
+    def _row(self, storage, i: int):
+        if self._use_numpy:
+            return storage[i]
+        return storage[i * self._shape[1]:(i + 1) * self._shape[1]]
+
+    def _set_row_slice(self, storage, i: int, j: int, values: List[float]) -> None:
+        if self._use_numpy:
+            storage[i, j:j + len(values)] = values
+        else:
+            offset = i * self._shape[1] + j
+            storage[offset:offset + len(values)] = array('d', values)
+
+
+class IncrementalRouteMatrix:
+
+    def __init__(self, client: 'Client', travel_mode: str = 'drive', file_path: Union[str, Path] = None,
+                 tile_size: int = None, max_workers: int = 10, use_numpy: bool = None):
+        """Route matrix which fetches only the missing pairs of sources and targets when locations are added.
+
+        Add locations with `add_locations`, `add_sources`, or `add_targets` and call `update` to fetch what is
+        missing. Existing sources and targets keep their indices.
+
+        Arguments:
+            client: client used to request route matrices.
+            travel_mode: one of 'drive', 'truck', 'walk', 'bicycle'.
+            file_path: optional path to a JSON file. If it exists, the matrix is loaded from it, and every update is
+                saved to it. Distances and travel times are stored next to it, in a binary file with suffix '.bin'
+                appended to the name.
+            tile_size: see Client.route_matrix.
+            max_workers: see Client.route_matrix.
+            use_numpy: store values in NumPy arrays. Defaults to True if NumPy is installed.
+        """
+        self._client = client
+        self._travel_mode = travel_mode
+        self._file_path = None if file_path is None else Path(file_path)
+        self._tile_size = tile_size
+        self._max_workers = max_workers
+        self.source_geocodes: List[Tuple[float, float]] = []
+        self.target_geocodes: List[Tuple[float, float]] = []
+        self._matrix = RouteMatrix(number_of_sources=0, number_of_targets=0, use_numpy=use_numpy)
+        if self._file_path is not None and self._file_path.exists():
+            self._load()
+
+    @property
+    def matrix(self) -> RouteMatrix:
+        """Route matrix as of the last update."""
+        return self._matrix
+
+    def add_sources(self, geocodes: List[Tuple[float, float]]) -> None:
+        """Appends (lon, lat) tuples of source locations."""
+        self.source_geocodes.extend(tuple(geocode) for geocode in geocodes)
+
+    def add_targets(self, geocodes: List[Tuple[float, float]]) -> None:
+        """Appends (lon, lat) tuples of target locations."""
+        self.target_geocodes.extend(tuple(geocode) for geocode in geocodes)
+
+    def add_locations(self, geocodes: List[Tuple[float, float]]) -> None:
+        """Appends (lon, lat) tuples of locations, which are both sources and targets."""
+        self.add_sources(geocodes)
+        self.add_targets(geocodes)
+
+    def update(self) -> RouteMatrix:
+        """Fetches all missing pairs of sources and targets and saves the matrix if a file path is set.
+
+        Returns:
+            Route matrix of all sources and targets.
+        """
+        number_of_sources, number_of_targets = self._matrix.shape
+        sources, targets = self.source_geocodes, self.target_geocodes
+        if (number_of_sources, number_of_targets) == (len(sources), len(targets)):
+            return self._matrix
+
+        matrix = self._matrix.resize(number_of_sources=len(sources), number_of_targets=len(targets))
+        if number_of_sources > 0 and len(targets) > number_of_targets:
+            matrix.set_matrix(self._fetch(sources[:number_of_sources], targets[number_of_targets:]),
+                              target_offset=number_of_targets)
+        if len(sources) > number_of_sources and len(targets) > 0:
+            matrix.set_matrix(self._fetch(sources[number_of_sources:], targets), source_offset=number_of_sources)
+        self._matrix = matrix
+
+        if self._file_path is not None:
+            self.save(self._file_path)
+        return matrix
+
+    def save(self, file_path: Union[str, Path]) -> None:
+        """Writes sources, targets, and the route matrix as of the last update to a JSON file and a binary file.
+
+        The binary file has suffix '.bin' appended to the name of the JSON file and holds all distances followed by
+        all travel times, row by row.
+        """
+        matrix = self._matrix
+        number_of_sources, number_of_targets = matrix.shape
+        header = {
+            'travel_mode': self._travel_mode,
+            'shape': [number_of_sources, number_of_targets],
+            'source_geocodes': self.source_geocodes[:number_of_sources],
+            'target_geocodes': self.target_geocodes[:number_of_targets],
+            'sources': matrix.sources,
+            'targets': matrix.targets,
+            'attributes': matrix.attributes
+        }
+        file_path = Path(file_path)
+        # The header is replaced last, so a header always describes a complete binary file:
+        data_path = _data_path(file_path)
+        tmp_path = data_path.with_name(data_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            for storage in (matrix.distance, matrix.time):
+                _write_values(storage, f)
+        os.replace(tmp_path, data_path)
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(codec.dumps(header))
+        os.replace(tmp_path, file_path)
+
+    def _load(self) -> None:
+        with open(self._file_path, 'rb') as f:
+            header = codec.loads(f.read())
+        if header['travel_mode'] != self._travel_mode:
+            raise ValueError(f'Route matrix \'{self._file_path}\' has travel mode \'{header["travel_mode"]}\', '
+                             f'not \'{self._travel_mode}\'.')
+        self.source_geocodes = [tuple(geocode) for geocode in header['source_geocodes']]
+        self.target_geocodes = [tuple(geocode) for geocode in header['target_geocodes']]
+        matrix = RouteMatrix(number_of_sources=header['shape'][0], number_of_targets=header['shape'][1],
+                             use_numpy=self._matrix._use_numpy)
+        matrix.sources = header['sources']
+        matrix.targets = header['targets']
+        matrix.attributes = header['attributes']
+        data_path = _data_path(self._file_path)
+        with open(data_path, 'rb') as f:
+            for storage in (matrix.distance, matrix.time):
+                _read_values(storage, f, path=data_path)
+        self._matrix = matrix
+
+    def _fetch(self, source_geocodes: List[Tuple[float, float]],
+               target_geocodes: List[Tuple[float, float]]) -> RouteMatrix:
+        return self._client.route_matrix(source_geocodes=source_geocodes, target_geocodes=target_geocodes,
+                                         travel_mode=self._travel_mode, tile_size=self._tile_size,
+                                         max_workers=self._max_workers, compact=True)
+
+
+def _data_path(file_path: Path) -> Path:
+    return file_path.with_name(file_path.name + '.bin')
+
+
+def _write_values(storage, f) -> None:
+    """Writes the values of a storage to a binary file as little-endian 8-byte floats."""
+    if np is not None and isinstance(storage, np.ndarray):
+        storage.astype('<f8', copy=False).tofile(f)
+    elif sys.byteorder == 'little':
+        storage.tofile(f)
+    else:
+        swapped = array('d', storage)
+        swapped.byteswap()
+        swapped.tofile(f)
+
+
+def _read_values(storage, f, path: Path) -> None:
+    """Fills a storage with values read from a binary file written by `_write_values`."""
+    if np is not None and isinstance(storage, np.ndarray):
+        values = np.fromfile(f, dtype='<f8', count=storage.size)
+        if values.size < storage.size:
+            raise ValueError(f'Route matrix data \'{path}\' is incomplete.')
+        storage[:] = values.reshape(storage.shape)
+        return
+    values = array('d')
+    try:
+        values.fromfile(f, len(storage))
+    except EOFError as e:
+        raise ValueError(f'Route matrix data \'{path}\' is incomplete.') from e
+    if sys.byteorder != 'little':
+        values.byteswap()
+    storage[:] = values
+
+
+def _value(cell: Union[dict, None], key: str) -> float:
+    value = None if cell is None else cell.get(key)
+    return math.nan if value is None else value
+
+
+def _index(i: int, length: int) -> int:
+    if not -length <= i < length:
+        raise IndexError(f'Index {i} out of range for length {length}.')
+    return int(i) % length
+
+
+def _as_slice(key: Union[int, slice], length: int) -> slice:
+    if isinstance(key, numbers.Integral):
+        i = _index(key, length)
+        return slice(i, i + 1)
+    return key
@@ -0,0 +1,112 @@
+"""Scheduling of GET requests for pending batch jobs.
+
+Batch jobs of similar size on the same API tend to take a similar amount of time. The PollScheduler learns these
+turnaround times from completed jobs, waits until a job is expected to be done, and backs off exponentially while it
+is still pending. Servers can overrule the schedule with a `Retry-After` header.
+"""
+import math
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Dict, Hashable, Tuple, Union
+
+
+class PollScheduler:
+
+    def __init__(self, min_delay: float = 1., max_delay: float = 300., backoff: float = 1.5,
+                 smoothing: float = 0.3):
+        """Adaptive per job poll schedule.
+
+        Arguments:
+            min_delay: minimal time in seconds between two GET requests for a single job.
+            max_delay: maximal time in seconds between two GET requests for a single job.
+            backoff: factor by which the delay grows with every GET request of a pending job.
+            smoothing: weight of the latest observation in the exponential moving average of turnaround times.
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._backoff = backoff
+        self._smoothing = smoothing
+        self._estimates: Dict[Hashable, float] = dict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(api: str = None, batch_len: int = None) -> Tuple[Union[str, None], Union[int, None]]:
+        """Groups jobs by API and batch size, rounded up to the next power of two.
+
+        Arguments:
+            api: name of the batch enabled API or None if unknown.
+            batch_len: number of inputs per job or None if unknown.
+
+        Returns:
+            Hashable key of the group.
+        """
+        size_class = None if batch_len is None else 2 ** math.ceil(math.log2(max(batch_len, 1)))
+        return api, size_class
+
+    def expected_duration(self, key: Hashable) -> Union[float, None]:
+        """Returns the learned turnaround time in seconds of jobs of a group or None if not known yet."""
+        with self._lock:
+            return self._estimates.get(key)
+
+    def record_completion(self, key: Hashable, duration: float) -> None:
+        """Updates the learned turnaround time of a group with the duration of a completed job.
+
+        Arguments:
+            key: group of the job, see PollScheduler.key.
+            duration: time in seconds between the start of monitoring and the completion of the job.
+        """
+        with self._lock:
+            estimate = self._estimates.get(key)
+            if estimate is None:
+                self._estimates[key] = duration
+            else:
+                self._estimates[key] = (1 - self._smoothing) * estimate + self._smoothing * duration
+
+    def next_delay(self, key: Hashable, attempt: int, elapsed: float, retry_after: float = None,
+                   max_delay: float = None) -> float:
+        """Returns the time in seconds to wait before the next GET request of a pending job.
+
+        Arguments:
+            key: group of the job, see PollScheduler.key.
+            attempt: number of GET requests so far that found the job pending, starting at 0.
+            elapsed: time in seconds since the start of monitoring the job.
+            retry_after: delay in seconds requested by the server, which takes precedence.
+            max_delay: optional job specific upper bound, replacing the scheduler's `max_delay`.
+
+        Returns:
+            Delay in seconds.
+        """
+        max_delay = self.max_delay if max_delay is None else max(max_delay, self.min_delay)
+        if retry_after is not None:
+            return max(retry_after, self.min_delay)
+
+        expected = self.expected_duration(key=key)
+        if expected is not None and expected - elapsed > self.min_delay:
+            return min(expected - elapsed, max_delay)
+
+        return min(max_delay, self.min_delay * self._backoff ** attempt)
+
+
+def parse_retry_after(value: Union[str, None]) -> Union[float, None]:
+    """Parses the value of a `Retry-After` header, given either in seconds or as an HTTP date.
+
+    Arguments:
+        value: header value or None.
+
+    Returns:
+        Delay in seconds or None if not provided or not understood.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0., float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0., (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,169 @@
+"""Client side rate limiting.
+
+A RateLimiter sits in front of all HTTP calls of a Transport. It holds one token bucket per endpoint group, so that,
+e.g., single calls and GET requests of batch jobs can be throttled independently to stay within the limits of your
+Geoapify plan. In adaptive mode, the limiter lowers the rate of a group when the server responds with 429 (Too Many
+Requests), at most once per refill interval or Retry-After window, and slowly recovers to the configured rate while
+responses are successful.
+
+Waiting for tokens never blocks an asyncio event loop: the clients of geobatchpy.aio, like custom coroutines, use
+`acquire_async`.
+"""
+import asyncio
+import time
+from threading import Lock
+from typing import Dict
+
+GROUP_SINGLE = 'single'
+GROUP_BATCH_POST = 'batch_post'
+GROUP_BATCH_POLL = 'batch_poll'
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float = None):
+        """Thread-safe and asyncio-safe token bucket.
+
+        Tokens are refilled continuously at `rate` tokens per second, up to `capacity`. Every request consumes one
+        token and waits if the bucket is empty.
+
+        Arguments:
+            rate: sustained number of requests per second.
+            capacity: maximal burst size. Defaults to `max(1, rate)`, which follows changes of the rate.
+        """
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive, got {rate}.')
+        self._rate = rate
+        self._fixed_capacity = capacity
+        self._capacity = max(1., rate) if capacity is None else capacity
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._lock = Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float) -> None:
+        """Changes the rate, keeping the tokens collected so far up to the capacity at the new rate."""
+        with self._lock:
+            self._refill()
+            self._rate = rate
+            if self._fixed_capacity is None:
+                self._capacity = max(1., rate)
+                self._tokens = min(self._tokens, self._capacity)
+
+    def drain(self) -> None:
+        """Removes all tokens, so the next request waits for a full refill interval."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def _try_acquire(self, tokens: float) -> float:
+        """Consumes `tokens` tokens and returns 0 if available, otherwise returns the time to wait."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.
+            return (tokens - self._tokens) / self._rate
+
+    def acquire(self, tokens: float = 1.) -> None:
+        """Blocks until `tokens` tokens are available and consumes them.
+
+        Arguments:
+            tokens: number of tokens to consume.
+        """
+        wait_time = self._try_acquire(tokens)
+        while wait_time > 0:
+            time.sleep(wait_time)
+            wait_time = self._try_acquire(tokens)
+
+    async def acquire_async(self, tokens: float = 1.) -> None:
+        """Waits without blocking the event loop until `tokens` tokens are available and consumes them.
+
+        Arguments:
+            tokens: number of tokens to consume.
+        """
+        wait_time = self._try_acquire(tokens)
+        while wait_time > 0:
+            await asyncio.sleep(wait_time)
+            wait_time = self._try_acquire(tokens)
+
+
+class RateLimiter:
+
+    def __init__(self, single: float = None, batch_post: float = None, batch_poll: float = None,
+                 adaptive: bool = False, decrease_factor: float = 0.5, min_rate: float = 0.1):
+        """Token bucket rate limits per endpoint group.
+
+        Groups without a rate are not limited.
+
+        Arguments:
+            single: requests per second of single-call endpoints.
+            batch_post: requests per second creating batch jobs.
+            batch_poll: requests per second monitoring batch jobs.
+            adaptive: if True, the rate of a group is multiplied by `decrease_factor` with a 429 response and
+                recovers additively by 5% of the configured rate with every other response. Requests in flight
+                when the rate drops see the same overload, so further 429 responses within one refill interval
+                of the lowered rate, or within the Retry-After window of the server, do not lower it again.
+            decrease_factor: factor applied to the rate when the server responds with 429.
+            min_rate: lower bound of the rate in adaptive mode.
+        """
+        self._configured: Dict[str, float] = {
+            group: rate for group, rate in ((GROUP_SINGLE, single), (GROUP_BATCH_POST, batch_post),
+                                            (GROUP_BATCH_POLL, batch_poll)) if rate is not None
+        }
+        self._buckets = {group: TokenBucket(rate=rate) for group, rate in self._configured.items()}
+        self._adaptive = adaptive
+        self._decrease_factor = decrease_factor
+        self._min_rate = min_rate
+        self._cooldown_until: Dict[str, float] = dict()
+        self._lock = Lock()
+
+    def rate(self, group: str) -> float:
+        """Returns the current rate of a group or None if not limited."""
+        bucket = self._buckets.get(group)
+        return None if bucket is None else bucket.rate
+
+    def acquire(self, group: str) -> None:
+        """Blocks until a request of the group may be sent."""
+        bucket = self._buckets.get(group)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def acquire_async(self, group: str) -> None:
+        """Waits without blocking the event loop until a request of the group may be sent."""
+        bucket = self._buckets.get(group)
+        if bucket is not None:
+            await bucket.acquire_async()
+
+    def report(self, group: str, status_code: int, retry_after: float = None) -> None:
+        """Adapts the rate of a group to the status code of a response, if in adaptive mode.
+
+        Arguments:
+            group: endpoint group of the request.
+            status_code: status code of the response.
+            retry_after: optional seconds to wait before retrying, from the Retry-After header of the response.
+        """
+        bucket = self._buckets.get(group)
+        if bucket is None or not self._adaptive:
+            return
+        configured = self._configured[group]
+        if status_code == 429:
+            bucket.drain()
+            with self._lock:
+                now = time.monotonic()
+                if now < self._cooldown_until.get(group, 0.):
+                    return
+                rate = max(self._min_rate, bucket.rate * self._decrease_factor)
+                bucket.set_rate(rate)
+                # Time of the last decrease plus the wait for which responses may still reflect the previous rate:
+                self._cooldown_until[group] = now + max(1. / rate, 0. if retry_after is None else retry_after)
+        elif bucket.rate < configured:
+            bucket.set_rate(min(configured, bucket.rate + 0.05 * configured))
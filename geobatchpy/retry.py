@@ -0,0 +1,74 @@
+"""Retries of failed HTTP requests.
+
+Connection resets, timeouts, and responses like 502 Bad Gateway are usually transient. A RetryPolicy tells the
+Transport which failures to retry and how long to wait in between: exponential backoff with full jitter, bounded by
+a maximal number of attempts and a maximal elapsed time. Requests which are not idempotent, like creating a batch job,
+are only retried if the server certainly did not process them.
+"""
+import random
+from collections import Counter
+from threading import Lock
+from typing import Dict, Iterable
+
+import requests
+
+
+class RetryPolicy:
+
+    def __init__(self, max_attempts: int = 5, backoff_factor: float = 0.5, max_backoff: float = 60.,
+                 max_elapsed: float = 300., jitter: bool = True,
+                 retry_statuses: Iterable[int] = (429, 500, 502, 503, 504), retry_non_idempotent: bool = False):
+        """Retry policy of a Transport.
+
+        Arguments:
+            max_attempts: maximal number of attempts per request, including the first one.
+            backoff_factor: the n-th retry waits up to `backoff_factor * 2 ** n` seconds.
+            max_backoff: upper bound of the wait time in seconds between two attempts.
+            max_elapsed: no retry is started if it would end later than `max_elapsed` seconds after the first attempt.
+            jitter: if True, wait times are drawn uniformly between 0 and the exponential backoff.
+            retry_statuses: status codes of responses to retry.
+            retry_non_idempotent: if True, non-idempotent requests are retried like idempotent ones.
+        """
+        self.max_attempts = max_attempts
+        self.max_elapsed = max_elapsed
+        self._backoff_factor = backoff_factor
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._retry_statuses = frozenset(retry_statuses)
+        self._retry_non_idempotent = retry_non_idempotent
+        self._retries: Dict[str, int] = Counter()
+        self._lock = Lock()
+
+    @property
+    def retries(self) -> Dict[str, int]:
+        """Number of retries per endpoint."""
+        with self._lock:
+            return dict(self._retries)
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._retries[endpoint] += 1
+
+    def backoff(self, attempt: int) -> float:
+        """Returns the time in seconds to wait before the retry following the `attempt`-th attempt, starting at 0."""
+        backoff = min(self._max_backoff, self._backoff_factor * 2 ** attempt)
+        return random.uniform(0, backoff) if self._jitter else backoff
+
+    def should_retry_status(self, status_code: int, idempotent: bool) -> bool:
+        """Tells if a response with the given status code is to be retried.
+
+        A 429 response means the server rejected the request, so it is safe to retry even if not idempotent.
+        """
+        if status_code not in self._retry_statuses:
+            return False
+        return idempotent or self._retry_non_idempotent or status_code == 429
+
+    def should_retry_error(self, error: requests.exceptions.RequestException, idempotent: bool) -> bool:
+        """Tells if a request which failed with the given exception is to be retried.
+
+        Timeouts while connecting mean the request never reached the server, so it is safe to retry even if not
+        idempotent.
+        """
+        if not isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return False
+        return idempotent or self._retry_non_idempotent or isinstance(error, requests.exceptions.ConnectTimeout)
@@ -0,0 +1,179 @@
+"""Adaptive sizing of batch jobs.
+
+Smaller batches finish quicker on the server, but every additional job costs a POST request and adds to the load of
+your Geoapify plan. A BatchSizer learns per API how long jobs of a given size take to complete and how long it takes to
+create a job, and picks the batch size with the shortest expected end-to-end time for a given number of inputs:
+
+    number of jobs * time to create a job + expected turnaround time of a job of that size
+
+Turnaround times of sizes without observations are interpolated by a linear fit over the observed sizes. Observations
+are kept in a small JSON file, so that every run benefits from the previous ones. Use `batch_len='auto'` in the
+methods of BatchClient to choose batch sizes this way.
+"""
+import logging
+import math
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple, Union
+
+from geobatchpy import codec
+
+_VERSION = 1
+
+
+def default_file_path() -> Path:
+    """Returns the default location of batch size observations, inside the user's cache directory."""
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    cache_home = Path.home() / '.cache' if cache_home is None else Path(cache_home)
+    return cache_home / 'geobatchpy' / 'batch_sizes.json'
+
+
+class BatchSizer:
+
+    def __init__(self, file_path: Union[str, Path] = None, candidates: Iterable[int] = (50, 100, 200, 500, 1000),
+                 default_batch_len: int = 1000, submission_time: float = 0.1, smoothing: float = 0.3):
+        """Chooses batch sizes from observed turnaround times of batch jobs.
+
+        Arguments:
+            file_path: optional JSON file to load observations from and to save them to. If None, observations are
+                kept in memory only.
+            candidates: batch sizes to choose from. A single batch holding all inputs is always a candidate, too.
+            default_batch_len: batch size used as long as there are no observations for an API.
+            submission_time: assumed time in seconds to create a job as long as there are no observations.
+            smoothing: weight of the latest observation in the exponential moving averages.
+        """
+        self._file_path = None if file_path is None else Path(file_path)
+        self._candidates = sorted(set(max(min(int(val), 1000), 2) for val in candidates))
+        self._default_batch_len = default_batch_len
+        self._submission_time = submission_time
+        self._smoothing = smoothing
+        self._turnarounds: Dict[str, Dict[int, float]] = dict()
+        self._submission_times: Dict[str, float] = dict()
+        self._dirty = False
+        self._lock = Lock()
+        self._logger = logging.getLogger(__name__)
+        if self._file_path is not None and self._file_path.exists():
+            self._load()
+
+    def record_turnaround(self, api: str, batch_len: int, duration: float) -> None:
+        """Updates the turnaround time of jobs of an API and size with the duration of a completed job.
+
+        Arguments:
+            api: name of the batch enabled API.
+            batch_len: number of inputs per job.
+            duration: time in seconds between the end of job creation and the completion of the job.
+        """
+        with self._lock:
+            turnarounds = self._turnarounds.setdefault(api, dict())
+            turnarounds[batch_len] = self._update(turnarounds.get(batch_len), duration)
+            self._dirty = True
+
+    def record_submission(self, api: str, duration: float) -> None:
+        """Updates the time to create a job of an API.
+
+        Arguments:
+            api: name of the batch enabled API.
+            duration: time in seconds per created job, including waiting for rate limits.
+        """
+        with self._lock:
+            self._submission_times[api] = self._update(self._submission_times.get(api), duration)
+            self._dirty = True
+
+    def expected_turnaround(self, api: str, batch_len: int) -> Union[float, None]:
+        """Returns the expected turnaround time in seconds of a job or None if there are no observations."""
+        with self._lock:
+            observations = sorted(self._turnarounds.get(api, dict()).items())
+        if len(observations) == 0:
+            return None
+        for size, duration in observations:
+            if size == batch_len:
+                return duration
+        intercept, slope = _fit(observations)
+        return intercept + slope * batch_len
+
+    def expected_wall_time(self, api: str, number_of_items: int, batch_len: int) -> Union[float, None]:
+        """Returns the expected end-to-end time in seconds of a run or None if there are no observations."""
+        turnaround = self.expected_turnaround(api=api, batch_len=batch_len)
+        if turnaround is None:
+            return None
+        with self._lock:
+            submission_time = self._submission_times.get(api, self._submission_time)
+        return math.ceil(number_of_items / batch_len) * submission_time + turnaround
+
+    def choose(self, api: str, number_of_items: int) -> int:
+        """Returns the batch size with the shortest expected end-to-end time.
+
+        Arguments:
+            api: name of the batch enabled API.
+            number_of_items: total number of inputs.
+
+        Returns:
+            Batch size between 2 and 1000.
+        """
+        single_batch = max(min(number_of_items, 1000), 2)
+        candidates = [val for val in self._candidates if val < single_batch] + [single_batch]
+        wall_times = [(self.expected_wall_time(api=api, number_of_items=number_of_items, batch_len=val), val)
+                      for val in candidates]
+        if wall_times[0][0] is None:
+            return min(self._default_batch_len, single_batch)
+        wall_time, batch_len = min(wall_times)
+        self._logger.info(f'Chose batch size {batch_len} for {number_of_items} inputs - expecting {wall_time:.0f} '
+                          f'seconds.')
+        return batch_len
+
+    def save(self, file_path: Union[str, Path] = None) -> None:
+        """Writes all observations to a JSON file, by default the one they were loaded from, if changed."""
+        file_path = self._file_path if file_path is None else Path(file_path)
+        if file_path is None:
+            return
+        with self._lock:
+            if not self._dirty and file_path == self._file_path:
+                return
+            state = {
+                'version': _VERSION,
+                'turnarounds': {api: {str(size): val for size, val in turnarounds.items()}
+                                for api, turnarounds in self._turnarounds.items()},
+                'submission_times': dict(self._submission_times)
+            }
+            self._dirty = False
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(codec.dumps(state))
+        os.replace(tmp_path, file_path)
+
+    def _load(self) -> None:
+        try:
+            with open(self._file_path, 'rb') as f:
+                state = codec.loads(f.read())
+        except ValueError as e:
+            self._logger.warning(f'Ignoring invalid batch size observations in \'{self._file_path}\' - {e}.')
+            return
+        if state.get('version') != _VERSION:
+            return
+        self._turnarounds = {api: {int(size): val for size, val in turnarounds.items()}
+                             for api, turnarounds in state['turnarounds'].items()}
+        self._submission_times = dict(state['submission_times'])
+
+    def _update(self, estimate: Union[float, None], observation: float) -> float:
+        if estimate is None:
+            return observation
+        return (1 - self._smoothing) * estimate + self._smoothing * observation
+
+
+def _fit(observations: List[Tuple[int, float]]) -> Tuple[float, float]:
+    """Least squares fit of duration = intercept + slope * size with non-negative intercept and slope."""
+    if len(observations) == 1:
+        size, duration = observations[0]
+        return 0., duration / size  # Assume turnaround times proportional to the size
+    mean_size = sum(size for size, _ in observations) / len(observations)
+    mean_duration = sum(duration for _, duration in observations) / len(observations)
+    covariance = sum((size - mean_size) * (duration - mean_duration) for size, duration in observations)
+    variance = sum((size - mean_size) ** 2 for size, _ in observations)
+    slope = max(0., covariance / variance)
+    intercept = mean_duration - slope * mean_size
+    if intercept < 0:
+        slope = sum(size * duration for size, duration in observations) / sum(size ** 2 for size, _ in observations)
+        intercept = 0.
+    return intercept, slope
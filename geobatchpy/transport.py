@@ -0,0 +1,199 @@
+"""HTTP transport shared by all clients.
+
+Every request to the Geoapify API goes through a `Transport`. It wraps a single `requests.Session` with a pool of
+keep-alive connections, so consecutive calls re-use open TCP+TLS connections instead of paying for a new handshake
+every time. `Client` builds one transport and hands it to its `batch` and `boundaries` members. An optional
+RateLimiter throttles all requests of the transport, see geobatchpy.ratelimit, and a RetryPolicy retries transient
+failures, see geobatchpy.retry. `request` also returns the number of retries a response took.
+
+Batch payloads are JSON, which compresses 10-20x. The transport asks for compressed responses with every encoding
+urllib3 can decode - gzip and deflate, plus br and zstd if brotli and zstandard are installed - and optionally
+gzip-compresses large request bodies. If the server responds with 415 (Unsupported Media Type) to a compressed body,
+the request is sent again uncompressed and request compression is turned off.
+"""
+import gzip
+import logging
+import time
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlparse
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from geobatchpy import codec
+from geobatchpy.polling import parse_retry_after
+from geobatchpy.ratelimit import GROUP_SINGLE, RateLimiter
+from geobatchpy.retry import RetryPolicy
+
+
+class Transport:
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, timeout: float = None, rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, compress_requests: bool = False, compress_min_size: int = 1024):
+        """Pooled HTTP transport.
+
+        Arguments:
+            pool_connections: number of per-host connection pools to keep around.
+            pool_maxsize: maximal number of connections kept open per host.
+            pool_block: if True, never open more than `pool_maxsize` connections per host and let callers wait for
+                a free connection instead.
+            keep_alive: if False, connections are closed after every request.
+            timeout: optional timeout in seconds for connecting to and reading from the server.
+            rate_limiter: optional rate limits per endpoint group, shared by all requests of this transport.
+            retry_policy: retries of transient failures. Defaults to RetryPolicy(); use RetryPolicy(max_attempts=1)
+                to disable retries.
+            compress_requests: if True, JSON bodies of POST requests are sent gzip-compressed.
+            compress_min_size: smaller bodies in bytes are sent uncompressed.
+        """
+        self._timeout = timeout
+        self._rate_limiter = rate_limiter
+        self._retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self._compress_requests = compress_requests
+        self._compress_min_size = compress_min_size
+        self._session = requests.Session()
+        self._session.headers['Accept-Encoding'] = urllib3.util.make_headers(accept_encoding=True)['accept-encoding']
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._rate_limiter
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self._retry_policy
+
+    @property
+    def compress_requests(self) -> bool:
+        return self._compress_requests
+
+    def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+            group: str = GROUP_SINGLE, stream: bool = False) -> requests.Response:
+        """Sends a GET request using a pooled connection, retrying transient failures.
+
+        Arguments:
+            url: request URL.
+            params: optional query parameters.
+            headers: optional request headers.
+            group: endpoint group of the request, see geobatchpy.ratelimit.
+            stream: if True, the body is not downloaded until read, e.g., with `response.iter_content`. Close the
+                response when done to release the connection.
+
+        Returns:
+            The response object.
+        """
+        response, _ = self.request('GET', url=url, params=params, headers=headers, group=group, stream=stream)
+        return response
+
+    def post(self, url: str, json: Any = None, headers: Dict[str, str] = None, group: str = GROUP_SINGLE,
+             idempotent: bool = False) -> requests.Response:
+        """Sends a POST request with a JSON body using a pooled connection, retrying transient failures.
+
+        Arguments:
+            url: request URL.
+            json: JSON serializable request body.
+            headers: optional request headers.
+            group: endpoint group of the request, see geobatchpy.ratelimit.
+            idempotent: if True, the request is retried like a GET request. Otherwise only if the server certainly did
+                not process it.
+
+        Returns:
+            The response object.
+        """
+        response, _ = self.request('POST', url=url, json=json, headers=headers, group=group, idempotent=idempotent)
+        return response
+
+    def request(self, method: str, url: str, params: Dict[str, Any] = None, json: Any = None,
+                headers: Dict[str, str] = None, group: str = GROUP_SINGLE, stream: bool = False,
+                idempotent: bool = None) -> Tuple[requests.Response, int]:
+        """Sends a GET or a POST request, see `get` and `post`, and returns the response and the number of retries.
+
+        `idempotent` defaults to True for GET requests only.
+        """
+        idempotent = method == 'GET' if idempotent is None else idempotent
+        if method == 'GET':
+            def send() -> requests.Response:
+                return self._session.get(url, params=params, headers=headers, timeout=self._timeout, stream=stream)
+
+            return self._send(send, url=url, group=group, idempotent=idempotent)
+        if method != 'POST':
+            raise ValueError(f'Method must be one of \'GET\' and \'POST\', got {method!r}.')
+
+        body = None
+        if self._compress_requests and json is not None:
+            body = codec.dumps(json)
+            body = gzip.compress(body, compresslevel=6) if len(body) >= self._compress_min_size else None
+        if body is None:
+            return self._send(lambda: self._session.post(url, json=json, headers=headers, timeout=self._timeout),
+                              url=url, group=group, idempotent=idempotent)
+
+        compressed_headers = {**(headers or dict()), 'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+        response, retries = self._send(lambda: self._session.post(url, data=body, headers=compressed_headers,
+                                                                  timeout=self._timeout),
+                                       url=url, group=group, idempotent=idempotent)
+        if response.status_code != 415:
+            return response, retries
+        # The server rejected the request without processing it, so it is safe to send it again:
+        response.close()
+        self._logger.warning(f'Server does not accept compressed requests to {urlparse(url).path} - request '
+                             f'compression turned off.')
+        self._compress_requests = False
+        return self._send(lambda: self._session.post(url, json=json, headers=headers, timeout=self._timeout),
+                          url=url, group=group, idempotent=idempotent)
+
+    def _send(self, send: Callable[[], requests.Response], url: str, group: str,
+              idempotent: bool) -> Tuple[requests.Response, int]:
+        policy = self._retry_policy
+        endpoint = urlparse(url).path
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(group)
+            response = None
+            try:
+                response = send()
+            except requests.exceptions.RequestException as e:
+                if not policy.should_retry_error(error=e, idempotent=idempotent):
+                    raise
+                delay = policy.backoff(attempt=attempt)
+                reason = repr(e)
+                failure = e
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if self._rate_limiter is not None:
+                    self._rate_limiter.report(group, response.status_code, retry_after=retry_after)
+                if not policy.should_retry_status(status_code=response.status_code, idempotent=idempotent):
+                    return response, attempt
+                delay = policy.backoff(attempt=attempt) if retry_after is None else retry_after
+                reason = f'status {response.status_code}'
+                failure = None
+
+            attempt += 1
+            if attempt >= policy.max_attempts or time.monotonic() - started + delay > policy.max_elapsed:
+                if failure is not None:
+                    raise failure
+                return response, attempt - 1
+            if response is not None:
+                # Releases the connection of the failed response to the pool:
+                response.close()
+            policy.record_retry(endpoint=endpoint)
+            self._logger.warning(f'Request to {endpoint} failed with {reason} - retry {attempt} in {delay:.1f} '
+                                 f'seconds.')
+            time.sleep(delay)
+
+    def close(self) -> None:
+        """Closes all pooled connections."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,8 +1,16 @@
-import json
+import gzip
+import io
 import logging
 import os
 from pathlib import Path
-from typing import Union, Dict, Any, List
+from typing import IO, Union, Dict, Any, Iterable, Iterator, List
+
+from geobatchpy import codec
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 API_GEOCODE = '/v1/geocode/search'
 API_REVERSE_GEOCODE = '/v1/geocode/reverse'
@@ -51,6 +59,7 @@ def read_data_from_json_file(file_path: Union[str, Path]) -> Json:
     """Reads data from a JSON file.
 
     Json = Union[Dict[str, Any], List[Any]] is a superset of the JSON specification, excluding scalar objects.
+    Files with suffix .gz or .zst are decompressed on the fly.
 
     Arguments:
         file_path: path to the JSON file.
@@ -58,21 +67,84 @@ def read_data_from_json_file(file_path: Union[str, Path]) -> Json:
     Returns:
         The Python equivalent of the JSON object.
     """
-    with open(Path(file_path), 'r') as f:
-        data = json.load(fp=f)
+    with _open_file(file_path=file_path, mode='rb') as f:
+        data = codec.loads(f.read())
     logging.info(f'File \'{file_path}\' read from disk.')
     return data
 
 
-def write_data_to_json_file(data: Json, file_path: Union[str, Path]) -> None:
+def write_data_to_json_file(data: Json, file_path: Union[str, Path], indent: int = None) -> None:
     """Writes data to a JSON file.
 
     Json = Union[Dict[str, Any], List[Any]] is a superset of the JSON specification, excluding scalar objects.
+    Files with suffix .gz or .zst are compressed on the fly.
 
     Arguments:
         data: an object of Json type.
         file_path: destination path of the JSON file.
+        indent: optional indentation for human readable output. Defaults to compact encoding.
+    """
+    with _open_file(file_path=file_path, mode='wb') as f:
+        f.write(codec.dumps(data, indent=indent))
+    logging.info(f'File \'{file_path}\' written to disk.')
+
+
+def is_ndjson_file(file_path: Union[str, Path]) -> bool:
+    """Tells if a file is newline delimited JSON by its suffix .ndjson or .jsonl, optionally followed by .gz or .zst."""
+    suffixes = Path(file_path).suffixes
+    if len(suffixes) > 0 and suffixes[-1] in ('.gz', '.zst'):
+        suffixes = suffixes[:-1]
+    return len(suffixes) > 0 and suffixes[-1] in ('.ndjson', '.jsonl')
+
+
+def read_data_from_ndjson_file(file_path: Union[str, Path]) -> Iterator[Any]:
+    """Reads records from a newline delimited JSON file, one at a time.
+
+    Files with suffix .gz or .zst are decompressed on the fly. Empty lines are skipped.
+
+    Arguments:
+        file_path: path to the NDJSON file.
+
+    Returns:
+        Iterator of the Python equivalents of the JSON records.
+    """
+    with _open_file(file_path=file_path, mode='rb') as f:
+        for line in f:
+            if line.strip():
+                yield codec.loads(line)
+    logging.info(f'File \'{file_path}\' read from disk.')
+
+
+def write_data_to_ndjson_file(data: Iterable[Any], file_path: Union[str, Path]) -> int:
+    """Writes records to a newline delimited JSON file, one at a time and in compact encoding.
+
+    Files with suffix .gz or .zst are compressed on the fly.
+
+    Arguments:
+        data: iterable of JSON serializable records, e.g., a generator.
+        file_path: destination path of the NDJSON file.
+
+    Returns:
+        The number of records written.
     """
-    with open(Path(file_path), 'w') as f:
-        json.dump(data, fp=f, indent=4)
+    number_of_records = 0
+    with _open_file(file_path=file_path, mode='wb') as f:
+        for record in data:
+            f.write(codec.dumps(record))
+            f.write(b'\n')
+            number_of_records += 1
     logging.info(f'File \'{file_path}\' written to disk.')
+    return number_of_records
+
+
+def _open_file(file_path: Union[str, Path], mode: str) -> IO[bytes]:
+    file_path = Path(file_path)
+    if file_path.suffix == '.gz':
+        return gzip.open(file_path, mode, compresslevel=6)
+    if file_path.suffix == '.zst':
+        if zstandard is None:
+            raise ValueError('zstandard is not installed - run \'pip install geobatchpy[compression]\'.')
+        f = zstandard.open(file_path, mode)
+        # Readers of zstandard do not support iterating over lines:
+        return io.BufferedReader(f) if 'r' in mode else f
+    return open(file_path, mode)
@@ -0,0 +1,32 @@
+import json
+
+
+class MockResponse:
+    """Base class of mocked responses of requests.Session.get and requests.Session.post.
+
+    Subclasses implement `json`; the raw body is derived from it unless set explicitly.
+    """
+    _content = None
+    status_code = 200
+    headers = dict()
+
+    def json(self):
+        raise ValueError('No JSON body.')
+
+    @property
+    def content(self) -> bytes:
+        if self._content is not None:
+            return self._content
+        return json.dumps(self.json()).encode('utf-8')
+
+    @content.setter
+    def content(self, value: bytes) -> None:
+        self._content = value
+
+    def iter_content(self, chunk_size: int = 1):
+        content = self.content
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import geobatchpy.aio  # noqa: E402
+from geobatchpy.aio import AsyncClient, AsyncTransport  # noqa: E402
+from geobatchpy.polling import PollScheduler  # noqa: E402
+
+API_KEY = 'not-required-since-we-mock'
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.lock = Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.jobs = dict()
+        self.polls = dict()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/v1/batch':
+            job_id = int(query['id'][0])
+            with self.server.lock:
+                self.server.polls[job_id] = self.server.polls.get(job_id, 0) + 1
+                polls = self.server.polls[job_id]
+            if polls < 2:
+                self._respond(202, {'status': 'pending'})
+            else:
+                self._respond(200, {'results': [{'params': val['params'], 'result': {}}
+                                                for val in self.server.jobs[job_id]]})
+            return
+        self._count_in_flight()
+        self._respond(200, {'features': [{'properties': {'formatted': query['text'][0]}}]})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        url = urlparse(self.path)
+        if url.path == '/v1/batch':
+            with self.server.lock:
+                job_id = len(self.server.jobs)
+                self.server.jobs[job_id] = body['inputs']
+            port = self.server.server_address[1]
+            self._respond(202, {'url': f'http://127.0.0.1:{port}/v1/batch?id={job_id}'})
+            return
+        self._count_in_flight()
+        self._respond(200, {
+            'sources_to_targets': [[{'source_index': i, 'target_index': j, 'distance': 1000 * (i + 1) + j,
+                                     'time': 10 * (i + 1) + j} for j in range(len(body['targets']))]
+                                   for i in range(len(body['sources']))],
+            'sources': body['sources'], 'targets': body['targets'], 'mode': body['mode']
+        })
+
+    def _count_in_flight(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.in_flight, server.max_in_flight)
+        time.sleep(0.01)
+        with server.lock:
+            server.in_flight -= 1
+
+    def _respond(self, status_code, content):
+        body = json.dumps(content).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server(monkeypatch):
+    server = StandInServer()
+    Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    monkeypatch.setattr(geobatchpy.aio, 'get_api_url',
+                        lambda api, api_key: f'http://127.0.0.1:{port}{api}?apiKey={api_key}')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_geocode_with_bounded_concurrency(stand_in_server):
+    async def main():
+        async with AsyncClient(api_key=API_KEY, transport=AsyncTransport(max_concurrency=4)) as client:
+            return await asyncio.gather(*[client.geocode(text=f'address {i}') for i in range(40)])
+
+    res = asyncio.run(main())
+
+    assert [r['features'][0]['properties']['formatted'] for r in res] == [f'address {i}' for i in range(40)]
+    assert 1 < stand_in_server.max_in_flight <= 4
+
+
+def test_async_batch_geocode(stand_in_server):
+    async def main():
+        async with AsyncClient(api_key=API_KEY) as client:
+            client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+            return await client.batch.geocode(locations=[f'address {i}' for i in range(7)], batch_len=2,
+                                              max_workers=2)
+
+    res = asyncio.run(main())
+
+    assert [r['params']['text'] for r in res] == [f'address {i}' for i in range(7)]
+    assert len(stand_in_server.jobs) == 4
+    assert all(val == 2 for val in stand_in_server.polls.values())
+
+
+def test_async_route_matrix_tiles_share_transport_concurrency(stand_in_server):
+    geocodes = [(float(i), float(i)) for i in range(7)]
+
+    async def main():
+        async with AsyncClient(api_key=API_KEY, transport=AsyncTransport(max_concurrency=2)) as client:
+            return await client.route_matrix(source_geocodes=geocodes, tile_size=2, max_workers=10)
+
+    res = asyncio.run(main())
+
+    assert [[cell['distance'] for cell in row] for row in res['sources_to_targets']] \
+        == [[1000 * (i % 2 + 1) + j % 2 for j in range(7)] for i in range(7)]
+    assert stand_in_server.max_in_flight <= 2
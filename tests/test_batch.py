@@ -0,0 +1,48 @@
+import math
+
+import pytest
+
+from geobatchpy.batch import GeocodeInputs, parse_geocodes
+
+
+def test_parse_geocodes_of_real_numbers():
+    inputs = parse_geocodes(geocodes=[(7, 51.45), (4.3649087, 50)])
+
+    assert inputs == [{'params': {'lon': 7., 'lat': 51.45}}, {'params': {'lon': 4.3649087, 'lat': 50.}}]
+    assert parse_geocodes(geocodes=((7, 51.45),)) == inputs[:1]
+    assert parse_geocodes(geocodes=[{'lon': 7, 'lat': 51}]) == [{'params': {'lon': 7, 'lat': 51}}]
+    with pytest.raises(ValueError):
+        parse_geocodes(geocodes=[('7.01', '51.45')])
+
+
+@pytest.mark.parametrize('geocodes', [[(181., 0.)], [(0., -90.5)], [(math.nan, 0.)], [(0., math.inf)]])
+def test_parse_geocodes_validation(geocodes):
+    with pytest.raises(ValueError):
+        parse_geocodes(geocodes=geocodes)
+
+
+def test_parse_geocodes_of_numpy_arrays():
+    np = pytest.importorskip('numpy')
+
+    geocodes = np.array([[7.010232, 51.450216], [4.3649087, 50.8512746], [30, 50]])
+    inputs = parse_geocodes(geocodes=geocodes)
+    assert isinstance(inputs, GeocodeInputs)
+    assert inputs[1:] == [{'params': {'lon': 4.3649087, 'lat': 50.8512746}}, {'params': {'lon': 30., 'lat': 50.}}]
+    assert type(inputs[0]['params']['lon']) is float
+    assert parse_geocodes(geocodes=list(geocodes))[:] == inputs[:]
+
+    geocodes[2, 1] = np.nan
+    with pytest.raises(ValueError, match='position 2'):
+        parse_geocodes(geocodes=geocodes)
+    with pytest.raises(ValueError):
+        parse_geocodes(geocodes=geocodes[:, :1])
+
+
+def test_parse_geocodes_of_data_frames():
+    pd = pytest.importorskip('pandas')
+
+    geocodes = pd.DataFrame({'name': ['a', 'b'], 'lat': [51.45, 50.85], 'lon': [7, 4.36]})
+    assert parse_geocodes(geocodes=geocodes)[:] == [
+        {'params': {'lon': 7., 'lat': 51.45}}, {'params': {'lon': 4.36, 'lat': 50.85}}]
+    with pytest.raises(ValueError):
+        parse_geocodes(geocodes=geocodes[['name', 'lat']])
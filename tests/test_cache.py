@@ -0,0 +1,144 @@
+import time
+
+import requests
+
+from geobatchpy.cache import DiskCache, LRUCache, ResponseCache, SpatialCache, geohash
+from geobatchpy.client import Client
+from tests.mocks import MockResponse
+
+
+def test_make_key_normalizes_params():
+    key = ResponseCache.make_key(api='/v1/geocode/reverse', params={'lat': 51.45, 'lon': '7.01', 'lang': None})
+    assert key == ResponseCache.make_key(api='/v1/geocode/reverse', params={'lon': 7.01, 'lat': '51.45'})
+    assert key != ResponseCache.make_key(api='/v1/geocode/search', params={'lon': 7.01, 'lat': '51.45'})
+
+
+def test_lru_cache_eviction_and_ttl():
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set('a', {'a': 1})
+    cache.set('b', {'b': 1})
+    assert cache.get('a') == {'a': 1}
+    cache.set('c', {'c': 1})  # evicts 'b', the least recently used
+
+    assert cache.get('b') is None
+    assert cache.get('c') == {'c': 1}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert len(cache) == 1
+
+
+def test_disk_cache_survives_restarts(tmp_path):
+    cache = DiskCache(file_path=tmp_path / 'cache.sqlite', maxsize=2)
+    for key in 'abc':
+        cache.set(key, {key: 1})
+    cache.close()
+
+    cache = DiskCache(file_path=tmp_path / 'cache.sqlite')
+    assert len(cache) == 2
+    assert cache.get('c') == {'c': 1}
+    assert cache.get('a') is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(file_path=tmp_path / 'cache.sqlite', maxsize=2)
+    cache.set('a', {'a': 1})
+    cache.set('b', {'b': 1})
+    time.sleep(0.01)
+    assert cache.get('a') == {'a': 1}
+    cache.set('b', {'b': 2})
+    cache.set('c', {'c': 1})  # evicts 'a', the least recently used
+    assert len(cache) == 2
+    assert cache.get('a') is None
+    assert cache.get('b') == {'b': 2}
+    time.sleep(0.01)
+    assert cache.get('c') == {'c': 1}
+    cache.close()
+
+    cache = DiskCache(file_path=tmp_path / 'cache.sqlite', maxsize=2)
+    cache.set('d', {'d': 1})  # evicts 'b', since the access of 'c' was written on close
+    assert cache.get('b') is None
+    assert cache.get('c') == {'c': 1}
+
+
+def test_client_uses_cache(monkeypatch):
+    calls = []
+
+    class MockRequestsGet(MockResponse):
+
+        def __init__(self, url, params, headers, **kwargs):
+            calls.append(params)
+            self.status_code = 200
+
+        @staticmethod
+        def json():
+            return {'features': []}
+
+    monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+    cache = LRUCache()
+    client = Client(api_key='not-required-since-we-mock', cache=cache)
+    for _ in range(3):
+        client.reverse_geocode(longitude=7.010232, latitude=51.450216)
+        client.boundaries.part_of(longitude=7.010232, latitude=51.450216)
+
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (4, 2)
+
+
+def test_spatial_cells():
+    assert geohash(longitude=-5.6, latitude=42.6, length=5) == 'ezs42'
+
+    cache = SpatialCache(precision=3)
+    assert cache.cell(longitude=7.01021, latitude=51.45024) == cache.cell(longitude=7.0098, latitude=51.4498)
+    assert cache.cell(longitude=-0.0001, latitude=0.) == '0.000,0.000'
+    assert SpatialCache(geohash_length=7).cell(longitude=-5.6, latitude=42.6) == geohash(-5.6, 42.6, 7)
+
+
+def test_client_uses_spatial_cache(monkeypatch):
+    calls = []
+    jobs = dict()
+
+    class MockRequestsGet(MockResponse):
+
+        def __init__(self, url, headers, params=None, **kwargs):
+            self.params = params
+            self.job_id = int(url.split('id=')[1]) if 'id=' in url else None
+            calls.append(params)
+
+        def json(self):
+            if self.job_id is None:
+                return {'features': [{'properties': {'lon': self.params['lon']}}]}
+            return {'results': [{'params': val['params'], 'result': {'results': [{'lon': val['params']['lon']}]}}
+                                for val in jobs[self.job_id]]}
+
+    class MockRequestsPost(MockResponse):
+        status_code = 202
+
+        def __init__(self, request_url, json, headers, **kwargs):
+            self.job_id = len(jobs)
+            jobs[self.job_id] = json['inputs']
+
+        def json(self):
+            return {'url': f'https://api.geoapify.com/v1/batch?id={self.job_id}'}
+
+    monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+    monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+
+    cache = SpatialCache(precision=3)
+    client = Client(api_key='not-required-since-we-mock', reverse_geocode_cache=cache)
+    client.reverse_geocode(longitude=7.01021, latitude=51.45024)
+    res = client.reverse_geocode(longitude=7.0098, latitude=51.4498)
+    assert len(calls) == 1
+    assert res['features'][0]['properties']['lon'] == '7.01021'
+
+    geocodes = [(7.01021, 51.45024), (7.0098, 51.4498), (6.5, 51.3), (6.50001, 51.30001), (4.36, 50.85)]
+    res = client.batch.reverse_geocode(geocodes=geocodes, batch_len=2)
+    assert [val['params']['lon'] for inputs in jobs.values() for val in inputs] == [7.01021, 6.5, 4.36]
+    assert [r['params']['lon'] for r in res] == [g[0] for g in geocodes]
+    assert [r['result']['results'][0]['lon'] for r in res] == [7.01021, 7.01021, 6.5, 6.5, 4.36]
+
+    res = client.batch.reverse_geocode(geocodes=geocodes[1:], batch_len=2, simplify_output=True)
+    assert len(jobs) == 2
+    assert [r['lon'] for r in res] == [7.01021, 6.5, 6.5, 4.36]
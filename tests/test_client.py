@@ -1,8 +1,18 @@
 import logging
+import time
+from collections import Counter
+from threading import Lock, get_ident
 
+import pytest
 import requests
 
+from geobatchpy.batch import BatchSubmissionError
 from geobatchpy.client import Client
+from geobatchpy.events import JOB_FAILED
+from geobatchpy.polling import PollScheduler
+from geobatchpy.retry import RetryPolicy
+from geobatchpy.transport import Transport
+from tests.mocks import MockResponse
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -12,16 +22,25 @@ content_ind = 0
 class TestClient:
     API_KEY = 'not-required-since-we-mock'
 
+    def test_shared_transport(self):
+        transport = Transport(pool_maxsize=20)
+        client = Client(api_key=self.API_KEY, transport=transport)
+
+        assert client.batch._transport is transport
+        assert client.boundaries._transport is transport
+        assert transport._session.get_adapter('https://api.geoapify.com')._pool_maxsize == 20
+
     def test_places(self, monkeypatch):
-        class MockRequestsGet:
-            def __init__(self, url, params, headers):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, params, headers, **kwargs):
                 pass
 
             @staticmethod
             def json():
                 return RES_TEST_PLACES
 
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -34,15 +53,16 @@ class TestClient:
         assert res['features'][0]['properties']['city'] == 'Munich'
 
     def test_place_details(self, monkeypatch):
-        class MockRequestsGet:
-            def __init__(self, url, params, headers):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, params, headers, **kwargs):
                 pass
 
             @staticmethod
             def json():
                 return RES_TEST_PLACE_DETAILS
 
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -59,15 +79,16 @@ class TestClient:
 
     def test_geocode(self, monkeypatch):
         # monkey patching class
-        class MockRequestsGet:
-            def __init__(self, url, params, headers):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, params, headers, **kwargs):
                 pass
 
             @staticmethod
             def json():
                 return RES_TEST_GEOCODE
 
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -82,15 +103,16 @@ class TestClient:
         assert res2['features'][0]['properties']['street'] == 'Kruppstraße'
 
     def test_reverse_geocode(self, monkeypatch):
-        class MockRequestsGet:
-            def __init__(self, url, params, headers):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, params, headers, **kwargs):
                 pass
 
             @staticmethod
             def json():
                 return RES_TEST_REVERSE_GEOCODE
 
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -99,15 +121,16 @@ class TestClient:
         assert res['features'][0]['properties']['name'] == 'DB Schenker'
 
     def test_isoline(self, monkeypatch):
-        class MockRequestsGet:
-            def __init__(self, url, params, headers):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, params, headers, **kwargs):
                 pass
 
             @staticmethod
             def json():
                 return RES_TEST_ISOLINE
 
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -116,8 +139,9 @@ class TestClient:
         assert 'geometry' in res['features'][0]
 
     def test_batch_geocode(self, monkeypatch):
-        class MockRequestsPost:
-            def __init__(self, request_url, json, headers):
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
                 self.status_code = 200
 
             @staticmethod
@@ -127,8 +151,10 @@ class TestClient:
         global content_ind
         content_ind = -1
 
-        class MockRequestsGet:
-            def __init__(self, url, headers):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+
                 pass
 
             def json(self):
@@ -136,8 +162,8 @@ class TestClient:
                 content_ind += 1
                 return RES_TEST_BATCH_GEOCODE[content_ind]
 
-        monkeypatch.setattr(requests, 'post', MockRequestsPost)
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -152,8 +178,9 @@ class TestClient:
         assert res[2]['country'] == 'Allemagne'
 
     def test_batch_reverse_geocode(self, monkeypatch):
-        class MockRequestsPost:
-            def __init__(self, request_url, json, headers):
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
                 self.status_code = 200
 
             @staticmethod
@@ -163,9 +190,9 @@ class TestClient:
         global content_ind
         content_ind = -1
 
-        class MockRequestsGet:
+        class MockRequestsGet(MockResponse):
 
-            def __init__(self, url, headers):
+            def __init__(self, url, headers, **kwargs):
                 pass
 
             @staticmethod
@@ -174,8 +201,8 @@ class TestClient:
                 content_ind += 1
                 return RES_TEST_BATCH_REVERSE_GEOCODE[content_ind]
 
-        monkeypatch.setattr(requests, 'post', MockRequestsPost)
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -189,8 +216,9 @@ class TestClient:
         assert res[2]['city'] == 'Bucha'
 
     def test_batch_places(self, monkeypatch):
-        class MockRequestsPost:
-            def __init__(self, request_url, json, headers):
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
                 self.status_code = 200
 
             @staticmethod
@@ -200,17 +228,17 @@ class TestClient:
         global content_ind
         content_ind = -1
 
-        class MockRequestsGet:
+        class MockRequestsGet(MockResponse):
 
-            def __init__(self, url, headers):
+            def __init__(self, url, headers, **kwargs):
                 pass
 
             @staticmethod
             def json():
                 return RES_TEST_BATCH_PLACES[0]
 
-        monkeypatch.setattr(requests, 'post', MockRequestsPost)
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -230,8 +258,9 @@ class TestClient:
         assert res[0]['result']['features'][2]['properties']['city'] == 'Munich'
 
     def test_batch_place_details(self, monkeypatch):
-        class MockRequestsPost:
-            def __init__(self, request_url, json, headers):
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
                 self.status_code = 200
 
             @staticmethod
@@ -241,9 +270,9 @@ class TestClient:
         global content_ind
         content_ind = -1
 
-        class MockRequestsGet:
+        class MockRequestsGet(MockResponse):
 
-            def __init__(self, url, headers):
+            def __init__(self, url, headers, **kwargs):
                 pass
 
             @staticmethod
@@ -252,8 +281,8 @@ class TestClient:
                 content_ind += 1
                 return RES_TEST_BATCH_PLACE_DETAILS[content_ind]
 
-        monkeypatch.setattr(requests, 'post', MockRequestsPost)
-        monkeypatch.setattr(requests, 'get', MockRequestsGet)
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
 
         client = Client(api_key=self.API_KEY)
 
@@ -269,6 +298,476 @@ class TestClient:
         assert details_properties_2['feature_type'] == 'details'
         assert details_properties_2['city'] == 'Bucha'
 
+    def test_batch_post_concurrent_with_failures(self, monkeypatch):
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
+                self.first_text = json['inputs'][0]['params']['text']
+                self.status_code = 500 if self.first_text == 'c' else 200
+                if self.status_code == 500:
+                    self.content = b'Internal Server Error'
+
+            def json(self):
+                return {'url': f'https://api.geoapify.com/v1/batch?id={self.first_text}'}
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+
+        client = Client(api_key=self.API_KEY)
+        inputs = [{'params': {'text': text}} for text in 'abcde']
+
+        with pytest.raises(BatchSubmissionError) as e:
+            client.batch.post_batch_jobs_and_get_job_urls(
+                api='/v1/geocode/search', inputs=inputs, batch_len=2, max_workers=3, requests_per_second=None)
+
+        assert e.value.failed_ranges == [(2, 4)]
+        assert e.value.result_urls[0].endswith('id=a')
+        assert e.value.result_urls[1] is None
+        assert e.value.result_urls[2].endswith('id=e')
+
+    def test_batch_geocode_monitors_created_jobs_on_submission_failure(self, monkeypatch):
+        polled = []
+
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
+                self.first_text = json['inputs'][0]['params']['text']
+                self.texts = [val['params']['text'] for val in json['inputs']]
+                self.status_code = 400 if self.first_text == 'c' else 202
+                if self.status_code == 400:
+                    self.content = b'Bad Request'
+
+            def json(self):
+                return {'url': f'https://api.geoapify.com/v1/batch?id={",".join(self.texts)}'}
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                self.texts = url.split('id=')[1].split(',')
+                polled.append(self.texts[0])
+
+            def json(self):
+                return {'results': [{'params': {'text': text}, 'result': {}} for text in self.texts]}
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+
+        with pytest.raises(BatchSubmissionError) as e:
+            client.batch.geocode(locations=list('abcdea'), batch_len=2, deduplicate=True)
+
+        assert sorted(polled) == ['a', 'e']
+        assert e.value.failed_ranges == [(2, 4)]
+        assert [None if res is None else res['params']['text'] for res in e.value.results] \
+            == ['a', 'b', None, None, 'e', 'a']
+
+    def test_batch_geocode_forwards_max_workers(self, monkeypatch):
+        posted = []
+
+        class MockRequestsPost(MockResponse):
+            def __init__(self, request_url, json, headers, **kwargs):
+                posted.append(get_ident())
+                time.sleep(0.01)
+                self.first_text = json['inputs'][0]['params']['text']
+
+            def json(self):
+                return {'url': f'https://api.geoapify.com/v1/batch?id={self.first_text}'}
+
+        class MockRequestsGet(MockResponse):
+            def __init__(self, url, headers, **kwargs):
+                self.first_text = url.split('id=')[1]
+
+            def json(self):
+                return {'results': [{'params': {'text': self.first_text}, 'result': {}}] * 2}
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        res = client.batch.geocode(locations=list('abcdef'), batch_len=2, max_workers=3)
+
+        assert len(res) == 6
+        assert len(posted) == 3
+        assert len(set(posted)) > 1
+
+    def test_batch_iter_results(self, monkeypatch):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                self.job_id = int(url.split('id=')[1])
+
+            def json(self):
+                return {'results': [{'params': {'text': f'{self.job_id}-{i}'}} for i in range(2)]}
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        result_urls = [f'https://api.geoapify.com/v1/batch?id={i}' for i in range(3)]
+
+        in_order = list(client.batch.iter_results(sleep_time=3, result_urls=result_urls))
+        assert [results[0]['params']['text'] for results in in_order] == ['0-0', '1-0', '2-0']
+
+        by_completion = dict(client.batch.iter_results(
+            sleep_time=3, result_urls=result_urls, completion_order=True, batch_len=2))
+        assert sorted(by_completion) == [0, 2, 4]
+        assert by_completion[4][1]['params']['text'] == '2-1'
+
+    def test_batch_iter_results_pending_jobs(self, monkeypatch):
+        polls = Counter()
+        in_flight = [0, 0]  # current, maximum
+        lock = Lock()
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight)
+                time.sleep(0.001)
+                self.job_id = int(url.split('id=')[1])
+                polls[self.job_id] += 1
+                self.headers = {'Retry-After': '0'}
+                with lock:
+                    in_flight[0] -= 1
+
+            def json(self):
+                if polls[self.job_id] < 3:
+                    return {'id': self.job_id, 'status': 'pending'}
+                return {'results': [{'params': {'text': str(self.job_id)}}]}
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+        result_urls = [f'https://api.geoapify.com/v1/batch?id={i}' for i in range(50)]
+
+        res = client.batch.monitor_batch_jobs_and_get_results(sleep_time=1, result_urls=result_urls)
+
+        assert [r['params']['text'] for r in res] == [str(i) for i in range(50)]
+        assert all(polls[i] == 3 for i in range(50))
+        assert in_flight[1] <= 10
+
+    @pytest.mark.parametrize('status_code,content', [
+        (401, {'statusCode': 401, 'error': 'Unauthorized', 'message': 'Invalid apiKey'}),
+        (404, {'statusCode': 404, 'error': 'Not Found', 'message': 'Job not found'})
+    ])
+    def test_batch_monitor_fails_on_client_errors(self, monkeypatch, status_code, content):
+        polls = Counter()
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                self.job_id = int(url.split('id=')[1])
+                polls[self.job_id] += 1
+                self.status_code = status_code if self.job_id == 1 else 202
+
+            def json(self):
+                return content if self.job_id == 1 else {'id': self.job_id, 'status': 'pending'}
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        events = []
+        client = Client(api_key=self.API_KEY, listeners=[events.append])
+        client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+        result_urls = [f'https://api.geoapify.com/v1/batch?id={i}' for i in range(3)]
+
+        with pytest.raises(ValueError, match=f'status {status_code}'):
+            client.batch.monitor_batch_jobs_and_get_results(sleep_time=1, result_urls=result_urls)
+
+        assert polls[1] == 1
+        assert [(event.job, event.status_code) for event in events if event.name == JOB_FAILED] \
+            == [(1, status_code)]
+
+    @pytest.mark.parametrize('status_code,repolled', [(403, False), (404, False), (429, True), (503, True)])
+    def test_batch_monitor_on_html_error_pages(self, monkeypatch, status_code, repolled):
+        polls = Counter()
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                polls['get'] += 1
+                if polls['get'] == 1:
+                    self.status_code = status_code
+                    self.content = b'<html><body>Error</body></html>'
+
+            def json(self):
+                return {'results': [{'params': {'text': 'a'}}]}
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        transport = Transport(retry_policy=RetryPolicy(max_attempts=1))
+        client = Client(api_key=self.API_KEY, transport=transport)
+        client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+        result_urls = ['https://api.geoapify.com/v1/batch?id=0']
+
+        if repolled:
+            res = client.batch.monitor_batch_jobs_and_get_results(sleep_time=1, result_urls=result_urls)
+            assert res == [{'params': {'text': 'a'}}]
+            assert polls['get'] == 2
+        else:
+            with pytest.raises(ValueError, match=f'status {status_code}'):
+                client.batch.monitor_batch_jobs_and_get_results(sleep_time=1, result_urls=result_urls)
+            assert polls['get'] == 1
+
+    def test_batch_monitor_polls_first_when_jobs_are_expected_to_be_done(self, monkeypatch):
+        polled = []
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                polled.append(time.monotonic())
+
+            def json(self):
+                return {'results': [{'params': {'text': 'a'}}]}
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+        key = PollScheduler.key(api='/v1/geocode/search', batch_len=2)
+        client.batch._poll_scheduler.record_completion(key=key, duration=0.2)
+        result_urls = [f'https://api.geoapify.com/v1/batch?id={i}' for i in range(2)]
+
+        started = time.monotonic()
+        res = client.batch.monitor_batch_jobs_and_get_results(sleep_time=1, result_urls=result_urls,
+                                                              api='/v1/geocode/search', batch_len=2)
+
+        assert len(res) == 2
+        assert len(polled) == 2
+        assert all(0.2 <= t - started < 1 for t in polled)
+
+    def test_batch_iter_results_streamed(self, monkeypatch):
+        polls = Counter()
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, stream=False, **kwargs):
+                assert stream
+                self.job_id = int(url.split('id=')[1])
+                polls[self.job_id] += 1
+
+            def json(self):
+                return {'id': self.job_id, 'results': [{'params': {'text': f'{self.job_id}-{k}'}} for k in range(100)]}
+
+            def iter_content(self, chunk_size=1):
+                content = self.content
+                middle = len(content) // 32 * 16
+                yield from (content[start:start + 16] for start in range(0, middle, 16))
+                if polls[self.job_id] == 1:  # Connection lost in the middle of the body
+                    raise requests.exceptions.ChunkedEncodingError('Connection broken.')
+                yield content[middle:]
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+        result_urls = [f'https://api.geoapify.com/v1/batch?id={i}' for i in range(3)]
+
+        res = client.batch.monitor_batch_jobs_and_get_results(sleep_time=1, result_urls=result_urls)
+
+        assert [r['params']['text'] for r in res] == [f'{i}-{k}' for i in range(3) for k in range(100)]
+        assert all(polls[i] == 2 for i in range(3))
+
+    def test_batch_resume_from_journal(self, monkeypatch, tmp_path):
+        calls = Counter()
+
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
+                calls['post'] += 1
+                self.first_text = json['inputs'][0]['params']['text']
+                self.status_code = 202
+
+            def json(self):
+                return {'url': f'https://api.geoapify.com/v1/batch?id={self.first_text}'}
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                calls['get'] += 1
+                self.job_id = url.split('id=')[1]
+                if self.job_id == 'c' and calls['fail'] == 0:
+                    calls['fail'] += 1
+                    time.sleep(0.05)
+                    raise requests.exceptions.ConnectionError('Process dies.')
+
+            def json(self):
+                return {'results': [{'params': {'text': self.job_id}, 'result': {}}]}
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY, transport=Transport(retry_policy=RetryPolicy(max_attempts=1)))
+        journal = tmp_path / 'journal.sqlite'
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.batch.geocode(locations=list('abcd'), batch_len=2, journal=journal)
+        assert calls['post'] == 2
+
+        calls.clear()
+        calls['fail'] = 1
+        res = client.batch.geocode(locations=list('abcd'), batch_len=2, journal=journal)
+        assert [r['params']['text'] for r in res] == ['a', 'c']
+        assert calls['post'] == 0
+        assert calls['get'] == 1
+
+        with pytest.raises(ValueError):
+            client.batch.geocode(locations=list('abcde'), batch_len=2, journal=journal)
+
+    def test_batch_deduplicate(self, monkeypatch):
+        jobs = dict()
+
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, request_url, json, headers, **kwargs):
+                self.job_id = len(jobs)
+                jobs[self.job_id] = json['inputs']
+                self.status_code = 202
+
+            def json(self):
+                return {'url': f'https://api.geoapify.com/v1/batch?id={self.job_id}'}
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                self.job_id = int(url.split('id=')[1])
+
+            def json(self):
+                return {'results': [{'params': val['params'], 'result': {'query': val['params']['text']}}
+                                    for val in jobs[self.job_id]]}
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY)
+        addresses = ['Essen', 'Krefeld', ' Essen', 'Ratingen', 'Krefeld']
+
+        res = client.batch.geocode(locations=addresses, batch_len=2, deduplicate=True)
+
+        assert sum(len(inputs) for inputs in jobs.values()) == 3
+        assert [r['result']['query'] for r in res] == ['Essen', 'Krefeld', 'Essen', 'Ratingen', 'Krefeld']
+        assert [r['params']['text'] for r in res] == addresses
+        assert res[1] is not res[4]
+
+    def test_batch_lazy_inputs(self, monkeypatch):
+        jobs = dict()
+        consumed = []
+
+        class MockRequestsPost(MockResponse):
+            status_code = 202
+
+            def __init__(self, request_url, json, headers, **kwargs):
+                self.job_id = len(jobs)
+                jobs[self.job_id] = (json['inputs'], len(consumed))
+
+            def json(self):
+                return {'url': f'https://api.geoapify.com/v1/batch?id={self.job_id}'}
+
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, headers, **kwargs):
+                self.job_id = int(url.split('id=')[1])
+
+            def json(self):
+                return {'results': [{'params': val['params'], 'result': {'query': val['params']['text']}}
+                                    for val in jobs[self.job_id][0]]}
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        def read_addresses():
+            for k in range(21):
+                consumed.append(k)
+                yield f'Street {k}'
+
+        client = Client(api_key=self.API_KEY)
+        res = client.batch.geocode(locations=read_addresses(), batch_len=2)
+
+        assert len(jobs) == 11
+        # Never more than the posted batch plus 2 * max_workers batches ahead are read:
+        assert all(number_consumed <= 2 * (job_id + 3) for job_id, (_, number_consumed) in jobs.items())
+        assert [r['result']['query'] for r in res] == [f'Street {k}' for k in range(21)]
+
+        res = client.batch.places(individual_parameters=({'text': f'Place {k}'} for k in range(3)), batch_len=2)
+        assert [r['result']['query'] for r in res] == ['Place 0', 'Place 1', 'Place 2']
+
+    def test_bulk(self, monkeypatch):
+        class MockRequestsGet(MockResponse):
+
+            def __init__(self, url, params, headers, **kwargs):
+                if params['lon'] == '0':
+                    raise requests.exceptions.ConnectionError('Connection reset by peer.')
+                self.params = params
+
+            def json(self):
+                if self.params['lon'] == '1':
+                    return {'statusCode': 400, 'error': 'Bad Request', 'message': 'Invalid coordinates.'}
+                return {'features': [{'properties': {'lon': float(self.params['lon'])}}]}
+
+        monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+        client = Client(api_key=self.API_KEY, transport=Transport(retry_policy=RetryPolicy(max_attempts=1)))
+        list_of_kwargs = [{'longitude': lon, 'latitude': 51.45} for lon in range(6)]
+
+        res = client.bulk('boundaries.part_of', list_of_kwargs, max_workers=3, requests_per_second=100)
+
+        assert sorted(res.errors) == [0, 1]
+        assert res.results[:2] == [None, None]
+        assert [r['features'][0]['properties']['lon'] for r in res.results[2:]] == [2, 3, 4, 5]
+
+    def test_route_matrix_tiled(self, monkeypatch):
+        requested = []
+
+        class MockRequestsPost(MockResponse):
+
+            def __init__(self, url, json, headers, **kwargs):
+                requested.append((len(json['sources']), len(json['targets'])))
+                self.data = json
+
+            def json(self):
+                sources = [{'original_location': s['location'], 'location': s['location']}
+                           for s in self.data['sources']]
+                targets = [{'original_location': t['location'], 'location': t['location']}
+                           for t in self.data['targets']]
+                return {
+                    'sources': sources, 'targets': targets, 'units': 'metric', 'mode': self.data['mode'],
+                    'sources_to_targets': [
+                        [{'distance': abs(s['location'][0] - t['location'][0]), 'time': s['location'][0],
+                          'source_index': i, 'target_index': j} for j, t in enumerate(targets)]
+                        for i, s in enumerate(sources)
+                    ]
+                }
+
+        monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+
+        client = Client(api_key=self.API_KEY)
+        sources = [(float(k), 51.) for k in range(7)]
+        targets = [(float(k), 52.) for k in range(5)]
+
+        res = client.route_matrix(source_geocodes=sources, target_geocodes=targets)
+        assert requested == [(7, 5)]
+        res_tiled = client.route_matrix(source_geocodes=sources, target_geocodes=targets, tile_size=3, max_workers=4)
+        assert len(requested) == 1 + 3 * 2
+        assert res_tiled == res
+        res_compact = client.route_matrix(source_geocodes=sources, target_geocodes=targets, tile_size=3,
+                                          compact=True)
+        assert res_compact.shape == (7, 5)
+        assert res_compact.to_dict() == res
+
+        requested.clear()
+        res = client.route_matrix(source_geocodes=sources, tile_size=3)
+        assert len(requested) == 3 * 3
+        requested.clear()
+        res_symmetric = client.route_matrix(source_geocodes=sources, tile_size=3, assume_symmetric=True)
+        assert len(requested) == 6
+        assert [[cell['distance'] for cell in row] for row in res_symmetric['sources_to_targets']] \
+            == [[cell['distance'] for cell in row] for row in res['sources_to_targets']]
+        assert [[(cell['source_index'], cell['target_index']) for cell in row]
+                for row in res_symmetric['sources_to_targets']] == [[(i, j) for j in range(7)] for i in range(7)]
+        assert res_symmetric['sources'] == res['sources']
+        res_compact = client.route_matrix(source_geocodes=sources, tile_size=3, assume_symmetric=True, compact=True)
+        assert res_compact.to_dict() == res_symmetric
+
 
 # API responses of the tests:
 RES_TEST_PLACES = {
@@ -0,0 +1,103 @@
+import pytest
+
+from geobatchpy import codec
+from geobatchpy.codec import JsonCodec, OrjsonCodec
+from geobatchpy.utils import read_data_from_json_file, write_data_to_json_file
+from tests.mocks import MockResponse
+
+DATA = {'results': [{'lon': 13.4, 'lat': 52.5, 'formatted': 'Straße 1, Berlin'}], 'count': 1}
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def json_codec(request):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+        return OrjsonCodec()
+    return JsonCodec()
+
+
+def test_codec_round_trip(json_codec):
+    encoded = json_codec.dumps(DATA)
+    assert isinstance(encoded, bytes)
+    assert b': ' not in encoded and b', "' not in encoded
+    assert 'Straße'.encode('utf-8') in encoded
+    assert json_codec.loads(encoded) == DATA
+    assert json_codec.loads(encoded.decode('utf-8')) == DATA
+    assert json_codec.loads(memoryview(encoded)) == DATA
+    assert json_codec.loads(json_codec.dumps(DATA, indent=2)) == DATA
+    with pytest.raises(ValueError):
+        json_codec.loads(b'<html>Bad Gateway</html>')
+
+
+def test_codec_numpy(json_codec):
+    np = pytest.importorskip('numpy')
+    encoded = json_codec.dumps({'lon': np.float64(1.5), 'ids': np.arange(3)})
+    assert json_codec.loads(encoded) == {'lon': 1.5, 'ids': [0, 1, 2]}
+
+
+def test_set_codec(tmpdir):
+    class CountingCodec(JsonCodec):
+        calls = 0
+
+        def loads(self, data):
+            CountingCodec.calls += 1
+            return super().loads(data)
+
+    class MockRequestsGet(MockResponse):
+        @staticmethod
+        def json():
+            return DATA
+
+    codec.set_codec(CountingCodec())
+    try:
+        assert codec.decode_response(MockRequestsGet()) == DATA
+        file_path = tmpdir.join('data.json')
+        write_data_to_json_file(DATA, file_path)
+        assert '\n' not in file_path.read_text('utf-8')
+        assert read_data_from_json_file(file_path) == DATA
+        assert CountingCodec.calls == 2
+    finally:
+        codec.set_codec()
+    assert isinstance(codec.get_codec(), OrjsonCodec if codec.orjson is not None else JsonCodec)
+
+
+@pytest.mark.parametrize('buffer_size', [0, 2 ** 24])
+@pytest.mark.parametrize('chunk_size', [1, 3, 64, 2 ** 20])
+def test_parse_json_stream(chunk_size, buffer_size):
+    body = {'id': 'abc', 'status': 'finished', 'results': [
+        {'params': {'text': f'Straße {i}'}, 'result': {'lon': 13.4 + i, 'lat': -52, 'rank': None, 'ok': True}}
+        for i in range(50)
+    ]}
+    encoded = JsonCodec().dumps(body, indent=2)
+    chunks = [encoded[start:start + chunk_size] for start in range(0, len(encoded), chunk_size)]
+    assert codec.parse_json_stream(chunks, buffer_size=buffer_size) == body
+    assert codec.parse_json_stream([b'{"id": "abc", "results": []}'], buffer_size=buffer_size) \
+        == {'id': 'abc', 'results': []}
+    assert codec.parse_json_stream([b'{"status": ', b'"pending"}'], buffer_size=buffer_size) == {'status': 'pending'}
+
+
+def test_parse_json_stream_decodes_items_with_codec_in_use():
+    class CountingCodec(JsonCodec):
+        calls = 0
+
+        def loads(self, data):
+            CountingCodec.calls += 1
+            return super().loads(data)
+
+    body = {'results': [{'text': 'a "quoted" }] \\', 'values': [[1, 2], {'x': None}]}, 3.5e-2, 'b', False]}
+    encoded = JsonCodec().dumps(body)
+    codec.set_codec(CountingCodec())
+    try:
+        chunks = [encoded[start:start + 5] for start in range(0, len(encoded), 5)]
+        assert codec.parse_json_stream(chunks, buffer_size=0) == body
+        assert CountingCodec.calls == 5  # The member name and every item
+    finally:
+        codec.set_codec()
+
+
+@pytest.mark.parametrize('body', [b'', b'<html>Bad Gateway</html>', b'{"results": [{"a": 1}, {"a"', b'{"a": 12',
+                                  b'{"results": [1 2]}', b'{} {}', b'[]'])
+@pytest.mark.parametrize('buffer_size', [0, 2 ** 24])
+def test_parse_json_stream_invalid(body, buffer_size):
+    with pytest.raises(ValueError):
+        codec.parse_json_stream([body], buffer_size=buffer_size)
@@ -0,0 +1,42 @@
+import pytest
+
+from tests.test_client import RES_TEST_BATCH_GEOCODE
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from geobatchpy.columnar import GEOCODING_FIELDS, GeocodingResultsWriter, geocoding_results_to_record_batch  # noqa
+
+
+def test_record_batch():
+    results = RES_TEST_BATCH_GEOCODE[0]['results'] + [{'params': {'text': 'Nowhere'}, 'result': {'results': []}}]
+
+    batch = geocoding_results_to_record_batch(results=results, offset=10)
+
+    assert batch.schema.names == list(GEOCODING_FIELDS)
+    rows = batch.to_pylist()
+    assert rows[0]['index'] == 10
+    assert rows[0]['query'] == 'Hülser Markt 1, 47839 Krefeld'
+    assert rows[0]['city'] == 'Krefeld'
+    assert rows[0]['confidence'] == 1.
+    assert rows[-1] == {**{name: None for name in GEOCODING_FIELDS}, 'index': 10 + len(results) - 1,
+                        'query': 'Nowhere'}
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.arrow'])
+def test_writer_one_row_group_per_job(tmp_path, suffix):
+    jobs = [res['results'] for res in RES_TEST_BATCH_GEOCODE]
+    file_path = tmp_path / f'results{suffix}'
+
+    with GeocodingResultsWriter(file_path=file_path) as writer:
+        writer.write_all([(len(jobs[0]), jobs[1]), (0, jobs[0])])  # completion order
+
+    if suffix == '.parquet':
+        assert pq.ParquetFile(file_path).num_row_groups == 2
+        table = pq.read_table(file_path)
+    else:
+        with pa.ipc.open_file(file_path) as reader:
+            assert reader.num_record_batches == 2
+            table = reader.read_all()
+    assert writer.number_of_rows == sum(len(job) for job in jobs)
+    assert sorted(table.column('index').to_pylist()) == list(range(writer.number_of_rows))
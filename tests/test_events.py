@@ -0,0 +1,97 @@
+import logging
+
+import requests
+
+from geobatchpy.client import Client
+from geobatchpy.events import (
+    JOB_COMPLETED, JOB_FAILED, JOB_POLLED, JOB_SUBMITTED, JobEvent, PrometheusExporter, make_event
+)
+from geobatchpy.polling import PollScheduler
+from geobatchpy.utils import API_GEOCODE
+from tests.mocks import MockResponse
+
+
+def test_batch_events(monkeypatch, caplog):
+    jobs = dict()
+    polls = dict()
+
+    class MockRequestsPost(MockResponse):
+        status_code = 202
+
+        def __init__(self, request_url, json, headers, **kwargs):
+            self.job_id = len(jobs)
+            jobs[self.job_id] = json['inputs']
+
+        def json(self):
+            return {'url': f'https://api.geoapify.com/v1/batch?id={self.job_id}&apiKey=123'}
+
+    class MockRequestsGet(MockResponse):
+
+        def __init__(self, url, headers, **kwargs):
+            self.job_id = int(url.split('id=')[1].split('&')[0])
+            polls[self.job_id] = polls.get(self.job_id, 0) + 1
+
+        def json(self):
+            if polls[self.job_id] == 1:
+                return {'status': 'pending'}
+            return {'results': [{'params': val['params'], 'result': {}} for val in jobs[self.job_id]]}
+
+    monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+    monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+    events = []
+    exporter = PrometheusExporter()
+    client = Client(api_key='123', listeners=[events.append, exporter])
+    client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+    addresses = [f'Hülser Markt {k}' for k in range(3)]
+
+    assert len(client.batch.geocode(locations=addresses, batch_len=2)) == 3
+
+    submitted = [event for event in events if event.name == JOB_SUBMITTED]
+    assert [(event.job, event.number_of_items, event.status_code) for event in submitted] == [(0, 2, 202), (1, 1, 202)]
+    assert submitted[0].url == 'https://api.geoapify.com/v1/batch?id=0'
+    assert all(event.api == API_GEOCODE and event.retries == 0 for event in events)
+    assert sorted(event.attempt for event in events if event.name == JOB_POLLED) == [1, 1, 2, 2]
+    completed = sorted((event for event in events if event.name == JOB_COMPLETED), key=lambda event: event.job)
+    assert [(event.job, event.number_of_items, event.attempt) for event in completed] == [(0, 2, 2), (1, 1, 2)]
+    assert all(event.payload_bytes > 0 and event.duration >= 0 for event in completed)
+
+    metrics = exporter.render()
+    assert 'geobatchpy_jobs_submitted_total{api="/v1/geocode/search"} 2' in metrics
+    assert 'geobatchpy_job_polls_total{api="/v1/geocode/search"} 4' in metrics
+    assert 'geobatchpy_items_completed_total{api="/v1/geocode/search"} 3' in metrics
+    assert 'geobatchpy_job_turnaround_seconds_count{api="/v1/geocode/search"} 2' in metrics
+    assert 'geobatchpy_request_duration_seconds_count{api="/v1/geocode/search",request="poll"} 4' in metrics
+
+    # Completed jobs are counted per run, and a failing listener does not abort it:
+    def broken_listener(event: JobEvent):
+        raise RuntimeError('broken')
+
+    client.batch.remove_listener(events.append)
+    client.batch.add_listener(broken_listener)
+    polls.clear()
+    with caplog.at_level(logging.INFO):
+        assert len(client.batch.geocode(locations=addresses, batch_len=2)) == 3
+    assert '2/2 completed.' in caplog.text
+    assert 'broken' in caplog.text
+    assert len(events) == 8
+
+
+def test_prometheus_exporter(tmp_path):
+    exporter = PrometheusExporter(namespace='test', buckets=(10, 60))
+    exporter(make_event(JOB_SUBMITTED, job=0, api='/v1/geocode/search', duration=0.5, payload_bytes=100, retries=2))
+    exporter(make_event(JOB_COMPLETED, job=0, api='/v1/geocode/search', duration=30., number_of_items=5))
+    exporter(make_event(JOB_FAILED, job=1, api='a"b', error='status 500'))
+
+    metrics = exporter.render()
+    assert 'test_request_retries_total{api="/v1/geocode/search"} 2' in metrics
+    assert 'test_payload_bytes_total{api="/v1/geocode/search",direction="sent"} 100' in metrics
+    assert 'test_jobs_failed_total{api="a\\"b"} 1' in metrics
+    assert 'test_job_turnaround_seconds_bucket{api="/v1/geocode/search",le="10"} 0' in metrics
+    assert 'test_job_turnaround_seconds_bucket{api="/v1/geocode/search",le="60"} 1' in metrics
+    assert 'test_job_turnaround_seconds_bucket{api="/v1/geocode/search",le="+Inf"} 1' in metrics
+    assert 'test_job_turnaround_seconds_sum{api="/v1/geocode/search"} 30' in metrics
+    assert 'test_request_duration_seconds_sum{api="/v1/geocode/search",request="submit"} 0.5' in metrics
+
+    exporter.write(tmp_path / 'metrics.prom')
+    assert (tmp_path / 'metrics.prom').read_text() == metrics
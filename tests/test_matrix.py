@@ -0,0 +1,119 @@
+import math
+
+import pytest
+
+from geobatchpy.matrix import IncrementalRouteMatrix, RouteMatrix
+
+
+def make_result(number_of_sources, number_of_targets):
+    return {
+        'sources': [{'location': [float(i), 51.]} for i in range(number_of_sources)],
+        'targets': [{'location': [float(j), 52.]} for j in range(number_of_targets)],
+        'sources_to_targets': [
+            [{'distance': 10. * i + j, 'time': 100. * i + j, 'source_index': i, 'target_index': j}
+             for j in range(number_of_targets)] for i in range(number_of_sources)
+        ],
+        'units': 'metric',
+        'mode': 'drive'
+    }
+
+
+@pytest.fixture(params=[False, True], ids=['array', 'numpy'])
+def use_numpy(request):
+    if request.param:
+        pytest.importorskip('numpy')
+    return request.param
+
+
+def test_round_trip(use_numpy):
+    result = make_result(4, 3)
+    result['sources_to_targets'][1][2] = None
+
+    matrix = RouteMatrix.from_json(result, use_numpy=use_numpy)
+
+    assert matrix.shape == (4, 3)
+    assert matrix[3, 1] == (31., 301.)
+    assert matrix[-1, -1] == (32., 302.)
+    assert all(math.isnan(val) for val in matrix[1, 2])
+    result['sources_to_targets'][1][2] = {'distance': None, 'time': None, 'source_index': 1, 'target_index': 2}
+    assert matrix.to_dict() == result
+
+
+def test_slicing(use_numpy):
+    matrix = RouteMatrix.from_json(make_result(5, 6), use_numpy=use_numpy)
+
+    sub = matrix[1:4, ::2]
+    assert sub.shape == (3, 3)
+    assert [[sub[i, j][0] for j in range(3)] for i in range(3)] == [[10., 12., 14.], [20., 22., 24.], [30., 32., 34.]]
+    assert sub.sources == matrix.sources[1:4]
+    assert sub.targets == matrix.targets[::2]
+
+    assert matrix[2].shape == (1, 6)
+    assert matrix[:, 5].shape == (5, 1)
+    assert [matrix[::-1, 1][i, 0][0] for i in range(5)] == [41., 31., 21., 11., 1.]
+    with pytest.raises(IndexError):
+        _ = matrix[5, 0]
+
+
+def test_numpy_integer_indices(use_numpy):
+    np = pytest.importorskip('numpy')
+    matrix = RouteMatrix.from_json(make_result(3, 4), use_numpy=use_numpy)
+
+    assert matrix[np.int64(2), np.argmin([5., 1., 7., 3.])] == (21., 201.)
+    assert matrix[np.int32(1)].shape == (1, 4)
+    assert matrix[:, np.int64(-1)].shape == (3, 1)
+
+
+def test_set_tile_transposed(use_numpy):
+    tile = make_result(2, 1)
+    matrix = RouteMatrix(number_of_sources=3, number_of_targets=3, use_numpy=use_numpy)
+    matrix.set_tile(tile, source_offset=2, target_offset=1, transpose=True)
+
+    assert matrix.sources == [None, None] + tile['targets']
+    assert matrix.targets == [None] + tile['sources']
+    assert matrix[2, 1] == (0., 0.)
+    assert matrix[2, 2] == (10., 100.)
+    assert all(math.isnan(val) for val in matrix[0, 0])
+
+
+def test_incremental_route_matrix(monkeypatch, tmp_path):
+    requested = []
+
+    class MockClient:
+        @staticmethod
+        def route_matrix(source_geocodes, target_geocodes, travel_mode, tile_size, max_workers, compact):
+            requested.append(len(source_geocodes) * len(target_geocodes))
+            return RouteMatrix.from_json({
+                'sources': [{'location': list(s)} for s in source_geocodes],
+                'targets': [{'location': list(t)} for t in target_geocodes],
+                'sources_to_targets': [[{'distance': abs(s[0] - t[0]), 'time': s[0]} for t in target_geocodes]
+                                       for s in source_geocodes],
+                'mode': travel_mode
+            })
+
+    file_path = tmp_path / 'matrix.json'
+    incremental = IncrementalRouteMatrix(client=MockClient(), file_path=file_path)
+    incremental.add_locations([(float(k), 51.) for k in range(10)])
+    incremental.update()
+    assert requested == [100]
+
+    incremental = IncrementalRouteMatrix(client=MockClient(), file_path=file_path)
+    assert incremental.matrix.shape == (10, 10)
+    incremental.add_locations([(10., 51.), (11., 51.)])
+    incremental.add_targets([(12., 51.)])
+    matrix = incremental.update()
+
+    assert requested == [100, 10 * 3, 2 * 13]
+    assert matrix.shape == (12, 13)
+    assert [matrix[i, j][0] for i, j in [(0, 12), (11, 0), (3, 5), (11, 12)]] == [12., 11., 2., 1.]
+    assert matrix.targets[12] == {'location': [12., 51.]}
+    assert incremental.update() is matrix
+    assert len(requested) == 3
+
+    # Distances and travel times are stored in binary next to the JSON header:
+    assert (tmp_path / 'matrix.json.bin').stat().st_size == 2 * 12 * 13 * 8
+    loaded = IncrementalRouteMatrix(client=MockClient(), file_path=file_path, use_numpy=False).matrix
+    assert loaded.shape == (12, 13) and loaded.to_dict() == matrix.to_dict()
+
+    with pytest.raises(ValueError):
+        IncrementalRouteMatrix(client=MockClient(), travel_mode='walk', file_path=file_path)
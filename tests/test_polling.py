@@ -0,0 +1,32 @@
+from geobatchpy.polling import PollScheduler, parse_retry_after
+
+
+def test_poll_scheduler_backoff():
+    scheduler = PollScheduler(min_delay=1, max_delay=10, backoff=2)
+    key = scheduler.key(api='/v1/geocode/search', batch_len=1000)
+
+    assert [scheduler.next_delay(key=key, attempt=i, elapsed=0) for i in range(5)] == [1, 2, 4, 8, 10]
+    assert scheduler.next_delay(key=key, attempt=4, elapsed=0, max_delay=5) == 5
+    assert scheduler.next_delay(key=key, attempt=0, elapsed=0, retry_after=30) == 30
+
+
+def test_poll_scheduler_learns_durations():
+    scheduler = PollScheduler(min_delay=1, max_delay=300, smoothing=0.5)
+    key = scheduler.key(api='/v1/geocode/search', batch_len=1000)
+    assert key == scheduler.key(api='/v1/geocode/search', batch_len=600)
+    assert key != scheduler.key(api='/v1/geocode/search', batch_len=100)
+
+    scheduler.record_completion(key=key, duration=60)
+    scheduler.record_completion(key=key, duration=40)
+    assert scheduler.expected_duration(key=key) == 50
+
+    # First poll waits until the job is expected to be done, then falls back to backing off:
+    assert scheduler.next_delay(key=key, attempt=0, elapsed=0) == 50
+    assert scheduler.next_delay(key=key, attempt=0, elapsed=50) == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
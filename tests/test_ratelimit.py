@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import requests
+
+from geobatchpy.client import Client
+from geobatchpy.ratelimit import GROUP_BATCH_POLL, GROUP_SINGLE, RateLimiter, TokenBucket
+from geobatchpy.retry import RetryPolicy
+from geobatchpy.transport import Transport
+from tests.mocks import MockResponse
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=100, capacity=1)
+    started = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+def test_token_bucket_async():
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    async def main():
+        started = time.monotonic()
+        await asyncio.gather(*[bucket.acquire_async() for _ in range(11)])
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_token_bucket_capacity_follows_rate():
+    bucket = TokenBucket(rate=100)
+    bucket.set_rate(10)
+    started = time.monotonic()
+    for _ in range(12):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.19  # A burst of 10, not 100
+
+    bucket = TokenBucket(rate=100, capacity=50)
+    bucket.set_rate(10)
+    started = time.monotonic()
+    for _ in range(50):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+def test_adaptive_rate_limiter():
+    limiter = RateLimiter(single=10, adaptive=True)
+    assert limiter.rate(GROUP_BATCH_POLL) is None
+
+    limiter.report(GROUP_SINGLE, 429)
+    limiter.report(GROUP_SINGLE, 429)
+    assert limiter.rate(GROUP_SINGLE) == 5
+
+    time.sleep(0.25)
+    limiter.report(GROUP_SINGLE, 429, retry_after=0.5)
+    assert limiter.rate(GROUP_SINGLE) == 2.5
+    time.sleep(0.45)
+    limiter.report(GROUP_SINGLE, 429)
+    assert limiter.rate(GROUP_SINGLE) == 2.5
+
+    for _ in range(20):
+        limiter.report(GROUP_SINGLE, 200)
+    assert limiter.rate(GROUP_SINGLE) == 10
+
+
+def test_transport_reports_to_rate_limiter(monkeypatch):
+    class MockRequestsGet(MockResponse):
+
+        def __init__(self, url, params, headers, **kwargs):
+            self.status_code = 429
+
+        @staticmethod
+        def json():
+            return {'statusCode': 429, 'error': 'Too Many Requests'}
+
+    monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+    limiter = RateLimiter(single=100, adaptive=True)
+    transport = Transport(rate_limiter=limiter, retry_policy=RetryPolicy(max_attempts=1))
+    client = Client(api_key='not-required-since-we-mock', transport=transport)
+    client.geocode(text='Hülser Markt 1, 47839 Krefeld')
+
+    assert limiter.rate(GROUP_SINGLE) == 50
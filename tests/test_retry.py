@@ -0,0 +1,60 @@
+import requests
+
+from geobatchpy.retry import RetryPolicy
+from geobatchpy.transport import Transport
+from tests.mocks import MockResponse
+
+
+def test_backoff_with_jitter():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+    assert all(0 <= policy.backoff(attempt=i) <= min(5, 2 ** i) for i in range(10))
+    assert RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False).backoff(attempt=3) == 5
+
+
+def test_retry_idempotent_requests(monkeypatch):
+    calls = []
+    closed = []
+
+    class MockRequestsGet(MockResponse):
+
+        def __init__(self, url, params, headers, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                raise requests.exceptions.ConnectionError('Connection reset by peer.')
+            self.status_code = 502 if len(calls) == 2 else 200
+
+        def close(self):
+            closed.append(self.status_code)
+
+    monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+    policy = RetryPolicy(backoff_factor=0.001)
+    response, retries = Transport(retry_policy=policy).request(
+        'GET', 'https://api.geoapify.com/v1/geocode/search?apiKey=123')
+
+    assert response.status_code == 200 and retries == 2
+    assert closed == [502]  # The failed response is released before the retry
+    assert policy.retries == {'/v1/geocode/search': 2}
+
+
+def test_retry_non_idempotent_requests(monkeypatch):
+    statuses = []
+
+    class MockRequestsPost(MockResponse):
+        headers = {'Retry-After': '0'}
+
+        def __init__(self, url, json, headers, **kwargs):
+            self.status_code = statuses.pop(0)
+
+    monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+
+    transport = Transport(retry_policy=RetryPolicy(backoff_factor=0.001, max_attempts=3))
+    statuses.extend([429, 502, 200])
+    assert transport.post('https://api.geoapify.com/v1/batch').status_code == 502
+    statuses.clear()
+    statuses.extend([429, 502, 200])
+    assert transport.post('https://api.geoapify.com/v1/batch', idempotent=True).status_code == 200
+    statuses.clear()
+    statuses.extend([503, 503, 503, 200])
+    assert transport.post('https://api.geoapify.com/v1/batch', idempotent=True).status_code == 503
+    assert transport.retry_policy.retries == {'/v1/batch': 5}
@@ -0,0 +1,88 @@
+import pytest
+import requests
+
+from geobatchpy.client import Client
+from geobatchpy.journal import JobJournal
+from geobatchpy.polling import PollScheduler
+from geobatchpy.sizing import BatchSizer
+from geobatchpy.utils import API_GEOCODE
+from tests.mocks import MockResponse
+
+
+def test_choose():
+    sizer = BatchSizer(candidates=(50, 100, 200, 500, 1000), submission_time=0.1)
+    assert sizer.choose(api=API_GEOCODE, number_of_items=10000) == 1000
+    assert sizer.choose(api=API_GEOCODE, number_of_items=30) == 30
+
+    # Turnaround assumed proportional to the size, i.e., 0.1 seconds per input:
+    sizer.record_turnaround(api=API_GEOCODE, batch_len=1000, duration=100.)
+    assert sizer.expected_wall_time(api=API_GEOCODE, number_of_items=10000, batch_len=100) == pytest.approx(20.)
+    assert sizer.choose(api=API_GEOCODE, number_of_items=10000) == 100
+    assert sizer.choose(api=API_GEOCODE, number_of_items=30) == 30
+
+    # A fixed overhead per job favors larger batches:
+    sizer.record_turnaround(api=API_GEOCODE, batch_len=100, duration=91.)
+    assert sizer.expected_turnaround(api=API_GEOCODE, batch_len=500) == pytest.approx(95.)
+    sizer.record_submission(api=API_GEOCODE, duration=1.)
+    assert sizer.choose(api=API_GEOCODE, number_of_items=10000) == 1000
+    assert sizer.choose(api='/v2/place-details', number_of_items=10000) == 1000  # No observations
+
+
+def test_persistence(tmp_path):
+    file_path = tmp_path / 'cache' / 'batch_sizes.json'
+    sizer = BatchSizer(file_path=file_path)
+    sizer.record_turnaround(api=API_GEOCODE, batch_len=200, duration=10.)
+    sizer.record_submission(api=API_GEOCODE, duration=0.2)
+    sizer.save()
+
+    sizer = BatchSizer(file_path=file_path)
+    assert sizer.expected_turnaround(api=API_GEOCODE, batch_len=200) == 10.
+    assert sizer.expected_wall_time(api=API_GEOCODE, number_of_items=1000, batch_len=200) == pytest.approx(11.)
+
+    file_path.write_text('{"turnarounds": ')
+    assert BatchSizer(file_path=file_path).expected_turnaround(api=API_GEOCODE, batch_len=200) is None
+
+
+def test_batch_len_auto(monkeypatch, tmp_path):
+    jobs = dict()
+
+    class MockRequestsPost(MockResponse):
+        status_code = 202
+
+        def __init__(self, request_url, json, headers, **kwargs):
+            self.job_id = len(jobs)
+            jobs[self.job_id] = json['inputs']
+
+        def json(self):
+            return {'url': f'https://api.geoapify.com/v1/batch?id={self.job_id}'}
+
+    class MockRequestsGet(MockResponse):
+
+        def __init__(self, url, headers, **kwargs):
+            self.job_id = int(url.split('id=')[1])
+
+        def json(self):
+            return {'results': [{'params': val['params'], 'result': {}} for val in jobs[self.job_id]]}
+
+    monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+    monkeypatch.setattr(requests.Session, 'get', MockRequestsGet)
+
+    file_path = tmp_path / 'batch_sizes.json'
+    sizer = BatchSizer(file_path=file_path, candidates=(10, 50, 100))
+    sizer.record_turnaround(api=API_GEOCODE, batch_len=100, duration=100.)
+    client = Client(api_key='123', batch_sizer=sizer)
+    client.batch._poll_scheduler = PollScheduler(min_delay=0.001)
+    addresses = [f'Hülser Markt {k}' for k in range(200)]
+
+    res = client.batch.geocode(locations=addresses, batch_len='auto', journal=tmp_path / 'journal.sqlite')
+
+    assert len(res) == 200
+    assert [len(inputs) for inputs in jobs.values()] == [10] * 20
+    with JobJournal(file_path=tmp_path / 'journal.sqlite') as journal:
+        assert journal.get_meta('batch_len') == '10'
+    assert BatchSizer(file_path=file_path).expected_turnaround(api=API_GEOCODE, batch_len=10) < 1.
+
+    with pytest.raises(ValueError):
+        client.batch.geocode(locations=iter(addresses), batch_len='auto')
+    with pytest.raises(ValueError):
+        client.batch.geocode(locations=addresses, batch_len='fast')
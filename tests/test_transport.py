@@ -0,0 +1,43 @@
+import gzip
+import json
+
+import requests
+
+from geobatchpy.transport import Transport
+from tests.mocks import MockResponse
+
+URL = 'https://api.geoapify.com/v1/batch?apiKey=123'
+DATA = {'api': '/v1/geocode/search', 'inputs': [{'params': {'text': f'Hülser Markt {k}'}} for k in range(100)]}
+
+
+def test_accept_encoding():
+    transport = Transport()
+    assert 'gzip' in transport._session.headers['Accept-Encoding']
+
+
+def test_compressed_requests(monkeypatch):
+    calls = []
+
+    class MockRequestsPost(MockResponse):
+
+        def __init__(self, url, json=None, data=None, headers=None, **kwargs):
+            calls.append((json, data, headers))
+            self.status_code = 415 if len(calls) == 3 else 202
+
+    monkeypatch.setattr(requests.Session, 'post', MockRequestsPost)
+
+    transport = Transport(compress_requests=True)
+    assert transport.post(URL, json={'api': '/v1/geocode/search'}, headers={'Accept': 'application/json'}) \
+        .status_code == 202  # Too small to be compressed
+    assert calls[-1][0] is not None and calls[-1][1] is None
+
+    assert transport.post(URL, json=DATA, headers={'Accept': 'application/json'}).status_code == 202
+    _, body, headers = calls[-1]
+    assert headers['Content-Encoding'] == 'gzip' and headers['Accept'] == 'application/json'
+    assert json.loads(gzip.decompress(body)) == DATA
+    assert len(body) < len(json.dumps(DATA)) / 5
+
+    # The server does not accept the compressed request, which is sent again uncompressed:
+    assert transport.post(URL, json=DATA).status_code == 202
+    assert len(calls) == 4 and calls[-1][0] == DATA and calls[-1][1] is None
+    assert not transport.compress_requests
@@ -2,7 +2,10 @@ import os
 
 import pytest
 
-from geobatchpy.utils import get_api_url, get_api_key, API_PLACES
+from geobatchpy.utils import (
+    get_api_url, get_api_key, is_ndjson_file, read_data_from_json_file, read_data_from_ndjson_file,
+    write_data_to_json_file, write_data_to_ndjson_file, API_PLACES
+)
 
 
 def test_get_api_url():
@@ -23,3 +26,34 @@ def test_get_api_key():
 
     os.environ['SOME_API_VAR'] = '123'
     assert '123' == get_api_key(env_variable_name='SOME_API_VAR')
+
+
+@pytest.mark.parametrize('file_name', ['data.ndjson', 'data.jsonl.gz', 'data.jsonl.zst'])
+def test_ndjson_round_trip(tmp_path, file_name):
+    if file_name.endswith('.zst'):
+        pytest.importorskip('zstandard')
+    file_path = tmp_path / file_name
+    records = [{'params': {'text': f'Hülser Markt {k}'}} for k in range(5)]
+
+    assert is_ndjson_file(file_path)
+    assert write_data_to_ndjson_file(data=iter(records), file_path=file_path) == 5
+
+    data = read_data_from_ndjson_file(file_path=file_path)
+    assert next(data) == records[0]
+    assert list(data) == records[1:]
+    assert not is_ndjson_file(tmp_path / 'data.json')
+
+
+@pytest.mark.parametrize('file_name', ['data.json', 'data.json.gz', 'data.json.zst'])
+def test_json_round_trip(tmp_path, file_name):
+    if file_name.endswith('.zst'):
+        pytest.importorskip('zstandard')
+    file_path = tmp_path / file_name
+    data = {'results': [{'params': {'text': f'Hülser Markt {k}'}} for k in range(100)]}
+
+    write_data_to_json_file(data=data, file_path=file_path)
+
+    assert not is_ndjson_file(file_path)
+    assert read_data_from_json_file(file_path=file_path) == data
+    if file_name != 'data.json':
+        assert file_path.stat().st_size < 0.5 * len(str(data))